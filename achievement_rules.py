@@ -0,0 +1,162 @@
+"""
+Declarative achievement rules.
+
+Each rule unlocks a badge when a rollup counter reaches a threshold:
+
+    {"id": "italian_explorer", "name": "🇮🇹 Italian Explorer", "description": "Cook 3 Italian recipes",
+     "icon": "🇮🇹", "counter": "cuisine:italian", "threshold": 3}
+
+Counters are those of CookingRollups.value: "meals", "quick_meals",
+"vegetarian_meals", "vegan_meals", "cuisine:<name>", "streak" and
+"longest_streak" over all time, plus "meals" per "day"/"week"/"month" and
+"healthy"/"new_cuisines" per "week" when the rule has a "window".
+
+Rules are indexed by (window, counter) and sorted by threshold, so an
+event only looks at rules whose counter it changed, and of those only the
+locked ones at or below the new value.
+
+Extra or overriding rules are read from achievement_rules.json (or the
+path in AI_CHEF_ACHIEVEMENTS_FILE): a JSON list of rules like the above.
+"""
+
+import bisect
+import json
+import os
+
+WINDOWS = ("all", "day", "week", "month")
+
+# Counters CookingRollups keeps per window; "cuisine:<name>" is also valid for "all"
+COUNTERS = {
+    "all": {"meals", "quick_meals", "vegetarian_meals", "vegan_meals", "streak", "longest_streak"},
+    "day": {"meals"},
+    "week": {"meals", "healthy", "new_cuisines"},
+    "month": {"meals"},
+}
+
+DEFAULT_RULES = [
+    {"id": "first_recipe", "name": "👨‍🍳 Your First Dish", "description": "Cook your first recipe",
+     "icon": "👨‍🍳", "counter": "meals", "threshold": 1},
+    {"id": "italian_explorer", "name": "🇮🇹 Italian Explorer", "description": "Cook 3 Italian recipes",
+     "icon": "🇮🇹", "counter": "cuisine:italian", "threshold": 3},
+    {"id": "asian_master", "name": "🍜 Asian Master", "description": "Cook 3 Asian recipes",
+     "icon": "🍜", "counter": "cuisine:asian", "threshold": 3},
+    {"id": "mexican_fiesta", "name": "🌮 Mexican Fiesta", "description": "Cook 3 Mexican recipes",
+     "icon": "🌮", "counter": "cuisine:mexican", "threshold": 3},
+    {"id": "vegetarian_champion", "name": "🥗 Vegetarian Champion", "description": "Cook 5 vegetarian recipes",
+     "icon": "🥗", "counter": "vegetarian_meals", "threshold": 5},
+    {"id": "vegan_virtuoso", "name": "🌱 Vegan Virtuoso", "description": "Cook 5 vegan recipes",
+     "icon": "🌱", "counter": "vegan_meals", "threshold": 5},
+    {"id": "speed_cook", "name": "⚡ Speed Cook", "description": "Cook 5 recipes under 30 minutes",
+     "icon": "⚡", "counter": "quick_meals", "threshold": 5},
+    {"id": "gourmet_chef", "name": "👑 Gourmet Chef", "description": "Cook 10 recipes",
+     "icon": "👑", "counter": "meals", "threshold": 10},
+    {"id": "master_chef", "name": "🏆 Master Chef", "description": "Cook 25 recipes",
+     "icon": "🏆", "counter": "meals", "threshold": 25},
+    {"id": "culinary_legend", "name": "⭐ Culinary Legend", "description": "Cook 50 recipes",
+     "icon": "⭐", "counter": "meals", "threshold": 50},
+    {"id": "week_warrior", "name": "🔥 Week Warrior", "description": "Maintain a 7-day cooking streak",
+     "icon": "🔥", "counter": "longest_streak", "threshold": 7},
+]
+
+
+def validate_rule(rule):
+    """Return an error message for a malformed rule, or None."""
+    for field in ("id", "name", "counter", "threshold"):
+        if field not in rule:
+            return f"missing {field}"
+    window = rule.get("window", "all")
+    if window not in WINDOWS:
+        return f"unknown window {rule['window']}"
+    counter = rule["counter"]
+    if not isinstance(counter, str):
+        return "counter must be a string"
+    is_cuisine = window == "all" and counter.startswith("cuisine:") and counter[8:]
+    if not is_cuisine and counter not in COUNTERS[window]:
+        return f"unknown counter {counter!r} for window {window}"
+    if not isinstance(rule["threshold"], int) or rule["threshold"] < 1:
+        return "threshold must be a positive integer"
+    return None
+
+
+def load_rules(filename=None):
+    """Return DEFAULT_RULES with rules from the rules file added or overriding by id."""
+    filename = filename or os.getenv("AI_CHEF_ACHIEVEMENTS_FILE", "achievement_rules.json")
+    rules = {rule["id"]: dict(rule) for rule in DEFAULT_RULES}
+    if os.path.exists(filename):
+        try:
+            with open(filename, 'r') as f:
+                extra = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            extra = []
+        for rule in extra if isinstance(extra, list) else []:
+            if isinstance(rule, dict) and validate_rule(rule) is None:
+                rules[rule["id"]] = {**rules.get(rule["id"], {}), **rule}
+    return list(rules.values())
+
+
+class RuleIndex:
+    """Locked rules grouped by (window, counter) and sorted by threshold."""
+
+    def __init__(self, rules, unlocked=()):
+        unlocked = set(unlocked)
+        self.rules = {rule["id"]: rule for rule in rules}
+        self.index = {}
+        for rule in sorted(rules, key=lambda r: r["threshold"]):
+            if rule["id"] in unlocked:
+                continue
+            key = (rule.get("window", "all"), rule["counter"])
+            thresholds, ids = self.index.setdefault(key, ([], []))
+            thresholds.append(rule["threshold"])
+            ids.append(rule["id"])
+
+    def _take(self, key, value):
+        """Remove and return ids of locked rules on key with threshold <= value."""
+        entry = self.index.get(key)
+        if not entry:
+            return []
+        thresholds, ids = entry
+        end = bisect.bisect_right(thresholds, value)
+        if end == 0:
+            return []
+        reached = ids[:end]
+        del thresholds[:end]
+        del ids[:end]
+        if not ids:
+            del self.index[key]
+        return reached
+
+    def evaluate(self, rollups, changed=None, day=None):
+        """
+        Find rules newly satisfied by the rollups.
+
+        Args:
+            rollups (CookingRollups): Current aggregates
+            changed (set): (window, counter) keys that changed; every indexed key if None
+            day (str): Day of the event, selecting the bucket for windowed counters;
+                with None, windowed rules use their best bucket in the history
+
+        Returns:
+            list: Ids of rules that are now satisfied, removed from the index
+        """
+        keys = list(self.index) if changed is None else [key for key in changed if key in self.index]
+        reached = []
+        for window, counter in keys:
+            reached.extend(self._take((window, counter), rollups.value(window, counter, day)))
+        return reached
+
+    def newly_reached(self, rollups, changed, day, unlocked):
+        """
+        Like evaluate, but leaves the index untouched so one index can serve
+        many users; `unlocked` holds the user's already unlocked ids.
+
+        Every rule at or below the current value is checked against
+        `unlocked`: a rule added later with a lower threshold than one the
+        user already holds is still awarded.
+        """
+        keys = list(self.index) if changed is None else [key for key in changed if key in self.index]
+        reached = []
+        for window, counter in keys:
+            thresholds, ids = self.index[(window, counter)]
+            end = bisect.bisect_right(thresholds, rollups.value(window, counter, day))
+            reached.extend(rule_id for rule_id in ids[:end] if rule_id not in unlocked)
+        return reached
@@ -4,21 +4,15 @@ AI Chef - Smart Cooking Assistant
 A command-line based application to help you discover recipes, plan meals, and to cook smarter
 """
 
+import csv
 import os
-try:
-    from dotenv import load_dotenv
-except ImportError:
-    def load_dotenv():
-        return None
+import sys
 
-load_dotenv()
-# ...existing code...
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.prompt import Prompt
 from rich.prompt import Confirm
-from rich.markdown import Markdown
 from rich import box
 
 from recipes import (
@@ -27,16 +21,24 @@ from recipes import (
     get_recipe_by_name,
     RECIPE_DATABASE
 )
-from ai_generator import (
-    generate_recipe_with_ai,
-    get_cooking_tips,
-    suggest_substitutions
-)
-from meal_planner import MealPlanner, SavedRecipes, PantryManager
-from gamification import GamificationManager
+from local_composer import compose_recipe
+from pantry_import import import_pantry_file
+from persistence import flush_all
+from session import Session
 
 console = Console()
-gamification = GamificationManager()
+# Created on first use so the menu comes up without loading the AI client
+tips_prefetcher = None
+
+
+def get_tips_prefetcher():
+    """Get or create the tips prefetcher, or None if prefetching is off."""
+    global tips_prefetcher
+    from prefetch import TipsPrefetcher, prefetch_enabled
+    if tips_prefetcher is None and prefetch_enabled():
+        from ai_generator import get_cooking_tips
+        tips_prefetcher = TipsPrefetcher(get_cooking_tips)
+    return tips_prefetcher
 
 
 def parse_optional_int(value):
@@ -49,6 +51,22 @@ def parse_optional_int(value):
         return None
 
 
+def parse_day_budgets(value):
+    """Parse per-day cook time limits like "Monday=20, Fri=30"; invalid parts are skipped."""
+    budgets = {}
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    for part in (value or "").split(","):
+        if "=" not in part:
+            continue
+        name, minutes = part.split("=", 1)
+        name = name.strip().lower()
+        minutes = parse_optional_int(minutes.strip())
+        day = next((d for d in days if name and d.lower().startswith(name)), None)
+        if day and minutes is not None:
+            budgets[day] = minutes
+    return budgets
+
+
 def display_banner():
     """Display welcome banner."""
     banner = """
@@ -60,9 +78,9 @@ def display_banner():
     console.print(banner, style="bold cyan")
 
 
-def display_gamification_status():
+def display_gamification_status(session):
     """Display current gamification status."""
-    status = gamification.get_gamification_status()
+    status = session.gamification.get_gamification_status()
     streak = status["streak"]
     achievements = status["achievements"]
     challenges = status["challenges"]
@@ -91,11 +109,11 @@ def display_gamification_status():
         console.print(f"      [{bar}] {progress}/{target} - {challenge['reward']}")
 
 
-def display_achievements_menu():
+def display_achievements_menu(session):
     """Display achievements and badges."""
     console.print("\n[bold yellow]🏆 Achievements & Badges[/bold yellow]\n")
     
-    status = gamification.get_gamification_status()
+    status = session.gamification.get_gamification_status()
     achievements = status["achievements"]
     unlocked = achievements["unlocked"]
     locked = achievements["locked"]
@@ -166,8 +184,12 @@ def display_recipe(recipe):
     
     console.print(f"\n[bold cyan]{'='*60}[/bold cyan]\n")
 
+    # Tips are the usual next step for a recipe on screen; warm them up
+    if os.getenv("OPENAI_API_KEY") and get_tips_prefetcher():
+        tips_prefetcher.prefetch(recipe.get('name', ''))
+
 
-def find_recipes_menu():
+def find_recipes_menu(session):
     """Menu for finding recipes by ingredients."""
     console.print("\n[bold yellow]🔍 Find Recipes by Ingredients[/bold yellow]\n")
     
@@ -247,13 +269,13 @@ def find_recipes_menu():
                 
                 # Option to save
                 if Confirm.ask("Save this recipe to favorites?"):
-                    saved_recipes = SavedRecipes()
+                    saved_recipes = session.saved_recipes
                     if saved_recipes.add_recipe(recipe):
                         console.print("[green]✓ Recipe saved![/green]")
                         # Record gamification
                         is_veg = "vegetarian" in [d.lower() for d in recipe.get("dietary", [])]
                         is_vegan = "vegan" in [d.lower() for d in recipe.get("dietary", [])]
-                        gamification.record_recipe_cooked(
+                        session.gamification.record_recipe_cooked(
                             recipe_name=recipe["name"],
                             cuisine=recipe.get("cuisine"),
                             cooking_time=recipe.get("cook_time"),
@@ -267,15 +289,15 @@ def find_recipes_menu():
             console.print("[red]Invalid selection.[/red]")
 
 
-def ai_recipe_menu():
+def ai_recipe_menu(session):
     """Menu for generating recipes with AI."""
     console.print("\n[bold yellow]🤖 Generate Custom Recipe with AI[/bold yellow]\n")
     
-    # Check if API key is set
-    if not os.getenv("OPENAI_API_KEY"):
-        console.print("[red]Error: OPENAI_API_KEY not found in environment.[/red]")
-        console.print("[yellow]Please set your API key in a .env file or environment variable.[/yellow]")
-        return
+    # Without an API key, recipes are composed locally instead
+    api_available = bool(os.getenv("OPENAI_API_KEY"))
+    if not api_available:
+        console.print("[yellow]OPENAI_API_KEY not found - recipes will be composed locally from templates.[/yellow]")
+        console.print("[dim]Set your API key in a .env file for fully custom AI recipes.[/dim]\n")
     
     console.print("[dim]Tell me what you'd like to cook (or press Enter for custom options):[/dim]")
     description = Prompt.ask("Recipe description", default="")
@@ -303,17 +325,25 @@ def ai_recipe_menu():
             cook_time = parsed_time
         difficulty = Prompt.ask("Difficulty level", default="")
     
-    console.print("\n[cyan]🧠 Generating your custom recipe with AI...[/cyan]\n")
+    request = {
+        "ingredients": ingredients,
+        "dietary_preference": dietary,
+        "cuisine_type": cuisine,
+        "cook_time": cook_time,
+        "difficulty": difficulty,
+        "description": description
+    }
     
     # Generate recipe
-    recipe = generate_recipe_with_ai(
-        ingredients=ingredients,
-        dietary_preference=dietary,
-        cuisine_type=cuisine,
-        cook_time=cook_time,
-        difficulty=difficulty,
-        description=description
-    )
+    if api_available:
+        from ai_generator import generate_recipe_hedged
+        console.print("\n[cyan]🧠 Generating your custom recipe with AI...[/cyan]\n")
+        deadline = float(os.getenv("AI_CHEF_HEDGE_SECONDS", "20"))
+        recipe, from_model = generate_recipe_hedged(deadline=deadline, **request)
+        if not from_model:
+            console.print("[yellow]The AI didn't come through in time, so here's a recipe composed locally.[/yellow]")
+    else:
+        recipe = compose_recipe(**request)
     
     if "error" in recipe:
         console.print(f"[red]Error: {recipe['error']}[/red]")
@@ -326,13 +356,13 @@ def ai_recipe_menu():
     
     # Option to save
     if Confirm.ask("Save this AI-generated recipe?"):
-        saved_recipes = SavedRecipes()
+        saved_recipes = session.saved_recipes
         if saved_recipes.add_recipe(recipe):
             console.print("[green]✓ Recipe saved![/green]")
             # Record gamification
             is_veg = dietary and "vegetarian" in dietary.lower()
             is_vegan = dietary and "vegan" in dietary.lower()
-            gamification.record_recipe_cooked(
+            session.gamification.record_recipe_cooked(
                 recipe_name=recipe.get("name", "AI Recipe"),
                 cuisine=cuisine,
                 cooking_time=cook_time,
@@ -354,8 +384,15 @@ def ai_cooking_tips_menu():
     dietary_preferences = Prompt.ask("Dietary preferences (optional)", default="")
     dietary_value = dietary_preferences if dietary_preferences else None
 
+    from ai_generator import get_cooking_tips
+    from rich.markdown import Markdown
+
     console.print("\n[cyan]Generating tips...[/cyan]\n")
-    tips = get_cooking_tips(recipe_name, dietary_value)
+    tips = None
+    if get_tips_prefetcher():
+        tips = tips_prefetcher.get(recipe_name, dietary_value, timeout=30)
+    if tips is None:
+        tips = get_cooking_tips(recipe_name, dietary_value)
     console.print(Panel(Markdown(tips), title=f"Tips for {recipe_name}", border_style="cyan"))
 
 
@@ -368,24 +405,28 @@ def ingredient_substitutions_menu():
         console.print("[yellow]Please enter an ingredient.[/yellow]")
         return
 
+    from ai_generator import suggest_substitutions
+    from rich.markdown import Markdown
+
     console.print("\n[cyan]Finding substitutions...[/cyan]\n")
     substitutions = suggest_substitutions(ingredient)
     console.print(Panel(Markdown(substitutions), title=f"Substitutions for {ingredient}", border_style="green"))
 
 
-def pantry_menu():
+def pantry_menu(session):
     """Menu for pantry inventory and expiry tracking."""
     console.print("\n[bold yellow]🥫 Pantry Manager[/bold yellow]\n")
 
-    pantry = PantryManager()
+    pantry = session.pantry
 
     console.print("1. View pantry items")
     console.print("2. Add pantry item")
     console.print("3. Remove pantry item")
     console.print("4. View expiring soon")
     console.print("5. Suggest recipes using expiring items")
+    console.print("6. Import items from a file (CSV, JSON or receipt text)")
 
-    choice = Prompt.ask("\nSelect an option", choices=["1", "2", "3", "4", "5"])
+    choice = Prompt.ask("\nSelect an option", choices=["1", "2", "3", "4", "5", "6"])
 
     if choice == "1":
         items = pantry.get_all_items()
@@ -482,24 +523,39 @@ def pantry_menu():
             )
         console.print(table)
 
+    elif choice == "6":
+        filename = Prompt.ask("File to import")
+        try:
+            counts = import_pantry_file(filename, pantry)
+        except (IOError, ValueError, csv.Error) as e:
+            console.print(f"[red]Import failed: {e}[/red]")
+            return
+        console.print(
+            f"[green]✓ Imported {counts['added']} new and {counts['updated']} updated items.[/green]"
+        )
+        if counts["skipped"]:
+            console.print(f"[yellow]Skipped {counts['skipped']} rows without a name.[/yellow]")
+
 
-def meal_planning_menu():
+def meal_planning_menu(session):
     """Menu for meal planning."""
     console.print("\n[bold yellow]📅 Meal Planning[/bold yellow]\n")
     
-    planner = MealPlanner()
+    planner = session.planner
     
     console.print("1. Create weekly meal plan")
     console.print("2. View current meal plan")
     console.print("3. Generate grocery list")
     console.print("4. Add specific meal to plan")
+    console.print("5. Shopping list (minus pantry)")
     
-    choice = Prompt.ask("\nSelect an option", choices=["1", "2", "3", "4"])
+    choice = Prompt.ask("\nSelect an option", choices=["1", "2", "3", "4", "5"])
     
     if choice == "1":
         console.print("\n[dim]Optional preferences:[/dim]")
         dietary = Prompt.ask("Dietary preference", default="")
         max_time = Prompt.ask("Max cook time per meal (minutes)", default="")
+        busy_days = Prompt.ask("Per-day time limits (e.g. Monday=20, Friday=30)", default="")
 
         max_time_int = parse_optional_int(max_time)
         if max_time and max_time_int is None:
@@ -510,9 +566,14 @@ def meal_planning_menu():
         console.print("\n[cyan]Creating your weekly meal plan...[/cyan]\n")
         week_plan = planner.create_weekly_plan(
             dietary_preference=dietary_pref,
-            max_cook_time=max_time_int
+            max_cook_time=max_time_int,
+            day_time_budgets=parse_day_budgets(busy_days)
         )
         
+        if not week_plan:
+            console.print("[yellow]No recipes match those preferences. Try relaxing them.[/yellow]")
+            return
+        
         # Display plan
         plan_table = Table(show_header=True, header_style="bold cyan", box=box.ROUNDED)
         plan_table.add_column("Day", style="yellow", width=12)
@@ -564,7 +625,11 @@ def meal_planning_menu():
             console.print("\n[yellow]No meal plan found. Create one first![/yellow]")
             return
         
-        grocery_list = planner.generate_grocery_list(current_plan)
+        household = parse_optional_int(Prompt.ask("Servings per meal (blank = recipe servings)", default=""))
+        if len(planner.meal_plan) > 1 and Confirm.ask("Include all saved plans?", default=False):
+            grocery_list = planner.generate_combined_grocery_list(household_size=household)
+        else:
+            grocery_list = planner.generate_grocery_list(current_plan, household_size=household)
         
         console.print("\n[bold green]🛒 Your Grocery List:[/bold green]\n")
         
@@ -586,12 +651,39 @@ def meal_planning_menu():
         else:
             console.print("[red]Recipe not found.[/red]")
 
+    elif choice == "5":
+        if not planner.get_current_plan():
+            console.print("\n[yellow]No meal plan found. Create one first![/yellow]")
+            return
+        
+        household = parse_optional_int(Prompt.ask("Servings per meal (blank = recipe servings)", default=""))
+        shopping = planner.generate_shopping_list(session.pantry, household_size=household)
+        
+        if shopping["expiring"]:
+            console.print("\n[bold red]⚠ Expires before it's needed:[/bold red]")
+            for item in shopping["expiring"]:
+                console.print(f"  • {item['item']} (expires {item['expires_on']}, needed {item['needed_on']})")
+        
+        if shopping["covered"]:
+            covered = ", ".join(item["item"] for item in shopping["covered"])
+            console.print(f"\n[dim]Already in your pantry: {covered}[/dim]")
+        
+        if not shopping["to_buy"]:
+            console.print("\n[green]✓ Your pantry covers the whole plan![/green]")
+            return
+        
+        console.print("\n[bold green]🛒 Still to buy:[/bold green]\n")
+        for category, items in shopping["to_buy"].items():
+            console.print(f"\n[bold cyan]{category}:[/bold cyan]")
+            for item in sorted(items, key=lambda x: x.get("item", "")):
+                console.print(f"  □ {item.get('item', 'Unknown')} ({item.get('quantity', 1)} {item.get('unit', 'recipe-use')})")
 
-def saved_recipes_menu():
+
+def saved_recipes_menu(session):
     """Menu for viewing saved recipes."""
     console.print("\n[bold yellow]💾 Saved Recipes[/bold yellow]\n")
     
-    saved_recipes = SavedRecipes()
+    saved_recipes = session.saved_recipes
     saved = saved_recipes.get_all_saved()
     
     if not saved:
@@ -641,7 +733,7 @@ def saved_recipes_menu():
             console.print("[red]Invalid selection.[/red]")
 
 
-def browse_all_recipes():
+def browse_all_recipes(session):
     """Browse all available recipes."""
     console.print("\n[bold yellow]📖 Browse All Recipes[/bold yellow]\n")
     
@@ -696,49 +788,54 @@ def browse_all_recipes():
                 display_recipe(filtered[idx])
                 
                 if Confirm.ask("Save this recipe?"):
-                    saved_recipes = SavedRecipes()
+                    saved_recipes = session.saved_recipes
                     if saved_recipes.add_recipe(filtered[idx]):
                         console.print("[green]✓ Recipe saved![/green]")
         except ValueError:
             console.print("[red]Invalid selection.[/red]")
 
 
-def main_menu():
+def display_main_menu():
+    """Print the main menu options."""
+    console.print("\n[bold cyan]━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━[/bold cyan]")
+    console.print("[bold]What would you like to do?[/bold]\n")
+    console.print("[cyan]1.[/cyan] 🔍 Find recipes by ingredients")
+    console.print("[cyan]2.[/cyan] 🤖 Generate custom recipe with AI")
+    console.print("[cyan]3.[/cyan] 📅 Meal planning")
+    console.print("[cyan]4.[/cyan] 🥫 Pantry manager")
+    console.print("[cyan]5.[/cyan] 💾 View saved recipes")
+    console.print("[cyan]6.[/cyan] 📖 Browse all recipes")
+    console.print("[cyan]7.[/cyan] 🏆 View achievements")
+    console.print("[cyan]8.[/cyan] 📊 Gamification status")
+    console.print("[cyan]9.[/cyan] 💡 AI cooking tips")
+    console.print("[cyan]10.[/cyan] 🔁 Ingredient substitutions")
+    console.print("[cyan]11.[/cyan] 🚪 Exit")
+    console.print("[bold cyan]━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━[/bold cyan]")
+
+
+def main_menu(session):
     """Display main menu and handle user choices."""
     while True:
-        console.print("\n[bold cyan]━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━[/bold cyan]")
-        console.print("[bold]What would you like to do?[/bold]\n")
-        console.print("[cyan]1.[/cyan] 🔍 Find recipes by ingredients")
-        console.print("[cyan]2.[/cyan] 🤖 Generate custom recipe with AI")
-        console.print("[cyan]3.[/cyan] 📅 Meal planning")
-        console.print("[cyan]4.[/cyan] 🥫 Pantry manager")
-        console.print("[cyan]5.[/cyan] 💾 View saved recipes")
-        console.print("[cyan]6.[/cyan] 📖 Browse all recipes")
-        console.print("[cyan]7.[/cyan] 🏆 View achievements")
-        console.print("[cyan]8.[/cyan] 📊 Gamification status")
-        console.print("[cyan]9.[/cyan] 💡 AI cooking tips")
-        console.print("[cyan]10.[/cyan] 🔁 Ingredient substitutions")
-        console.print("[cyan]11.[/cyan] 🚪 Exit")
-        console.print("[bold cyan]━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━[/bold cyan]")
-        
+        display_main_menu()
+
         choice = Prompt.ask("\nSelect an option", choices=["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11"])
         
         if choice == "1":
-            find_recipes_menu()
+            find_recipes_menu(session)
         elif choice == "2":
-            ai_recipe_menu()
+            ai_recipe_menu(session)
         elif choice == "3":
-            meal_planning_menu()
+            meal_planning_menu(session)
         elif choice == "4":
-            pantry_menu()
+            pantry_menu(session)
         elif choice == "5":
-            saved_recipes_menu()
+            saved_recipes_menu(session)
         elif choice == "6":
-            browse_all_recipes()
+            browse_all_recipes(session)
         elif choice == "7":
-            display_achievements_menu()
+            display_achievements_menu(session)
         elif choice == "8":
-            display_gamification_status()
+            display_gamification_status(session)
         elif choice == "9":
             ai_cooking_tips_menu()
         elif choice == "10":
@@ -750,24 +847,39 @@ def main_menu():
 
 def main():
     """Main application entry point."""
+    # Load environment variables once, before any setting is read
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        pass
+    else:
+        load_dotenv()
+
     display_banner()
     console.print("[dim]Making cooking easier, one recipe at a time...[/dim]\n")
     
-    # Load environment variables
-    load_dotenv()
-    
     # Check for API key
     if not os.getenv("OPENAI_API_KEY"):
         console.print("[yellow]⚠️  Note: OPENAI_API_KEY not found. AI features will be limited.[/yellow]")
         console.print("[dim]Set up your API key in a .env file to enable AI recipe generation.[/dim]\n")
     
+    # Stores are loaded on first use and kept for the whole run
+    session = Session()
     try:
-        main_menu()
+        main_menu(session)
     except KeyboardInterrupt:
         console.print("\n\n[bold cyan]Goodbye! 👋[/bold cyan]\n")
     except Exception as e:
         console.print(f"\n[red]An error occurred: {str(e)}[/red]\n")
+    finally:
+        if tips_prefetcher:
+            tips_prefetcher.shutdown()
+        flush_all()
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Non-interactive subcommands, e.g. `ai_chef.py search chicken rice`
+        from cli import main as cli_main
+        sys.exit(cli_main())
     main()
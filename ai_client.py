@@ -0,0 +1,298 @@
+"""
+Shared call layer for OpenAI requests: deadlines, retries and rate limiting.
+"""
+
+import os
+import random
+import threading
+import time
+
+import metrics
+from prompts import count_message_tokens, count_tokens
+
+# Status codes worth retrying; everything else is returned to the caller
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {"APITimeoutError", "APIConnectionError"}
+
+DEFAULT_MAX_ATTEMPTS = 4
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 20.0
+
+
+class AIDeadlineExceeded(Exception):
+    """Raised when a call can't complete before its deadline."""
+
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by every model call."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        if not self.rate > 0:
+            raise ValueError(f"Requests per second must be positive, got {rate} "
+                             "(check AI_CHEF_REQUESTS_PER_SECOND or --rps)")
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def acquire(self, deadline=None):
+        """Block until a token is available; return False if the deadline passes first."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for a while, e.g. after a Retry-After header."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+class AdaptiveConcurrency:
+    """
+    Limit in-flight calls with additive increase / multiplicative decrease.
+
+    Every successful call nudges the limit up by 1/limit; a throttled call
+    halves it, so concurrency settles just under what the provider accepts.
+    """
+
+    def __init__(self, max_limit=8, min_limit=1, initial_limit=None):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(initial_limit or max_limit)
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, deadline=None):
+        """Wait for a free slot; return False if the deadline passes first."""
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    return False
+                self.condition.wait(timeout)
+            self.in_flight += 1
+            return True
+
+    def release(self, throttled=False):
+        """Free a slot and adapt the limit to how the call went."""
+        with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.min_limit, self.limit / 2)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+
+rate_limiter = TokenBucket(rate=float(os.getenv("AI_CHEF_REQUESTS_PER_SECOND", "3")))
+concurrency = AdaptiveConcurrency(max_limit=int(os.getenv("AI_CHEF_MAX_CONCURRENCY", "8")))
+
+
+def configure(requests_per_second=None, max_concurrency=None):
+    """Replace the shared limiters, e.g. to match a provider's tier limits."""
+    global rate_limiter, concurrency
+    if requests_per_second is not None:
+        rate_limiter = TokenBucket(rate=requests_per_second)
+    if max_concurrency is not None:
+        concurrency = AdaptiveConcurrency(max_limit=max_concurrency)
+
+
+def _status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(error):
+    """Return True for transient errors: throttling, timeouts and 5xx."""
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    return _status_code(error) in RETRYABLE_STATUS_CODES
+
+
+def retry_after_seconds(error):
+    """Read Retry-After (or retry-after-ms) from an error response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter for the given 0-based attempt."""
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+class CompletionResult:
+    """Text and timing of a finished chat completion."""
+
+    def __init__(self, text, model, attempt, wall_time, ttft, prompt_tokens, completion_tokens, parsed=None):
+        self.text = text
+        self.model = model
+        self.attempt = attempt
+        self.wall_time = wall_time
+        self.ttft = ttft
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.parsed = parsed
+
+
+def _stream_completion(client, deadline, started, request):
+    """Send one streamed request and return (text, ttft, usage)."""
+    stream = client.chat.completions.create(
+        timeout=deadline - time.monotonic(),
+        stream=True,
+        stream_options={"include_usage": True},
+        **request
+    )
+    parts = []
+    ttft = None
+    usage = None
+    for chunk in stream:
+        # The request timeout only bounds each read, not the whole stream
+        if time.monotonic() >= deadline:
+            stream.close()
+            raise AIDeadlineExceeded(f"Response still streaming after {deadline - started:.0f} seconds")
+        if chunk.choices:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if ttft is None:
+                    ttft = time.monotonic() - started
+                parts.append(delta)
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+    return "".join(parts), ttft, usage
+
+
+def chat_completion(client, operation="chat", parse=None, tags=None, timeout=60.0,
+                    max_attempts=DEFAULT_MAX_ATTEMPTS, **request):
+    """
+    Create a chat completion through the shared limiters with retries.
+
+    The response is streamed so time-to-first-token can be measured, and
+    one metrics event is recorded per call whether it succeeds or fails.
+
+    Args:
+        client: OpenAI client instance
+        operation (str): Name the call is reported under in metrics
+        parse (callable): Optional parser for the text; a result dict with
+            an "error" key counts as a parse failure
+        tags (dict): Extra fields for the metrics event
+        timeout (float): Deadline in seconds for the whole call, retries included
+        max_attempts (int): Maximum number of requests to send
+        **request: Arguments for client.chat.completions.create
+
+    Returns:
+        CompletionResult: Text, parsed value, token counts and timings
+
+    Raises:
+        AIDeadlineExceeded: If the deadline passes before a response arrives
+        Exception: The last error once retries are exhausted or not allowed
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    event = {"operation": operation, "model": request.get("model")}
+    event.update(tags or {})
+
+    try:
+        text, ttft, usage, attempt = _call_with_retries(client, started, deadline, max_attempts, request)
+    except Exception as e:
+        event.update({
+            "wall_time": time.monotonic() - started,
+            "attempt": getattr(e, "attempt", max_attempts),
+            "error": type(e).__name__,
+        })
+        metrics.record(event)
+        raise
+
+    if usage is not None:
+        prompt_tokens = usage.prompt_tokens
+        completion_tokens = usage.completion_tokens
+    else:
+        prompt_tokens = count_message_tokens(request.get("messages", []))
+        completion_tokens = count_tokens(text)
+        event["tokens_estimated"] = True
+
+    result = CompletionResult(
+        text=text,
+        model=request.get("model"),
+        attempt=attempt,
+        wall_time=time.monotonic() - started,
+        ttft=ttft,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens
+    )
+    if parse is not None:
+        result.parsed = parse(text)
+        event["parse_ok"] = not (isinstance(result.parsed, dict) and "error" in result.parsed)
+
+    event.update({
+        "wall_time": result.wall_time,
+        "ttft": ttft,
+        "attempt": attempt,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost": metrics.estimate_cost(result.model, prompt_tokens, completion_tokens),
+    })
+    metrics.record(event)
+    return result
+
+
+def _call_with_retries(client, started, deadline, max_attempts, request):
+    last_error = None
+
+    for attempt in range(max_attempts):
+        if not concurrency.acquire(deadline):
+            break
+        throttled = False
+        try:
+            if not rate_limiter.acquire(deadline):
+                break
+            if deadline - time.monotonic() <= 0:
+                break
+            text, ttft, usage = _stream_completion(client, deadline, started, request)
+            return text, ttft, usage, attempt + 1
+        except Exception as e:
+            e.attempt = attempt + 1
+            if not is_retryable(e):
+                raise
+            last_error = e
+            throttled = _status_code(e) == 429
+            retry_after = retry_after_seconds(e)
+            if retry_after is not None:
+                rate_limiter.pause(retry_after)
+        finally:
+            concurrency.release(throttled=throttled)
+
+        delay = max(backoff_delay(attempt), retry_after or 0)
+        if time.monotonic() + delay >= deadline or attempt == max_attempts - 1:
+            break
+        time.sleep(delay)
+
+    if last_error is not None:
+        raise last_error
+    raise AIDeadlineExceeded(f"No response within {deadline - started:.0f} seconds")
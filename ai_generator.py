@@ -5,13 +5,28 @@ AI-powered recipe generation using OpenAI API Infrastructure.
 import os
 import json
 import re
-from openai import OpenAI
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from ai_client import chat_completion
+from local_composer import compose_recipe
+from prompt_cache import PromptCache, constraint_key
+from prompts import (
+    RECIPE_PROMPT_VERSION,
+    build_recipe_messages,
+    build_retry_messages,
+    build_substitution_messages,
+    build_tips_messages
+)
+from routing import router
+from substitutions import LearnedSubstitutions, find_substitutions, format_substitutions
 
-# Load environment variables
-load_dotenv()
 # Initialize client as None, will be created when needed
 client = None
+prompt_cache = None
+# AI substitution answers, read from disk once per process
+learned_substitutions = None
+# Worker threads for hedged generation, created on first use
+hedge_executor = None
 
 
 def _get_client():
@@ -20,12 +35,31 @@ def _get_client():
     if client is None:
         api_key = os.getenv("OPENAI_API_KEY")
         if api_key:
-            client = OpenAI(api_key=api_key)
+            # The SDK takes most of a second to import, so only load it when needed
+            from openai import OpenAI
+            # Retries and timeouts are handled by ai_client.chat_completion
+            client = OpenAI(api_key=api_key, max_retries=0)
     return client
 
 
+def _get_prompt_cache():
+    """Get or create the similarity cache for generated recipes."""
+    global prompt_cache
+    if prompt_cache is None:
+        prompt_cache = PromptCache()
+    return prompt_cache
+
+
+def _get_learned_substitutions():
+    """Get or load the table of learned substitution answers."""
+    global learned_substitutions
+    if learned_substitutions is None:
+        learned_substitutions = LearnedSubstitutions()
+    return learned_substitutions
+
+
 def generate_recipe_with_ai(ingredients=None, dietary_preference=None, cuisine_type=None, 
-                           cook_time=None, difficulty=None, description=None):
+                           cook_time=None, difficulty=None, description=None, use_cache=True):
     """
     Generate a custom recipe using AI based on user preferences.
     
@@ -36,80 +70,143 @@ def generate_recipe_with_ai(ingredients=None, dietary_preference=None, cuisine_t
         cook_time (int): Maximum cooking time in minutes
         difficulty (str): Difficulty level
         description (str): Free-form description of what user wants
+        use_cache (bool): Reuse a recipe generated for a similar earlier request
         
     Returns:
         dict: Generated recipe with name, ingredients, and instructions
     """
-    # Build the prompt based on provided parameters
-    prompt_parts = ["Create a detailed recipe"]
-    
-    if description:
-        prompt_parts.append(f"for: {description}")
-    
-    if ingredients:
-        prompt_parts.append(f"using these ingredients: {', '.join(ingredients)}")
-    
-    if dietary_preference:
-        prompt_parts.append(f"that is {dietary_preference}")
-    
-    if cuisine_type:
-        prompt_parts.append(f"in {cuisine_type} style")
-    
-    if cook_time:
-        prompt_parts.append(f"that takes no more than {cook_time} minutes to cook")
-    
-    if difficulty:
-        prompt_parts.append(f"with {difficulty} difficulty level")
-    
-    prompt = " ".join(prompt_parts) + "."
-    prompt += "\n\nReturn ONLY valid JSON with this exact schema:\n"
-    prompt += "{\"name\": string, \"servings\": int, \"cook_time\": int, \"difficulty\": \"easy|medium|hard\", \"ingredients\": [string], \"instructions\": [string], \"cuisine\": string, \"dietary\": [string]}"
+    cache_text = " ".join([description or ""] + list(ingredients or []))
+    constraints = constraint_key(dietary_preference, cuisine_type, cook_time, difficulty)
+    if use_cache and cache_text.strip():
+        cached = _get_prompt_cache().lookup(cache_text, constraints)
+        if cached:
+            return cached
+
+    messages = build_recipe_messages(
+        ingredients=ingredients,
+        dietary_preference=dietary_preference,
+        cuisine_type=cuisine_type,
+        cook_time=cook_time,
+        difficulty=difficulty,
+        description=description
+    )
     
     try:
         client_instance = _get_client()
         if not client_instance:
             return {
                 "error": "OpenAI client not initialized",
+                "error_type": "config",
                 "suggestion": "Make sure your OPENAI_API_KEY is set correctly in the .env file"
             }
         
         last_parse_error = None
         for attempt in range(2):
-            response = client_instance.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a professional chef who creates delicious, easy-to-follow recipes tailored to user preferences. Output must be valid JSON only."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt if attempt == 0 else f"Your previous output was not parseable ({last_parse_error}). Return only valid JSON in the exact schema."
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=1500
+            attempt_messages = messages if attempt == 0 else build_retry_messages(messages, last_parse_error)
+            route = router.route("generate_recipe", attempt_messages)
+            result = chat_completion(
+                client_instance,
+                operation="generate_recipe",
+                parse=parse_ai_recipe,
+                tags={
+                    "parse_attempt": attempt + 1,
+                    "prompt_version": RECIPE_PROMPT_VERSION,
+                    "route": route["reason"]
+                },
+                timeout=route["timeout"],
+                model=route["model"],
+                messages=attempt_messages,
+                temperature=route["temperature"],
+                max_tokens=route["max_tokens"]
             )
 
-            recipe_text = (response.choices[0].message.content or "").strip()
-            parsed = parse_ai_recipe(recipe_text)
+            parsed = result.parsed
             if "error" not in parsed:
+                if use_cache and cache_text.strip():
+                    _get_prompt_cache().store(cache_text, constraints, parsed)
                 return parsed
 
             last_parse_error = parsed.get("error", "Unknown parsing error")
 
         return {
             "error": f"Failed to parse recipe response: {last_parse_error}",
+            "error_type": "parse",
             "suggestion": "Try being more specific with ingredients, cuisine, and cooking time."
         }
     
     except Exception as e:
         return {
             "error": f"Failed to generate recipe: {str(e)}",
+            "error_type": "api",
             "suggestion": "Make sure your OPENAI_API_KEY is set correctly in the .env file"
         }
 
 
+def generate_recipe_hedged(deadline=20.0, **kwargs):
+    """
+    Race the AI generator against the local composer.
+    
+    The model request starts in the background while a local recipe is
+    composed (well under 50 ms). The model's answer wins if it arrives
+    within the deadline without an error; otherwise the local recipe is
+    used. A late model answer still lands in the prompt cache.
+    
+    Args:
+        deadline (float): Seconds to wait for the model
+        **kwargs: Arguments for generate_recipe_with_ai
+        
+    Returns:
+        tuple: (recipe dict, True if it came from the model)
+    """
+    global hedge_executor
+    if hedge_executor is None:
+        hedge_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="recipe-hedge")
+
+    future = hedge_executor.submit(generate_recipe_with_ai, **kwargs)
+    local_recipe = compose_recipe(**{k: v for k, v in kwargs.items() if k != "use_cache"})
+
+    try:
+        recipe = future.result(timeout=deadline)
+    except FutureTimeout:
+        return local_recipe, False
+    if "error" in recipe:
+        return local_recipe, False
+    return recipe, True
+
+
+_LINE_GRAMMAR = re.compile(
+    r"""^\s*(?:\#{1,6}\s*)?\**\s*(?:
+        (?P<field>recipe\s+name|name|title|servings|serves|cook(?:ing)?\s+time|total\s+time
+            |difficulty|cuisine|dietary)\s*\**\s*:\s*\**\s*(?P<value>.*)
+        |(?P<section>ingredients|instructions|directions|method|steps)\s*\**\s*:?\s*\**
+        |(?:[-\u2022*]|\d+\s*[.)])\s*(?P<item>.*)
+    )\s*$""",
+    re.IGNORECASE | re.VERBOSE
+)
+
+_FIELD_KEYS = {
+    "recipe name": "name",
+    "name": "name",
+    "title": "name",
+    "servings": "servings",
+    "serves": "servings",
+    "cook time": "cook_time",
+    "cooking time": "cook_time",
+    "total time": "cook_time",
+    "difficulty": "difficulty",
+    "cuisine": "cuisine",
+    "dietary": "dietary",
+}
+
+_SECTION_KEYS = {
+    "ingredients": "ingredients",
+    "instructions": "instructions",
+    "directions": "instructions",
+    "method": "instructions",
+    "steps": "instructions",
+}
+
+
 def parse_ai_recipe(recipe_text):
     """
     Parse the AI-generated recipe text into structured format.
@@ -124,7 +221,6 @@ def parse_ai_recipe(recipe_text):
     if parsed_json:
         return _normalize_recipe(parsed_json)
 
-    lines = recipe_text.strip().split('\n')
     recipe = {
         "name": "",
         "servings": 2,
@@ -138,54 +234,122 @@ def parse_ai_recipe(recipe_text):
     
     current_section = None
     
-    for line in lines:
-        line = line.strip()
-        if not line:
+    # One compiled match per line: a "Field: value" line, a section header,
+    # or a bulleted/numbered item belonging to the current section.
+    for line in (recipe_text or "").splitlines():
+        match = _LINE_GRAMMAR.match(line)
+        if not match:
             continue
-            
-        if line.startswith("Recipe Name:"):
-            recipe["name"] = line.replace("Recipe Name:", "").strip()
-        elif line.startswith("Servings:"):
-            recipe["servings"] = line.replace("Servings:", "").strip()
-        elif line.startswith("Cook Time:"):
-            recipe["cook_time"] = line.replace("Cook Time:", "").strip()
-        elif line.startswith("Difficulty:"):
-            recipe["difficulty"] = line.replace("Difficulty:", "").strip()
-        elif line.startswith("Ingredients:"):
-            current_section = "ingredients"
-        elif line.startswith("Instructions:"):
-            current_section = "instructions"
-        elif current_section == "ingredients" and (line.startswith("-") or line.startswith("•")):
-            ingredient = line[1:].strip()
-            if ingredient:
-                recipe["ingredients"].append(ingredient)
-        elif current_section == "instructions" and line and line[0].isdigit():
-            # Remove the number and period at the start
-            instruction = line.split(".", 1)[1].strip() if "." in line else line
-            if instruction:
-                recipe["instructions"].append(instruction)
+
+        field, section, item = match.group("field", "section", "item")
+        # Greedy groups match faster than lazy ones; trailing space is trimmed here
+        item = item and item.rstrip()
+        if field:
+            key = _FIELD_KEYS[" ".join(field.lower().split())]
+            value = match.group("value").strip().strip("* ")
+            if key == "dietary":
+                recipe[key] = [part.strip() for part in value.split(",") if part.strip()]
+            elif value:
+                recipe[key] = value
+        elif section:
+            current_section = _SECTION_KEYS[section.lower()]
+        elif current_section and item:
+            recipe[current_section].append(item)
 
     return _normalize_recipe(recipe)
 
 
 def _try_parse_json_recipe(recipe_text):
-    """Try to parse strict JSON recipe from model output."""
+    """
+    Find a JSON recipe in model output.
+
+    One pass hands each opening brace to the C decoder, which accepts a
+    whole object at once; prose braces like "{salsa}" fail on their first
+    character. Only if no brace starts a recipe are the rejected ones
+    scanned, innermost first, to close off an object cut short by max_tokens.
+    """
     if not recipe_text:
         return None
 
-    try:
-        return json.loads(recipe_text)
-    except json.JSONDecodeError:
-        pass
+    rejected = []
+    position = recipe_text.find("{")
+    while position != -1:
+        try:
+            parsed, end = _JSON_DECODER.raw_decode(recipe_text, position)
+        except json.JSONDecodeError:
+            rejected.append(position)
+            position = recipe_text.find("{", position + 1)
+            continue
+        if _looks_like_recipe(parsed):
+            return parsed
+        position = recipe_text.find("{", end)
 
-    json_match = re.search(r"\{[\s\S]*\}", recipe_text)
-    if not json_match:
-        return None
+    for position in reversed(rejected):
+        for candidate in _close_truncated_object(recipe_text, position):
+            try:
+                parsed = json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            if _looks_like_recipe(parsed):
+                return parsed
+
+    return None
+
+
+def _looks_like_recipe(parsed):
+    return isinstance(parsed, dict) and ("ingredients" in parsed or "instructions" in parsed)
 
-    try:
-        return json.loads(json_match.group(0))
-    except json.JSONDecodeError:
-        return None
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\],"]')
+
+
+def _close_truncated_object(text, start):
+    """
+    Return closed-off repairs of the cut-off object opening at
+    text[start], most complete first.
+
+    Complete string literals are single tokens, so braces inside JSON
+    strings don't count. An object the decoder rejected although its braces
+    balance (a brace in prose, or cut-off JSON followed by prose ending in
+    "}") is only retried up to its last comma.
+    """
+    stack = ["}"]
+    last_comma = None
+    in_string = False
+    for match in _JSON_TOKEN.finditer(text, start + 1):
+        token = match.group()
+        if token == '"':
+            # A quote with no closing quote: the text ends inside this string
+            in_string = True
+            break
+        if token[0] == '"':
+            continue
+        if token == "{":
+            stack.append("}")
+        elif token == "[":
+            stack.append("]")
+        elif token == ",":
+            last_comma = (match.start(), tuple(stack))
+        elif stack[-1] == token:
+            stack.pop()
+            if not stack:
+                break
+
+    # Close what is open, then retry from the last complete element in
+    # case the tail itself is a fragment.
+    repairs = []
+    if stack:
+        tail = text[start:]
+        if in_string:
+            if tail.endswith("\\") and (len(tail) - len(tail.rstrip("\\"))) % 2:
+                tail = tail[:-1]
+            tail += '"'
+        repairs.append(tail + "".join(reversed(stack)))
+    if last_comma is not None:
+        comma_index, open_at_comma = last_comma
+        repairs.append(text[start:comma_index] + "".join(reversed(open_at_comma)))
+    return repairs
 
 
 def _normalize_recipe(recipe):
@@ -245,26 +409,25 @@ def get_cooking_tips(recipe_name, dietary_preferences=None):
     Returns:
         str: Cooking tips and suggestions
     """
-    prompt = f"Provide 3-5 helpful cooking tips for making {recipe_name}"
-    if dietary_preferences:
-        prompt += f" with {dietary_preferences} modifications"
-    
     try:
         client_instance = _get_client()
         if not client_instance:
             return "Unable to generate tips: OpenAI API key not set"
         
-        response = client_instance.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful cooking assistant providing practical tips."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=300
+        messages = build_tips_messages(recipe_name, dietary_preferences)
+        route = router.route("cooking_tips", messages)
+        result = chat_completion(
+            client_instance,
+            operation="cooking_tips",
+            tags={"route": route["reason"]},
+            timeout=route["timeout"],
+            model=route["model"],
+            messages=messages,
+            temperature=route["temperature"],
+            max_tokens=route["max_tokens"]
         )
         
-        return response.choices[0].message.content
+        return result.text
     
     except Exception as e:
         return f"Unable to generate tips: {str(e)}"
@@ -272,7 +435,11 @@ def get_cooking_tips(recipe_name, dietary_preferences=None):
 
 def suggest_substitutions(ingredient):
     """
-    Suggest ingredient substitutions using AI.
+    Suggest ingredient substitutions, using AI only for unknown ingredients.
+    
+    Common ingredients are answered from the local substitution table.
+    Anything else goes to the model once, and the answer is kept in the
+    learned table so the next lookup is local too.
     
     Args:
         ingredient (str): Ingredient to find substitutions for
@@ -280,24 +447,37 @@ def suggest_substitutions(ingredient):
     Returns:
         str: List of possible substitutions
     """
-    prompt = f"What are good substitutions for {ingredient} in cooking? Provide 3-4 options with brief explanations."
-    
+    entry = find_substitutions(ingredient)
+    if entry:
+        return format_substitutions(entry)
+
+    learned = _get_learned_substitutions()
+    learned_text = learned.get(ingredient)
+    if learned_text:
+        return learned_text
+
     try:
         client_instance = _get_client()
         if not client_instance:
             return "Unable to suggest substitutions: OpenAI API key not set"
         
-        response = client_instance.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a knowledgeable chef helping with ingredient substitutions."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=200
+        messages = build_substitution_messages(ingredient)
+        route = router.route("suggest_substitutions", messages)
+        result = chat_completion(
+            client_instance,
+            operation="suggest_substitutions",
+            tags={"route": route["reason"]},
+            timeout=route["timeout"],
+            model=route["model"],
+            messages=messages,
+            temperature=route["temperature"],
+            max_tokens=route["max_tokens"]
         )
         
-        return response.choices[0].message.content
+        text = result.text
+        if text:
+            learned.add(ingredient, text)
+        return text
     
     except Exception as e:
         return f"Unable to suggest substitutions: {str(e)}"
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Bulk recipe generation from a JSONL file of request specs.
+
+Each input line is a JSON object with the keyword arguments of
+generate_recipe_with_ai plus an optional "id":
+
+    {"id": "r1", "ingredients": ["chicken", "rice"], "cuisine_type": "Asian", "cook_time": 30}
+
+Results are appended to the output file one JSON line per spec. Lines are
+only written once a spec is finished, so after a crash the same command
+resumes and skips every id already recorded as "ok".
+
+Point OPENAI_BASE_URL (or --base-url) at any OpenAI-compatible server to
+run the batch against a local stand-in instead of the real API.
+
+Every spec is a fresh generation: the prompt cache is bypassed unless
+--use-cache is given, so similar specs still produce distinct recipes and
+successes don't each rewrite the cache file.
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+SPEC_FIELDS = {"ingredients", "dietary_preference", "cuisine_type", "cook_time", "difficulty", "description"}
+
+
+def iter_specs(filename):
+    """Stream (spec_id, spec, error) tuples from a JSONL request file."""
+    with open(filename, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spec = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield f"line-{line_number}", None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(spec, dict):
+                yield f"line-{line_number}", None, "Spec must be a JSON object"
+                continue
+            spec_id = str(spec.get("id") or f"line-{line_number}")
+            yield spec_id, {k: v for k, v in spec.items() if k in SPEC_FIELDS}, None
+
+
+def load_completed_ids(filename):
+    """Return ids already recorded as finished in an existing output file."""
+    completed = set()
+    if not os.path.exists(filename):
+        return completed
+    with open(filename, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Torn last line from a crash; that spec simply runs again
+                continue
+            if record.get("status") in {"ok", "invalid_spec"}:
+                completed.add(record.get("id"))
+    return completed
+
+
+class ResultWriter:
+    """Append-only JSONL writer that flushes every record."""
+
+    def __init__(self, filename):
+        self.file = open(filename, 'a+')
+        # Terminate a torn line left behind by a crash
+        self.file.seek(0, os.SEEK_END)
+        if self.file.tell() > 0:
+            self.file.seek(self.file.tell() - 1)
+            if self.file.read(1) != "\n":
+                self.file.write("\n")
+
+    def write(self, record):
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+    def close(self):
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+
+def _result_record(spec_id, recipe, started):
+    record = {
+        "id": spec_id,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "seconds": round(time.monotonic() - started, 3)
+    }
+    if "error" not in recipe:
+        record["status"] = "ok"
+        record["recipe"] = recipe
+    else:
+        record["status"] = "parse_error" if recipe.get("error_type") == "parse" else "error"
+        record["error"] = recipe["error"]
+    return record
+
+
+def _run_one(generate, spec_id, spec):
+    started = time.monotonic()
+    try:
+        recipe = generate(**spec)
+    except Exception as e:
+        recipe = {"error": str(e)}
+    return _result_record(spec_id, recipe, started)
+
+
+def run_batch(input_file, output_file, concurrency=8, generate=None, progress=None, use_cache=False):
+    """
+    Generate recipes for every spec in input_file that isn't finished yet.
+
+    At most `concurrency` specs are in flight; the input is read lazily so
+    memory use doesn't grow with the size of the file.
+
+    Args:
+        input_file (str): JSONL file of request specs
+        output_file (str): JSONL file results are appended to
+        concurrency (int): Maximum number of specs generated at once
+        generate (callable): Generator function, defaults to generate_recipe_with_ai
+        progress (callable): Optional callback receiving the stats dict after each result
+        use_cache (bool): Let the default generator answer from the prompt cache
+
+    Returns:
+        dict: Counts of ok, parse_error, error, invalid_spec and skipped specs
+    """
+    if generate is None:
+        from ai_generator import generate_recipe_with_ai
+        generate = functools.partial(generate_recipe_with_ai, use_cache=use_cache)
+
+    completed = load_completed_ids(output_file)
+    stats = {"ok": 0, "parse_error": 0, "error": 0, "invalid_spec": 0, "skipped": 0}
+    writer = ResultWriter(output_file)
+
+    def record(result):
+        writer.write(result)
+        stats[result["status"]] += 1
+        if progress:
+            progress(stats)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = set()
+            for spec_id, spec, error in iter_specs(input_file):
+                if spec_id in completed:
+                    stats["skipped"] += 1
+                    continue
+                if error:
+                    record({"id": spec_id, "status": "invalid_spec", "error": error})
+                    continue
+
+                if len(pending) >= concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(future.result())
+                pending.add(executor.submit(_run_one, generate, spec_id, spec))
+
+            for future in wait(pending).done:
+                record(future.result())
+    finally:
+        writer.close()
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate recipes in bulk from a JSONL spec file")
+    parser.add_argument("input", help="JSONL file with one request spec per line")
+    parser.add_argument("output", help="JSONL file to append results to (resumable)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Specs generated at once")
+    parser.add_argument("--rps", type=float, help="Request rate limit for the API (requests/second)")
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint, e.g. a local stand-in server")
+    parser.add_argument("--use-cache", action="store_true",
+                        help="Reuse cached recipes for similar specs instead of generating each one")
+    args = parser.parse_args()
+
+    if args.base_url:
+        os.environ["OPENAI_BASE_URL"] = args.base_url
+
+    # The API key may live in .env
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        pass
+    else:
+        load_dotenv()
+
+    import ai_client
+    ai_client.configure(requests_per_second=args.rps, max_concurrency=args.concurrency)
+
+    started = time.monotonic()
+
+    def progress(stats):
+        done = stats["ok"] + stats["parse_error"] + stats["error"] + stats["invalid_spec"]
+        if done % 50 == 0:
+            print(f"{done} done ({done / (time.monotonic() - started):.1f}/s)", file=sys.stderr)
+
+    stats = run_batch(args.input, args.output, concurrency=args.concurrency, progress=progress,
+                      use_cache=args.use_cache)
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for AI Chef hot paths.
+
+Run with: python benchmarks.py <name>, e.g. python benchmarks.py parse
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import cli
+from ai_generator import _normalize_recipe, parse_ai_recipe
+from cooking_log import CookingLog, make_event
+from local_composer import compose_recipe
+from meal_optimizer import optimize_meal_plan, plan_score
+from metrics import percentile
+from prompts import build_recipe_messages, build_retry_messages, count_message_tokens, count_tokens
+from recipe_store import RecipeStore
+
+
+# Representative model outputs collected while testing the recipe generator.
+PARSE_CORPUS = [
+    # Clean JSON, as requested by the prompt
+    json.dumps({
+        "name": "Lemon Garlic Salmon",
+        "servings": 2,
+        "cook_time": 25,
+        "difficulty": "easy",
+        "ingredients": ["2 salmon fillets", "1 lemon", "3 cloves garlic", "2 tbsp olive oil"],
+        "instructions": ["Preheat oven to 400°F", "Season salmon", "Bake for 15 minutes"],
+        "cuisine": "Mediterranean",
+        "dietary": ["gluten-free", "pescatarian"]
+    }),
+    # JSON inside a markdown fence with a friendly preamble
+    "Here's a recipe you'll love!\n\n```json\n" + json.dumps({
+        "name": "Quick Veggie Fried Rice",
+        "servings": 4,
+        "cook_time": 20,
+        "difficulty": "easy",
+        "ingredients": ["3 cups cooked rice", "2 eggs", "1 cup peas", "2 tbsp soy sauce"],
+        "instructions": ["Scramble eggs", "Fry rice", "Add peas and soy sauce"],
+        "cuisine": "Asian",
+        "dietary": ["vegetarian"]
+    }, indent=2) + "\n```\n\nEnjoy your meal!",
+    # Prose containing braces before and after the object
+    "Sure! I used the {ingredients} you listed.\n" + json.dumps({
+        "name": "Chicken Tacos",
+        "servings": 4,
+        "cook_time": 30,
+        "difficulty": "easy",
+        "ingredients": ["1 lb chicken", "8 tortillas", "1 cup salsa"],
+        "instructions": ["Cook chicken", "Shred and mix with salsa", "Fill tortillas"],
+        "cuisine": "Mexican",
+        "dietary": []
+    }) + "\nTip: swap {salsa} for pico de gallo.",
+    # Braces inside JSON string values
+    json.dumps({
+        "name": "Pasta {Weeknight Edition}",
+        "servings": "4 servings",
+        "cook_time": "25 minutes",
+        "difficulty": "Medium",
+        "ingredients": ["200g pasta", "1 jar marinara {or homemade}"],
+        "instructions": ["Boil pasta", "Warm sauce", "Toss together"],
+        "cuisine": "Italian",
+        "dietary": "vegetarian"
+    }),
+    # Plain text format
+    "Recipe Name: Creamy Mushroom Soup\nServings: 4\nCook Time: 35 minutes\nDifficulty: Easy\n\n"
+    "Ingredients:\n- 1 lb mushrooms\n- 1 onion\n- 2 cups broth\n- 1/2 cup cream\n\n"
+    "Instructions:\n1. Sauté onion and mushrooms.\n2. Add broth and simmer 20 minutes.\n"
+    "3. Blend and stir in cream.",
+    # Markdown-heavy text format
+    "## Spicy Shrimp Stir-Fry\n\n**Recipe Name:** Spicy Shrimp Stir-Fry\n**Servings:** 2\n"
+    "**Cook Time:** 15 minutes\n**Difficulty:** medium\n\n### Ingredients\n* 1/2 lb shrimp\n"
+    "* 1 bell pepper\n* 2 tbsp chili sauce\n\n### Instructions\n1) Heat the wok.\n"
+    "2) Stir-fry shrimp for 3 minutes.\n3) Add pepper and sauce.",
+    # Truncated by max_tokens in the middle of an instruction
+    '{"name": "Beef Stew", "servings": 6, "cook_time": 120, "difficulty": "medium", '
+    '"ingredients": ["2 lb beef chuck", "4 carrots", "3 potatoes", "4 cups beef broth"], '
+    '"instructions": ["Brown the beef", "Add vegetables and broth", "Simmer for 2 ho',
+]
+
+
+# For each PARSE_CORPUS entry, in the same order: the recipe name it must
+# parse to, and its first instruction. A truncated variant that cut into
+# the first instruction may also be reported as an error.
+PARSE_EXPECTED = [
+    ("Lemon Garlic Salmon", "Preheat oven to 400°F"),
+    ("Quick Veggie Fried Rice", "Scramble eggs"),
+    ("Chicken Tacos", "Cook chicken"),
+    ("Pasta {Weeknight Edition}", "Boil pasta"),
+    ("Creamy Mushroom Soup", "Sauté onion and mushrooms."),
+    ("Spicy Shrimp Stir-Fry", "Heat the wok."),
+    ("Beef Stew", "Brown the beef"),
+]
+
+
+def _mutate(text, rng):
+    """Apply one random corruption that models have been seen to produce."""
+    mutation = rng.randrange(7)
+    if mutation == 0:
+        return "Of course! {Note: adjust to taste}\n" + text
+    if mutation == 1:
+        return text + "\n\nLet me know if you want a {vegan} version :}"
+    if mutation == 2:
+        return "```json\n" + text + "\n```"
+    if mutation == 3:
+        return text.replace("\n", "\r\n")
+    if mutation == 4:
+        return text[:max(1, int(len(text) * rng.uniform(0.85, 1.0)))]
+    if mutation == 5:
+        return "I'll format this {as requested:\n" + text
+    return text
+
+
+def build_parse_corpus(size=2000, seed=7):
+    """
+    Return (text, expected name, must parse) for the real corpus plus
+    `size` randomly mutated variants. Variants truncated inside their first
+    instruction need not parse, but must not parse to another recipe.
+    """
+    rng = random.Random(seed)
+    samples = list(zip(PARSE_CORPUS, PARSE_EXPECTED))
+    corpus = [(text, name, True) for text, (name, _) in samples]
+    for _ in range(size):
+        text, (name, first_instruction) = rng.choice(samples)
+        for _ in range(rng.randrange(1, 3)):
+            text = _mutate(text, rng)
+        corpus.append((text, name, first_instruction in text))
+    return corpus
+
+
+def check_parse_corpus(corpus, parse=None):
+    """Return the (text, expected name, result) samples not parsed as expected."""
+    parse = parse or parse_ai_recipe
+    failures = []
+    for text, name, must_parse in corpus:
+        result = parse(text)
+        if "error" in result and must_parse or "error" not in result and result["name"] != name:
+            failures.append((text, name, result))
+    return failures
+
+
+def _legacy_parse(recipe_text):
+    """Greedy-regex parser this module replaced, kept as the baseline."""
+    parsed = None
+    try:
+        parsed = json.loads(recipe_text)
+    except json.JSONDecodeError:
+        match = re.search(r"\{[\s\S]*\}", recipe_text)
+        if match:
+            try:
+                parsed = json.loads(match.group(0))
+            except json.JSONDecodeError:
+                parsed = None
+    if parsed:
+        return _normalize_recipe(parsed)
+
+    recipe = {"ingredients": [], "instructions": []}
+    section = None
+    for line in recipe_text.strip().split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("Recipe Name:"):
+            recipe["name"] = line.replace("Recipe Name:", "").strip()
+        elif line.startswith("Servings:"):
+            recipe["servings"] = line.replace("Servings:", "").strip()
+        elif line.startswith("Cook Time:"):
+            recipe["cook_time"] = line.replace("Cook Time:", "").strip()
+        elif line.startswith("Difficulty:"):
+            recipe["difficulty"] = line.replace("Difficulty:", "").strip()
+        elif line.startswith("Ingredients:"):
+            section = "ingredients"
+        elif line.startswith("Instructions:"):
+            section = "instructions"
+        elif section == "ingredients" and (line.startswith("-") or line.startswith("•")):
+            recipe["ingredients"].append(line[1:].strip())
+        elif section == "instructions" and line[0].isdigit():
+            recipe["instructions"].append(line.split(".", 1)[1].strip() if "." in line else line)
+    return _normalize_recipe(recipe)
+
+
+def _time_parser(parse, corpus, repeat):
+    successes = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        successes = 0
+        for text in corpus:
+            if "error" not in parse(text):
+                successes += 1
+    elapsed = time.perf_counter() - started
+    return successes, (len(corpus) * repeat) / elapsed
+
+
+def bench_parse(args):
+    """Parse throughput, retry-avoidance rate and correctness over the mutated corpus."""
+    samples = build_parse_corpus(size=args.size, seed=args.seed)
+    corpus = [text for text, _, _ in samples]
+
+    legacy_ok, legacy_rate = _time_parser(_legacy_parse, corpus, args.repeat)
+    new_ok, new_rate = _time_parser(parse_ai_recipe, corpus, args.repeat)
+
+    avoided = 0
+    for text in corpus:
+        if "error" in _legacy_parse(text) and "error" not in parse_ai_recipe(text):
+            avoided += 1
+    legacy_failures = len(corpus) - legacy_ok
+
+    print(f"corpus size:          {len(corpus)}")
+    print(f"legacy parse success: {legacy_ok / len(corpus):.1%} ({legacy_rate:,.0f} parses/s)")
+    print(f"new parse success:    {new_ok / len(corpus):.1%} ({new_rate:,.0f} parses/s)")
+    if legacy_failures:
+        print(f"retries avoided:      {avoided}/{legacy_failures} ({avoided / legacy_failures:.1%})")
+
+    # Legacy failures return early, so also time only what both parsers handle
+    both = [text for text in corpus if "error" not in _legacy_parse(text)]
+    _, legacy_both = _time_parser(_legacy_parse, both, args.repeat)
+    _, new_both = _time_parser(parse_ai_recipe, both, args.repeat)
+    print(f"legacy-parsable only: {legacy_both:,.0f} legacy vs {new_both:,.0f} new parses/s")
+
+    failures = check_parse_corpus(samples)
+    print(f"checks:               {len(samples) - len(failures)}/{len(samples)} parse to the expected recipe")
+    for text, name, result in failures[:5]:
+        print(f"  FAIL expected {name!r}, got {result.get('name') or result.get('error')!r}: {text[-80:]!r}")
+    return 1 if failures else 0
+
+
+def bench_compose(args):
+    """Latency of the local recipe composer over random requests."""
+    rng = random.Random(args.seed)
+    pool = ["chicken", "tofu", "salmon", "ground beef", "rice", "pasta", "broccoli", "spinach",
+            "bell pepper", "mushrooms", "garlic", "soy sauce", "cheese", "lemon", "chickpeas"]
+    cuisines = [None, "Italian", "Asian", "Mexican", "Mediterranean", "American", "Indian"]
+    diets = [None, "vegetarian", "vegan", "gluten-free", "pescatarian"]
+
+    timings = []
+    for _ in range(args.size):
+        request = {
+            "ingredients": rng.sample(pool, rng.randrange(0, 6)),
+            "cuisine_type": rng.choice(cuisines),
+            "dietary_preference": rng.choice(diets),
+            "cook_time": rng.choice([None, 15, 20, 30, 45]),
+        }
+        started = time.perf_counter()
+        compose_recipe(**request)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    print(f"requests:    {len(timings)}")
+    print(f"p50 latency: {percentile(timings, 50):.3f} ms")
+    print(f"p99 latency: {percentile(timings, 99):.3f} ms")
+    print(f"max latency: {max(timings):.3f} ms (target < 50 ms)")
+
+
+class MockRecipeModel:
+    """
+    Stand-in for the chat API used by the prompt benchmark.
+
+    It answers with prose instead of JSON at a fixed rate. On a retry it
+    only knows what was asked if the original request is still in the
+    conversation; otherwise it returns an unrelated recipe.
+    """
+
+    def __init__(self, rng, bad_output_rate=0.25):
+        self.rng = rng
+        self.bad_output_rate = bad_output_rate
+
+    def complete(self, messages):
+        requests = [m["content"] for m in messages if m["role"] == "user" and "Create a detailed recipe" in m["content"]]
+        is_retry = messages[-1]["content"] not in requests
+        if not is_retry and self.rng.random() < self.bad_output_rate:
+            return "Sure! Here's a lovely {seasonal} dish you can make tonight, just ask for the details."
+        if not requests:
+            topic = "Generic Casserole"
+        else:
+            match = re.search(r"for: ([^.,]+?)(?: that| in| with| using|\.|$)", requests[-1])
+            topic = match.group(1).title() if match else "Custom Dish"
+        return json.dumps({
+            "name": topic,
+            "servings": 4,
+            "cook_time": 30,
+            "difficulty": "easy",
+            "ingredients": ["2 cups rice", "1 lb chicken", "1 onion", "2 cloves garlic"],
+            "instructions": ["Prep the ingredients", "Cook the chicken", "Add rice and simmer", "Serve"],
+            "cuisine": "Custom",
+            "dietary": []
+        })
+
+
+def bench_prompt(args):
+    """Tokens per recipe and retry success for each prompt template version."""
+    topics = ["quick chicken dinner", "spicy shrimp tacos", "vegan lentil soup", "cheesy baked pasta",
+              "lemon herb salmon", "beef and broccoli"]
+    pantry = ["rice", "chicken", "broccoli", "garlic", "onion", "soy sauce", "ginger", "carrots",
+              "bell pepper", "eggs", "spinach", "mushrooms", "tomatoes", "cheese", "butter", "lemon",
+              "parsley", "basil", "olive oil", "cumin", "paprika", "black beans", "corn", "tortillas",
+              "sour cream", "lettuce", "cilantro", "lime", "potatoes", "celery", "thyme", "bacon"]
+
+    for version in ("recipe-v1", "recipe-v2"):
+        rng = random.Random(args.seed)
+        model = MockRecipeModel(rng)
+        tokens = 0
+        recipes = 0
+        retries = 0
+        retry_successes = 0
+        for _ in range(args.size):
+            topic = rng.choice(topics)
+            messages = build_recipe_messages(
+                ingredients=rng.sample(pantry, rng.choice([0, 3, 8, len(pantry)])),
+                cuisine_type=rng.choice([None, "Italian", "Mexican"]),
+                description=topic,
+                version=version
+            )
+            for attempt in range(2):
+                sent = messages if attempt == 0 else build_retry_messages(messages, error, version=version)
+                reply = model.complete(sent)
+                tokens += count_message_tokens(sent) + count_tokens(reply)
+                parsed = parse_ai_recipe(reply)
+                if attempt == 1:
+                    retries += 1
+                if "error" not in parsed:
+                    if parsed["name"].lower() == topic:
+                        recipes += 1
+                        retry_successes += attempt
+                    break
+                error = parsed["error"]
+
+        print(f"{version}:")
+        print(f"  tokens per recipe:  {tokens / max(1, recipes):.0f}")
+        print(f"  correct recipes:    {recipes}/{args.size}")
+        print(f"  retry success rate: {retry_successes / max(1, retries):.1%} ({retries} retries)")
+
+
+def build_recipe_corpus(size, seed=7):
+    """Synthetic recipes with realistic ingredient overlap for planner benchmarks."""
+    rng = random.Random(seed)
+    cuisines = ["Italian", "Asian", "Mexican", "Mediterranean", "American", "Indian", "French", "Thai"]
+    diets = ["vegetarian", "vegan", "gluten-free", "pescatarian", "dairy-free"]
+    staples = ["onion", "garlic", "olive oil", "rice", "tomatoes", "chicken", "pasta", "butter",
+               "bell pepper", "lemon", "ginger", "soy sauce", "potatoes", "eggs", "cheese", "spinach"]
+    extras = [f"ingredient {i}" for i in range(2000)]
+    corpus = []
+    for i in range(size):
+        ingredients = rng.sample(staples, rng.randrange(2, 6)) + rng.sample(extras, rng.randrange(1, 5))
+        corpus.append({
+            "name": f"Recipe {i}",
+            "cuisine": rng.choice(cuisines),
+            "cook_time": rng.choice([10, 15, 20, 25, 30, 40, 45, 60, 90]),
+            "servings": rng.choice([2, 4, 6]),
+            "dietary": rng.sample(diets, rng.randrange(0, 3)),
+            "ingredients": ingredients,
+        })
+    return corpus
+
+
+def _index_plan(recipes, days):
+    """The original planner's index arithmetic, as a quality baseline."""
+    plan = []
+    used = set()
+    for _ in range(days):
+        available = [r for r in recipes if r["name"] not in used] or recipes
+        if len(available) == len(recipes):
+            used.clear()
+        recipe = available[len(used) % len(available)]
+        plan.append(recipe)
+        used.add(recipe["name"])
+    return plan
+
+
+def bench_plan(args):
+    """Weekly plan latency and quality on a large synthetic corpus."""
+    corpus = build_recipe_corpus(max(args.size, 100000), seed=args.seed)
+    rng = random.Random(args.seed)
+    requests = [
+        {},
+        {"dietary": "vegetarian"},
+        {"max_cook_time": 30},
+        {"dietary": "vegan", "max_cook_time": 20, "day_time_budgets": {"Monday": 15, "Wednesday": 10}},
+    ]
+
+    def entries(recipes):
+        return [(r, frozenset(i.lower() for i in r["ingredients"]), r["cuisine"].lower()) for r in recipes]
+
+    for request in requests:
+        timings = []
+        for run in range(args.repeat):
+            started = time.perf_counter()
+            plan = optimize_meal_plan(corpus, seed=rng.randrange(1 << 30), **request)
+            timings.append((time.perf_counter() - started) * 1000)
+        chosen = list(plan.values())
+        ingredients = {i for r in chosen for i in r["ingredients"]}
+        eligible = [r for r in corpus
+                    if r["cook_time"] <= request.get("max_cook_time", 1 << 30)
+                    and (not request.get("dietary") or request["dietary"] in r["dietary"])]
+        baseline = _index_plan(eligible, 7)
+        baseline_ingredients = {i for r in baseline for i in r["ingredients"]}
+        print(f"{request or 'no constraints'}:")
+        print(f"  max latency:  {max(timings):.1f} ms (target < 200 ms)")
+        print(f"  cuisines:     {len({r['cuisine'] for r in chosen})} (index planner: "
+              f"{len({r['cuisine'] for r in baseline})})")
+        print(f"  ingredients:  {len(ingredients)} (index planner: {len(baseline_ingredients)})")
+        print(f"  score:        {plan_score(entries(chosen)):.0f} (index planner: "
+              f"{plan_score(entries(baseline)):.0f})")
+
+
+def bench_rollups(args):
+    """Rebuild cooking rollups from a large event log, then time single appends."""
+    rng = random.Random(args.seed)
+    size = max(args.size, 100000)
+    cuisines = ["italian", "asian", "mexican", "indian", None]
+    started_at = datetime(2020, 1, 1)
+    with tempfile.TemporaryDirectory() as directory:
+        log_file = os.path.join(directory, "events.jsonl")
+        with open(log_file, 'w') as f:
+            for i in range(size):
+                event = make_event("Recipe", rng.choice(cuisines), rng.choice([15, 25, 45]),
+                                   rng.random() < 0.3, rng.random() < 0.1,
+                                   started_at + timedelta(minutes=37 * i))
+                f.write(json.dumps(event) + "\n")
+
+        started = time.perf_counter()
+        log = CookingLog(log_file, os.path.join(directory, "rollups.json"))
+        rebuild = time.perf_counter() - started
+
+        timings = []
+        for i in range(1000):
+            started = time.perf_counter()
+            log.record(make_event("Recipe", "thai", 20, timestamp=started_at + timedelta(days=3000, minutes=i)))
+            timings.append((time.perf_counter() - started) * 1000)
+        log.store.flush()
+
+    print(f"events:        {size:,}")
+    print(f"full rebuild:  {rebuild:.2f} s ({size / rebuild:,.0f} events/s)")
+    print(f"append p50:    {percentile(timings, 50):.3f} ms")
+    print(f"append p99:    {percentile(timings, 99):.3f} ms")
+
+
+def _scan_search(recipes, available_ingredients):
+    """The linear scan of recipes.find_recipes_by_ingredients, over any corpus."""
+    available = set(ingredient.lower().strip() for ingredient in available_ingredients)
+    matches = []
+    for recipe in recipes:
+        recipe_ingredients = set(ingredient.lower() for ingredient in recipe["ingredients"])
+        matching = recipe_ingredients & available
+        if matching:
+            matches.append((len(matching) / len(recipe_ingredients), len(matching), recipe))
+    matches.sort(key=lambda match: match[:2], reverse=True)
+    return matches
+
+
+def bench_search(args):
+    """Batch search queries per second through the CLI's query path."""
+    corpus = build_recipe_corpus(max(args.size, 50000), seed=args.seed)
+    rng = random.Random(args.seed)
+    ingredients = sorted({i for recipe in corpus for i in recipe["ingredients"]})
+    lines = []
+    for _ in range(5000):
+        query = {"ingredients": rng.sample(ingredients, rng.randrange(2, 6)), "limit": 10}
+        if rng.random() < 0.5:
+            query["max_time"] = rng.choice([20, 30, 45])
+        lines.append(json.dumps(query))
+
+    started = time.perf_counter()
+    store = RecipeStore(corpus)
+    build = time.perf_counter() - started
+
+    out = io.StringIO()
+    started = time.perf_counter()
+    for line in lines:
+        query, _ = cli.parse_query(line)
+        matches = store.search(query["ingredients"], limit=query["limit"], **cli._filters(query))
+        cli.emit({"query": query, "results": [cli._match_row(match) for match in matches]}, out)
+    indexed = time.perf_counter() - started
+
+    sample = lines[:50]
+    started = time.perf_counter()
+    for line in sample:
+        _scan_search(corpus, json.loads(line)["ingredients"])
+    scan = (time.perf_counter() - started) / len(sample)
+
+    print(f"recipes:          {len(corpus):,} (index built in {build:.2f} s)")
+    print(f"indexed queries:  {len(lines) / indexed:,.0f}/s (target > 1,000/s)")
+    print(f"linear scan:      {1 / scan:,.0f}/s")
+
+
+STARTUP_SCRIPT = """
+import sys
+import ai_chef
+ai_chef.display_banner()
+ai_chef.display_main_menu()
+print(",".join(m for m in ("openai", "ai_generator", "dotenv", "rich.markdown") if m in sys.modules), file=sys.stderr)
+"""
+
+
+def bench_startup(args):
+    """Time from interpreter start until the main menu is printed."""
+    repo = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "PYTHONPATH": repo}
+    timings = []
+    with tempfile.TemporaryDirectory() as directory:
+        # Warm the bytecode cache so every run measures the same thing
+        subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=directory, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        for _ in range(max(args.repeat, 10)):
+            started = time.perf_counter()
+            result = subprocess.run([sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT], cwd=directory,
+                                    env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+            timings.append((time.perf_counter() - started) * 1000)
+        files_written = os.listdir(directory)
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+            self_us, _, name = line[len("import time:"):].split("|")
+            imports.append((int(self_us), name.strip()))
+    loaded = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ""
+    if loaded.startswith("import time:"):
+        loaded = ""
+
+    print(f"runs:          {len(timings)}")
+    print(f"p50 to menu:   {percentile(timings, 50):.0f} ms")
+    print(f"max to menu:   {max(timings):.0f} ms (target < 150 ms)")
+    print(f"lazy modules loaded: {loaded or 'none'}")
+    print(f"files written: {', '.join(files_written) or 'none'}")
+    print("slowest imports (self time):")
+    for self_us, name in sorted(imports, reverse=True)[:8]:
+        print(f"  {self_us / 1000:6.1f} ms  {name}")
+
+
+BENCHMARKS = {
+    "parse": bench_parse,
+    "compose": bench_compose,
+    "prompt": bench_prompt,
+    "plan": bench_plan,
+    "rollups": bench_rollups,
+    "search": bench_search,
+    "startup": bench_startup,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Chef benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--size", type=int, default=2000, help="Number of generated inputs")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sys.exit(BENCHMARKS[args.benchmark](args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Non-interactive AI Chef commands for scripts and pipelines.
+
+Every command writes JSON Lines to stdout, one result per line, without
+any Rich formatting:
+
+    python cli.py search chicken rice --max-time 30 --limit 5
+    python cli.py search --batch queries.jsonl      # one query per line, "-" reads stdin
+    python cli.py filter --cuisine italian --dietary vegetarian
+    python cli.py plan --days 5 --dietary vegan --budget Monday=20 > plan.jsonl
+    python cli.py grocery --plan plan.jsonl --servings 4
+    python cli.py grocery --pantry                  # today's saved plan minus the pantry
+    python cli.py pantry import inventory.csv
+    python cli.py pantry list
+    python cli.py generate "spicy shrimp tacos" --cuisine mexican
+    python cli.py generate --batch specs.jsonl --local
+
+A batch query line is either comma-separated ingredients or a JSON object
+such as {"ingredients": ["rice", "egg"], "max_time": 20, "limit": 3}; each
+produces one output line holding the query and its results. Searches and
+filters run against an indexed RecipeStore, over the built-in recipes or
+the file given with --recipes.
+
+`python ai_chef.py <command> ...` runs the same commands.
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from batch_generator import SPEC_FIELDS
+from grocery import build_grocery_list, build_shopping_list
+from local_composer import compose_recipe
+from meal_optimizer import optimize_meal_plan
+from recipe_store import load_store
+
+# Query fields accepted in batch lines, mapped to RecipeStore keyword arguments
+QUERY_FILTERS = {"max_time": "cook_time", "cook_time": "cook_time", "difficulty": "difficulty",
+                 "dietary": "dietary", "cuisine": "cuisine"}
+
+# Type every query field must have when given
+QUERY_TYPES = {"limit": int, "max_time": int, "cook_time": int, "difficulty": str, "dietary": str, "cuisine": str}
+
+
+def emit(record, out=None):
+    """Write one compact JSON line."""
+    (out or sys.stdout).write(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+
+def iter_input_lines(filename):
+    """Stream non-empty lines from a file, or from stdin if filename is "-"."""
+    f = sys.stdin if filename == "-" else open(filename, 'r')
+    try:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def parse_query(line):
+    """
+    Parse a batch line into (query dict, error).
+
+    Plain lines are comma-separated ingredients; lines starting with "{"
+    are JSON objects.
+    """
+    if not line.startswith("{"):
+        return {"ingredients": [i.strip() for i in line.split(",") if i.strip()]}, None
+    try:
+        query = json.loads(line)
+    except json.JSONDecodeError as e:
+        return None, f"Invalid JSON: {e}"
+    if not isinstance(query, dict):
+        return None, "Query must be a JSON object"
+    if isinstance(query.get("ingredients"), str):
+        query["ingredients"] = [i.strip() for i in query["ingredients"].split(",") if i.strip()]
+    ingredients = query.get("ingredients", [])
+    if not isinstance(ingredients, list) or not all(isinstance(i, str) for i in ingredients):
+        return None, "ingredients must be a list of strings or a comma-separated string"
+    for field, expected in QUERY_TYPES.items():
+        value = query.get(field)
+        # bool is an int subclass, but "limit": true is a mistake
+        if value is not None and (not isinstance(value, expected) or isinstance(value, bool)):
+            return None, f"{field} must be {'an integer' if expected is int else 'a string'}"
+    if query.get("limit") is not None and query["limit"] < 0:
+        return None, "limit must not be negative"
+    return query, None
+
+
+def _filters(query):
+    return {QUERY_FILTERS[key]: value for key, value in query.items() if key in QUERY_FILTERS and value}
+
+
+def _summary(recipe, full=False):
+    if full:
+        return recipe
+    return {
+        "name": recipe.get("name"),
+        "cuisine": recipe.get("cuisine"),
+        "cook_time": recipe.get("cook_time"),
+        "difficulty": recipe.get("difficulty"),
+        "dietary": recipe.get("dietary", []),
+        "servings": recipe.get("servings"),
+    }
+
+
+def _match_row(match, full=False):
+    return {
+        **_summary(match["recipe"], full),
+        "match_percentage": round(match["match_percentage"], 3),
+        "matching_count": match["matching_count"],
+        "missing_ingredients": sorted(match["missing_ingredients"]),
+    }
+
+
+def run_search(args, store):
+    if args.batch:
+        for line in iter_input_lines(args.batch):
+            query, error = parse_query(line)
+            if error:
+                emit({"query": line, "error": error})
+                continue
+            matches = store.search(query.get("ingredients", []), limit=query.get("limit", args.limit),
+                                   **_filters(query))
+            emit({"query": query, "results": [_match_row(match, args.full) for match in matches]})
+        return 0
+
+    ingredients = [i.strip() for arg in args.ingredients for i in arg.split(",") if i.strip()]
+    if not ingredients:
+        print("search: give ingredients or --batch", file=sys.stderr)
+        return 2
+    matches = store.search(ingredients, cook_time=args.max_time, difficulty=args.difficulty,
+                           dietary=args.dietary, cuisine=args.cuisine, limit=args.limit)
+    for match in matches:
+        emit(_match_row(match, args.full))
+    return 0
+
+
+def run_filter(args, store):
+    if args.batch:
+        for line in iter_input_lines(args.batch):
+            query, error = parse_query(line)
+            if error or not line.startswith("{"):
+                emit({"query": line, "error": error or "Filter queries must be JSON objects"})
+                continue
+            recipes = store.filter(**_filters(query))[:query.get("limit", args.limit)]
+            emit({"query": query, "results": [_summary(recipe, args.full) for recipe in recipes]})
+        return 0
+
+    recipes = store.filter(cook_time=args.max_time, difficulty=args.difficulty, dietary=args.dietary,
+                           cuisine=args.cuisine)
+    for recipe in recipes[:args.limit]:
+        emit(_summary(recipe, args.full))
+    return 0
+
+
+def parse_budgets(values):
+    """Parse ["Monday=20", ...] into {"Monday": 20}; raises ValueError on bad input."""
+    budgets = {}
+    for value in values or []:
+        day, _, minutes = value.partition("=")
+        if not day.strip() or not minutes.strip().isdigit():
+            raise ValueError(f"Expected DAY=MINUTES, got {value!r}")
+        budgets[day.strip().title()] = int(minutes)
+    return budgets
+
+
+def run_plan(args, store):
+    try:
+        budgets = parse_budgets(args.budget)
+    except ValueError as e:
+        print(f"plan: {e}", file=sys.stderr)
+        return 2
+
+    if args.save:
+        from meal_planner import MealPlanner
+        plan = MealPlanner().create_weekly_plan(args.dietary, args.max_time, args.days, budgets or None,
+                                                recipes=store.recipes)
+        chosen = {day: store.get(meal["recipe"]) for day, meal in plan.items()}
+    else:
+        chosen = optimize_meal_plan(store.recipes, days=args.days, dietary=args.dietary,
+                                    max_cook_time=args.max_time, day_time_budgets=budgets or None, seed=args.seed)
+    for day, recipe in chosen.items():
+        emit({"day": day, "recipe": recipe["name"], "servings": recipe.get("servings"),
+              "cook_time": recipe.get("cook_time"), "cuisine": recipe.get("cuisine")})
+    return 0
+
+
+def read_plan(filename):
+    """
+    Build a plan dict (day -> {"recipe", "servings"}) from `plan` output lines.
+
+    Raises:
+        ValueError: If a line isn't a JSON object with "day" and "recipe"
+    """
+    plan = {}
+    for line_number, line in enumerate(iter_input_lines(filename), 1):
+        try:
+            meal = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {line_number}: invalid JSON: {e}")
+        if not isinstance(meal, dict) or "day" not in meal or "recipe" not in meal:
+            raise ValueError(f"line {line_number}: expected an object with \"day\" and \"recipe\"")
+        plan[meal["day"]] = {"recipe": meal["recipe"], "servings": meal.get("servings")}
+    return plan
+
+
+def _grocery_rows(grocery_list, status=None):
+    for category, items in grocery_list.items():
+        for item in items:
+            row = {"category": category, **item}
+            if status:
+                row["status"] = status
+            yield row
+
+
+def run_grocery(args, store):
+    from meal_planner import MealPlanner, PantryManager
+
+    if args.plan:
+        try:
+            plan = read_plan(args.plan)
+        except ValueError as e:
+            print(f"grocery: {args.plan}: {e}", file=sys.stderr)
+            return 2
+        if args.pantry:
+            dated_plans = [(datetime.now().strftime("%Y-%m-%d"), plan)]
+            shopping = build_shopping_list(dated_plans, PantryManager().get_all_items(),
+                                           household_size=args.servings, recipe_lookup=store.get)
+        else:
+            grocery_list = build_grocery_list([plan], household_size=args.servings, recipe_lookup=store.get)
+    else:
+        planner = MealPlanner()
+        if args.pantry:
+            dates = None if not args.all_plans else sorted(planner.meal_plan)
+            shopping = planner.generate_shopping_list(PantryManager(), plan_dates=dates,
+                                                      household_size=args.servings)
+        elif args.all_plans:
+            grocery_list = planner.generate_combined_grocery_list(household_size=args.servings)
+        else:
+            grocery_list = planner.generate_grocery_list(household_size=args.servings)
+
+    if args.pantry:
+        for row in _grocery_rows(shopping["to_buy"], "to_buy"):
+            emit(row)
+        for item in shopping["covered"]:
+            emit({**item, "status": "covered"})
+        for item in shopping["expiring"]:
+            emit({**item, "status": "expiring"})
+    else:
+        for row in _grocery_rows(grocery_list):
+            emit(row)
+    return 0
+
+
+def run_pantry(args, store):
+    from meal_planner import PantryManager
+
+    if args.pantry_command == "import":
+        from pantry_import import import_pantry_file
+        emit(import_pantry_file(args.input, PantryManager(args.file), file_format=args.format))
+    elif args.pantry_command == "expiring":
+        for item in PantryManager(args.file).get_expiring_items(args.days):
+            emit(item)
+    else:
+        for item in PantryManager(args.file).get_all_items():
+            emit(item)
+    return 0
+
+
+def _generate(spec, local):
+    """Return (recipe, source) for one spec."""
+    if local or not os.getenv("OPENAI_API_KEY"):
+        return compose_recipe(**spec), "local"
+    from ai_generator import generate_recipe_hedged
+    deadline = float(os.getenv("AI_CHEF_HEDGE_SECONDS", "20"))
+    recipe, from_model = generate_recipe_hedged(deadline=deadline, **spec)
+    return recipe, "model" if from_model else "local"
+
+
+def run_generate(args, store):
+    if args.batch:
+        for line_number, line in enumerate(iter_input_lines(args.batch), 1):
+            try:
+                spec = json.loads(line)
+            except json.JSONDecodeError as e:
+                emit({"id": f"line-{line_number}", "error": f"Invalid JSON: {e}"})
+                continue
+            if not isinstance(spec, dict):
+                emit({"id": f"line-{line_number}", "error": "Spec must be a JSON object"})
+                continue
+            spec_id = str(spec.get("id") or f"line-{line_number}")
+            try:
+                recipe, source = _generate({k: v for k, v in spec.items() if k in SPEC_FIELDS}, args.local)
+            except Exception as e:
+                # e.g. a field of the wrong type; the rest of the batch still runs
+                emit({"id": spec_id, "error": f"{type(e).__name__}: {e}"})
+                continue
+            emit({"id": spec_id, "source": source, "recipe": recipe})
+            sys.stdout.flush()
+        return 0
+
+    spec = {
+        "ingredients": [i.strip() for i in args.ingredients.split(",")] if args.ingredients else None,
+        "dietary_preference": args.dietary,
+        "cuisine_type": args.cuisine,
+        "cook_time": args.max_time,
+        "difficulty": args.difficulty,
+        "description": args.description,
+    }
+    recipe, source = _generate(spec, args.local)
+    emit({"source": source, "recipe": recipe})
+    return 0 if "error" not in recipe else 1
+
+
+RUNNERS = {
+    "search": run_search,
+    "filter": run_filter,
+    "plan": run_plan,
+    "grocery": run_grocery,
+    "pantry": run_pantry,
+    "generate": run_generate,
+}
+
+
+def _add_filters(parser):
+    parser.add_argument("--max-time", type=int, help="Maximum cook time in minutes")
+    parser.add_argument("--difficulty", help="easy, medium or hard")
+    parser.add_argument("--dietary", help="Dietary tag, e.g. vegetarian")
+    parser.add_argument("--cuisine", help="Cuisine, e.g. italian")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="AI Chef commands with JSON Lines output")
+    parser.add_argument("--recipes", help="JSON or JSONL recipe file to use instead of the built-in recipes")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search = subparsers.add_parser("search", help="Find recipes by ingredients")
+    search.add_argument("ingredients", nargs="*", help="Ingredients (space or comma separated)")
+    search.add_argument("--batch", metavar="FILE", help="One query per line; - reads stdin")
+    search.add_argument("--limit", type=int, help="Results per query")
+    search.add_argument("--full", action="store_true", help="Include whole recipes")
+    _add_filters(search)
+
+    filter_ = subparsers.add_parser("filter", help="List recipes matching filters")
+    filter_.add_argument("--batch", metavar="FILE", help="One JSON filter object per line; - reads stdin")
+    filter_.add_argument("--limit", type=int, help="Results per query")
+    filter_.add_argument("--full", action="store_true", help="Include whole recipes")
+    _add_filters(filter_)
+
+    plan = subparsers.add_parser("plan", help="Plan meals, one day per line")
+    plan.add_argument("--days", type=int, default=7)
+    plan.add_argument("--dietary", help="Dietary tag every meal must have")
+    plan.add_argument("--max-time", type=int, help="Maximum cook time per meal")
+    plan.add_argument("--budget", action="append", metavar="DAY=MINUTES", help="Cook time limit for one day")
+    plan.add_argument("--seed", type=int, help="Make the plan reproducible")
+    plan.add_argument("--save", action="store_true", help="Save as today's plan")
+
+    grocery = subparsers.add_parser("grocery", help="Grocery list, one item per line")
+    grocery.add_argument("--plan", metavar="FILE", help="`plan` output to shop for; - reads stdin. "
+                                                        "Today's saved plan if omitted")
+    grocery.add_argument("--all-plans", action="store_true", help="Cover every saved plan")
+    grocery.add_argument("--servings", type=int, help="Servings per meal (default: each recipe's)")
+    grocery.add_argument("--pantry", action="store_true", help="Subtract what the pantry already holds")
+
+    pantry = subparsers.add_parser("pantry", help="Pantry inventory")
+    pantry.add_argument("--file", default="pantry_inventory.json", help="Pantry file")
+    pantry_commands = pantry.add_subparsers(dest="pantry_command", required=True)
+    pantry_import = pantry_commands.add_parser("import", help="Import a CSV, JSON or receipt file")
+    pantry_import.add_argument("input")
+    pantry_import.add_argument("--format", choices=("csv", "json", "receipt"))
+    pantry_commands.add_parser("list", help="List pantry items")
+    expiring = pantry_commands.add_parser("expiring", help="Items expiring soon")
+    expiring.add_argument("--days", type=int, default=3)
+
+    generate = subparsers.add_parser("generate", help="Generate a recipe")
+    generate.add_argument("description", nargs="?", help="What to cook, e.g. \"quick shrimp pasta\"")
+    generate.add_argument("--ingredients", help="Comma-separated ingredients to use")
+    generate.add_argument("--batch", metavar="FILE",
+                          help="JSONL specs as for batch_generator.py, generated in order; - reads stdin")
+    generate.add_argument("--local", action="store_true", help="Compose locally even if an API key is set")
+    _add_filters(generate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # Settings like AI_CHEF_HEDGE_SECONDS may live in .env
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        pass
+    else:
+        load_dotenv()
+
+    try:
+        store = load_store(args.recipes)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Could not load recipes from {args.recipes}: {e}", file=sys.stderr)
+        return 2
+
+    try:
+        status = RUNNERS[args.command](args, store)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader stopped early (e.g. `| head`); silence the flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        status = 0
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
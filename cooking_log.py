@@ -0,0 +1,330 @@
+"""
+Append-only cooking history with incrementally maintained rollups.
+
+Every cooked meal is appended to cooking_events.jsonl as one JSON line.
+CookingRollups folds each event into running totals, per-cuisine counts,
+daily/weekly/monthly buckets and the streak in O(1). The rollups are saved
+to cooking_rollups.json together with the log offset they cover, so on
+startup only events appended after that offset are replayed; a missing
+or outdated rollup file is rebuilt from the whole log. Inside a unit of
+work, events are appended by its commit together with the other files.
+
+Streaks, achievements and challenges read these rollups instead of
+keeping counters of their own, so a new badge can be evaluated against
+the complete history.
+"""
+
+import json
+import os
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from persistence import JsonStore
+
+ROLLUP_VERSION = 1
+
+# Meals at or under this many minutes count as quick
+QUICK_MEAL_MINUTES = 30
+
+
+@lru_cache(maxsize=4096)
+def week_start(day):
+    """Monday of the week containing day ("YYYY-MM-DD")."""
+    parsed = date.fromisoformat(day)
+    return (parsed - timedelta(days=parsed.weekday())).isoformat()
+
+
+def make_event(recipe_name=None, cuisine=None, cooking_time=None, is_vegetarian=False, is_vegan=False,
+               timestamp=None):
+    """Build a cooked-meal event dict."""
+    return {
+        "type": "cooked",
+        "ts": (timestamp or datetime.now()).isoformat(timespec="seconds"),
+        "recipe": recipe_name,
+        "cuisine": cuisine.strip().lower() if cuisine else None,
+        "cook_time": cooking_time,
+        "vegetarian": bool(is_vegetarian),
+        "vegan": bool(is_vegan),
+    }
+
+
+class CookingRollups:
+    """Running aggregates over cooking events."""
+
+    def __init__(self, data=None):
+        self.data = data or {
+            "version": ROLLUP_VERSION,
+            "log_offset": 0,
+            "events": 0,
+            "totals": {"meals": 0, "quick_meals": 0, "vegetarian_meals": 0, "vegan_meals": 0},
+            "cuisines": {},
+            "daily": {},
+            "weekly": {},
+            "monthly": {},
+            "streak": {"current": 0, "longest": 0, "last_date": None},
+        }
+
+    def apply(self, event):
+        """
+        Fold one event into the rollups.
+
+        Returns:
+            set: (window, counter) keys whose value changed, or None if any
+            counter may have changed (baseline events)
+        """
+        data = self.data
+        data["events"] += 1
+        if event.get("type") == "baseline":
+            self._apply_baseline(event)
+            return None
+        if event.get("type") != "cooked":
+            return set()
+
+        day = event["ts"][:10]
+        week = week_start(day)
+        changed = {("all", "meals"), ("day", "meals"), ("week", "meals"), ("month", "meals")}
+        totals = data["totals"]
+        totals["meals"] += 1
+        cook_time = event.get("cook_time")
+        if cook_time and cook_time <= QUICK_MEAL_MINUTES:
+            totals["quick_meals"] += 1
+            changed.add(("all", "quick_meals"))
+        if event.get("vegetarian"):
+            totals["vegetarian_meals"] += 1
+            changed.add(("all", "vegetarian_meals"))
+        if event.get("vegan"):
+            totals["vegan_meals"] += 1
+            changed.add(("all", "vegan_meals"))
+
+        weekly = data["weekly"].get(week)
+        if weekly is None:
+            weekly = data["weekly"][week] = {"meals": 0, "healthy": 0, "new_cuisines": 0}
+        weekly["meals"] += 1
+        if event.get("vegetarian") or event.get("vegan"):
+            weekly["healthy"] += 1
+            changed.add(("week", "healthy"))
+
+        cuisine = event.get("cuisine")
+        if cuisine:
+            count = data["cuisines"].get(cuisine, 0) + 1
+            data["cuisines"][cuisine] = count
+            changed.add(("all", "cuisine:" + cuisine))
+            if count == 1:
+                weekly["new_cuisines"] += 1
+                changed.add(("week", "new_cuisines"))
+
+        data["daily"][day] = data["daily"].get(day, 0) + 1
+        month = day[:7]
+        data["monthly"][month] = data["monthly"].get(month, 0) + 1
+        if self._advance_streak(day):
+            changed.add(("all", "streak"))
+            changed.add(("all", "longest_streak"))
+        return changed
+
+    def _advance_streak(self, day):
+        """Update the streak for a meal on day; returns True if it changed."""
+        streak = self.data["streak"]
+        last_day = streak["last_date"]
+        if last_day is None:
+            streak["current"] = 1
+            streak["last_date"] = day
+        elif day > last_day:
+            gap = (date.fromisoformat(day) - date.fromisoformat(last_day)).days
+            streak["current"] = streak["current"] + 1 if gap == 1 else 1
+            streak["last_date"] = day
+        else:
+            # Same-day or out-of-order events don't change the streak
+            return False
+        if streak["current"] > streak["longest"]:
+            streak["longest"] = streak["current"]
+        return True
+
+    def value(self, window, counter, day=None):
+        """
+        Current value of a counter.
+
+        Args:
+            window (str): "all", "day", "week" or "month"
+            counter (str): e.g. "meals", "quick_meals", "cuisine:italian", "streak", "healthy"
+            day (str): Day ("YYYY-MM-DD") whose bucket to read for windowed counters;
+                the best bucket in the history if None
+
+        Returns:
+            int: Counter value, 0 if unknown
+        """
+        data = self.data
+        if window == "all":
+            if counter.startswith("cuisine:"):
+                return data["cuisines"].get(counter[8:], 0)
+            if counter == "streak":
+                return data["streak"]["current"]
+            if counter == "longest_streak":
+                return data["streak"]["longest"]
+            return data["totals"].get(counter, 0)
+        if window == "week":
+            if day is not None:
+                return self.week(week_start(day)).get(counter, 0)
+            return max((bucket.get(counter, 0) for bucket in data["weekly"].values()), default=0)
+        if counter != "meals":
+            return 0
+        buckets, key = (data["daily"], day) if window == "day" else (data["monthly"], day and day[:7])
+        if key is not None:
+            return buckets.get(key, 0)
+        return max(buckets.values(), default=0)
+
+    def _apply_baseline(self, event):
+        """Seed counters carried over from the old cooking_streak.json."""
+        totals = self.data["totals"]
+        totals["meals"] += event.get("total_meals_cooked", 0)
+        totals["quick_meals"] += event.get("quick_meals", 0)
+        totals["vegetarian_meals"] += event.get("vegetarian_meals", 0)
+        totals["vegan_meals"] += event.get("vegan_meals", 0)
+        for cuisine, count in event.get("cuisine_counts", {}).items():
+            self.data["cuisines"][cuisine] = self.data["cuisines"].get(cuisine, 0) + count
+        streak = self.data["streak"]
+        streak["current"] = event.get("current_streak", 0)
+        streak["longest"] = max(streak["longest"], event.get("longest_streak", 0))
+        streak["last_date"] = event.get("last_cooked_date")
+
+    def week(self, week_start_day):
+        """Bucket for the week starting on week_start_day (Monday)."""
+        return self.data["weekly"].get(week_start_day, {"meals": 0, "healthy": 0, "new_cuisines": 0})
+
+    def meals_between(self, start_day, end_day):
+        """Meals cooked from start_day to end_day inclusive, from the daily buckets."""
+        daily = self.data["daily"]
+        total = 0
+        day = date.fromisoformat(start_day)
+        end = date.fromisoformat(end_day)
+        while day <= end:
+            total += daily.get(day.isoformat(), 0)
+            day += timedelta(days=1)
+        return total
+
+
+class CookingLog:
+    """The cooking event file plus its persisted rollups."""
+
+    def __init__(self, filename="cooking_events.jsonl", rollup_file="cooking_rollups.json"):
+        self.filename = filename
+        self.store = JsonStore(rollup_file, lambda: self.rollups.data, restore=self._restore)
+        # Encoded lines recorded inside a unit of work, appended when it commits
+        self.pending = None
+        data = self.store.load(lambda: None)
+        if data and data.get("version") == ROLLUP_VERSION:
+            self.rollups = CookingRollups(data)
+            self.catch_up()
+        else:
+            self.rebuild()
+        self._repair_tail()
+
+    def _restore(self, data):
+        self.rollups = CookingRollups(data)
+
+    def _repair_tail(self):
+        """Terminate a torn last line so the next append starts on its own line."""
+        if not os.path.exists(self.filename) or os.path.getsize(self.filename) == 0:
+            return
+        with open(self.filename, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def iter_events(self, offset=0):
+        """Stream (event, end_offset) pairs from a byte offset; unreadable lines are skipped."""
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, 'rb') as f:
+            f.seek(offset)
+            position = offset
+            for line in f:
+                position += len(line)
+                if not line.endswith(b"\n"):
+                    # Torn final line; stop before it so it is not counted
+                    break
+                try:
+                    yield json.loads(line), position
+                except json.JSONDecodeError:
+                    continue
+
+    def catch_up(self):
+        """Apply events appended since the rollups were saved."""
+        size = os.path.getsize(self.filename) if os.path.exists(self.filename) else 0
+        offset = self.rollups.data["log_offset"]
+        if size < offset:
+            self.rebuild()
+            return
+        if size > offset:
+            with self.store.lock:
+                for event, position in self.iter_events(offset):
+                    self.rollups.apply(event)
+                    self.rollups.data["log_offset"] = position
+            self.store.mark_dirty()
+
+    def rebuild(self):
+        """Recompute all rollups from the full log."""
+        rollups = CookingRollups()
+        for event, position in self.iter_events(0):
+            rollups.apply(event)
+            rollups.data["log_offset"] = position
+        # Swapped in whole, so the timer never writes a half-built rebuild
+        self.rollups = rollups
+        self.store.mark_dirty()
+
+    def record(self, event):
+        """
+        Append an event and fold it into the rollups. Inside a unit of work
+        the line is held back and appended by its commit.
+
+        Returns:
+            set: Changed (window, counter) keys, as from CookingRollups.apply
+        """
+        line = json.dumps(event, separators=(",", ":")) + "\n"
+        if self.pending is not None:
+            self.pending.append(line)
+            offset = None
+        else:
+            with open(self.filename, 'ab') as f:
+                f.write(line.encode("utf-8"))
+                offset = f.tell()
+        with self.store.lock:
+            changed = self.rollups.apply(event)
+            if offset is not None:
+                self.rollups.data["log_offset"] = offset
+        self.store.mark_dirty()
+        return changed
+
+    def begin(self):
+        """Start holding back appends for a unit of work."""
+        self.pending = []
+
+    def pending_append(self):
+        """
+        Lines held back by the unit of work, as (offset, text) for its commit,
+        or None. The rollups' offset is moved to the end of them.
+        """
+        if not self.pending:
+            return None
+        text = "".join(self.pending)
+        offset = os.path.getsize(self.filename) if os.path.exists(self.filename) else 0
+        with self.store.lock:
+            self.rollups.data["log_offset"] = offset + len(text.encode("utf-8"))
+        self.store.mark_dirty()
+        return offset, text
+
+    def end(self):
+        """Stop holding back appends; lines not committed are dropped."""
+        self.pending = None
+
+    def changed_on_disk(self):
+        """
+        True if the log no longer ends where the rollups do, e.g. another
+        process appended to it. Never true while the rollups have a write pending.
+        """
+        if self.store.dirty:
+            return False
+        size = os.path.getsize(self.filename) if os.path.exists(self.filename) else 0
+        return size != self.rollups.data["log_offset"]
+
+    def is_empty(self):
+        return self.rollups.data["events"] == 0
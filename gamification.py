@@ -3,28 +3,54 @@ Gamification system for AI Chef
 Tracks cooking streaks, badges/achievements, and weekly challenges
 """
 
-import json
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 
+from achievement_rules import DEFAULT_RULES, RuleIndex, load_rules
+from cooking_log import CookingLog, make_event
+from persistence import JsonStore, UnitOfWork, load_json, recover_intent
+
 
 class CookingStreak:
-    """Track user's cooking streak."""
+    """
+    Track user's cooking streak.
+    
+    Counters are read from the cooking event log's rollups; recording a
+    meal appends an event. A cooking_streak.json from older versions is
+    imported into the log once, as a baseline event.
+    """
     
-    def __init__(self, filename="cooking_streak.json"):
+    def __init__(self, filename="cooking_streak.json", log=None):
         self.filename = filename
-        self.data = self.load_streak()
-    
-    def load_streak(self):
-        """Load streak data from file."""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return self._default_data()
-        return self._default_data()
+        self.log = log or CookingLog()
+        if self.log.is_empty() and os.path.exists(filename):
+            legacy = load_json(filename, self._default_data)
+            self.log.record({"type": "baseline", "ts": datetime.now().isoformat(timespec="seconds"), **legacy})
+    
+    @property
+    def store(self):
+        """Persistence for the rollups, for use in a unit of work."""
+        return self.log.store
+    
+    @property
+    def rollups(self):
+        return self.log.rollups
+    
+    @property
+    def data(self):
+        """Streak counters in the shape of the old cooking_streak.json."""
+        rollups = self.log.rollups.data
+        return {
+            "current_streak": rollups["streak"]["current"],
+            "longest_streak": rollups["streak"]["longest"],
+            "last_cooked_date": rollups["streak"]["last_date"],
+            "total_meals_cooked": rollups["totals"]["meals"],
+            "quick_meals": rollups["totals"]["quick_meals"],
+            "vegetarian_meals": rollups["totals"]["vegetarian_meals"],
+            "vegan_meals": rollups["totals"]["vegan_meals"],
+            "cuisine_counts": dict(rollups["cuisines"])
+        }
     
     def _default_data(self):
         """Return default streak data structure."""
@@ -39,67 +65,24 @@ class CookingStreak:
             "cuisine_counts": {}
         }
     
-    def save_streak(self):
-        """Save streak data to file."""
-        with open(self.filename, 'w') as f:
-            json.dump(self.data, f, indent=2)
-    
-    def record_meal_cooked(self, cuisine: str = None, cooking_time: int = None, is_vegetarian: bool = False, is_vegan: bool = False):
+    def record_meal_cooked(self, cuisine: str = None, cooking_time: int = None, is_vegetarian: bool = False,
+                           is_vegan: bool = False, recipe_name: str = None):
         """Record that a meal was cooked today."""
-        today = datetime.now().date().isoformat()
-        last_date = self.data.get("last_cooked_date")
-        
-        self.data["total_meals_cooked"] += 1
-        
-        if last_date is None:
-            # First meal ever
-            self.data["current_streak"] = 1
-            self.data["last_cooked_date"] = today
-        else:
-            last_cooked = datetime.fromisoformat(last_date).date()
-            today_date = datetime.now().date()
-            days_diff = (today_date - last_cooked).days
-            
-            if days_diff == 0:
-                # Already cooked today, don't increment streak
-                pass
-            elif days_diff == 1:
-                # Cooked consecutive day, increase streak
-                self.data["current_streak"] += 1
-                self.data["last_cooked_date"] = today
-            else:
-                # Streak broken, reset
-                self.data["current_streak"] = 1
-                self.data["last_cooked_date"] = today
-        
-        # Update longest streak if needed
-        if self.data["current_streak"] > self.data.get("longest_streak", 0):
-            self.data["longest_streak"] = self.data["current_streak"]
-
-        # Track cooking metadata for achievements/challenges
-        if cooking_time and cooking_time <= 30:
-            self.data["quick_meals"] = self.data.get("quick_meals", 0) + 1
-
-        if is_vegetarian:
-            self.data["vegetarian_meals"] = self.data.get("vegetarian_meals", 0) + 1
-
-        if is_vegan:
-            self.data["vegan_meals"] = self.data.get("vegan_meals", 0) + 1
-
-        if cuisine:
-            cuisine_key = cuisine.strip().lower()
-            counts = self.data.get("cuisine_counts", {})
-            counts[cuisine_key] = counts.get(cuisine_key, 0) + 1
-            self.data["cuisine_counts"] = counts
-        
-        self.save_streak()
+        return self.log.record(make_event(
+            recipe_name=recipe_name,
+            cuisine=cuisine,
+            cooking_time=cooking_time,
+            is_vegetarian=is_vegetarian,
+            is_vegan=is_vegan
+        ))
     
     def get_streak_info(self):
         """Get current streak information."""
+        rollups = self.log.rollups.data
         return {
-            "current_streak": self.data["current_streak"],
-            "longest_streak": self.data["longest_streak"],
-            "total_meals": self.data["total_meals_cooked"]
+            "current_streak": rollups["streak"]["current"],
+            "longest_streak": rollups["streak"]["longest"],
+            "total_meals": rollups["totals"]["meals"]
         }
 
 
@@ -128,106 +111,53 @@ class Achievement:
 class AchievementTracker:
     """Track user achievements and badges."""
     
-    # Define all possible achievements
+    # Built-in achievements; the rules that unlock them live in achievement_rules
     ACHIEVEMENTS = {
-        "first_recipe": Achievement(
-            "first_recipe",
-            "👨‍🍳 Your First Dish",
-            "Cook your first recipe",
-            "👨‍🍳"
-        ),
-        "italian_explorer": Achievement(
-            "italian_explorer",
-            "🇮🇹 Italian Explorer",
-            "Cook 3 Italian recipes",
-            "🇮🇹"
-        ),
-        "asian_master": Achievement(
-            "asian_master",
-            "🍜 Asian Master",
-            "Cook 3 Asian recipes",
-            "🍜"
-        ),
-        "mexican_fiesta": Achievement(
-            "mexican_fiesta",
-            "🌮 Mexican Fiesta",
-            "Cook 3 Mexican recipes",
-            "🌮"
-        ),
-        "vegetarian_champion": Achievement(
-            "vegetarian_champion",
-            "🥗 Vegetarian Champion",
-            "Cook 5 vegetarian recipes",
-            "🥗"
-        ),
-        "vegan_virtuoso": Achievement(
-            "vegan_virtuoso",
-            "🌱 Vegan Virtuoso",
-            "Cook 5 vegan recipes",
-            "🌱"
-        ),
-        "speed_cook": Achievement(
-            "speed_cook",
-            "⚡ Speed Cook",
-            "Cook 5 recipes under 30 minutes",
-            "⚡"
-        ),
-        "gourmet_chef": Achievement(
-            "gourmet_chef",
-            "👑 Gourmet Chef",
-            "Cook 10 recipes",
-            "👑"
-        ),
-        "master_chef": Achievement(
-            "master_chef",
-            "🏆 Master Chef",
-            "Cook 25 recipes",
-            "🏆"
-        ),
-        "culinary_legend": Achievement(
-            "culinary_legend",
-            "⭐ Culinary Legend",
-            "Cook 50 recipes",
-            "⭐"
-        ),
-        "week_warrior": Achievement(
-            "week_warrior",
-            "🔥 Week Warrior",
-            "Maintain a 7-day cooking streak",
-            "🔥"
-        ),
+        rule["id"]: Achievement(rule["id"], rule["name"], rule["description"], rule["icon"])
+        for rule in DEFAULT_RULES
     }
     
-    def __init__(self, filename="achievements.json"):
+    def __init__(self, filename="achievements.json", rules=None):
         self.filename = filename
+        self.rules = rules if rules is not None else load_rules()
+        self.store = JsonStore(
+            filename,
+            lambda: {aid: a.to_dict() for aid, a in self.achievements.items()},
+            restore=self._restore
+        )
         self.achievements = self.load_achievements()
     
+    def _restore(self, data):
+        self.achievements = {aid: Achievement(**a) for aid, a in data.items()}
+    
     def load_achievements(self):
-        """Load achievements from file."""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as f:
-                    data = json.load(f)
-                    return {aid: Achievement(**a) for aid, a in data.items()}
-            except (json.JSONDecodeError, IOError):
-                return self._default_achievements()
-        return self._default_achievements()
+        """Load achievements from file, adding any rule not in it yet as locked."""
+        achievements = self._default_achievements()
+        for aid, saved in self.store.load(dict).items():
+            if aid in achievements:
+                achievements[aid].unlocked = saved.get("unlocked", False)
+                achievements[aid].unlock_date = saved.get("unlock_date")
+            else:
+                achievements[aid] = Achievement(**saved)
+        return achievements
     
     def _default_achievements(self):
         """Return all achievements in unlocked=False state."""
-        return {aid: Achievement(**a.to_dict()) for aid, a in self.ACHIEVEMENTS.items()}
+        return {
+            rule["id"]: Achievement(rule["id"], rule["name"], rule.get("description", ""), rule.get("icon", "🏅"))
+            for rule in self.rules
+        }
     
     def save_achievements(self):
-        """Save achievements to file."""
-        data = {aid: a.to_dict() for aid, a in self.achievements.items()}
-        with open(self.filename, 'w') as f:
-            json.dump(data, f, indent=2)
+        """Schedule a save of achievements."""
+        self.store.mark_dirty()
     
     def unlock_achievement(self, achievement_id: str) -> bool:
         """Unlock an achievement if it exists and isn't already unlocked."""
         if achievement_id in self.achievements and not self.achievements[achievement_id].unlocked:
-            self.achievements[achievement_id].unlocked = True
-            self.achievements[achievement_id].unlock_date = datetime.now().isoformat()
+            with self.store.lock:
+                self.achievements[achievement_id].unlocked = True
+                self.achievements[achievement_id].unlock_date = datetime.now().isoformat()
             self.save_achievements()
             return True
         return False
@@ -268,19 +198,24 @@ class WeeklyChallenges:
         },
     ]
     
+    # Weekly rollup counter that drives each challenge's progress
+    CHALLENGE_COUNTERS = {
+        "cook_five": "meals",
+        "try_new_cuisine": "new_cuisines",
+        "healthy_week": "healthy",
+    }
+    
     def __init__(self, filename="weekly_challenges.json"):
         self.filename = filename
+        self.store = JsonStore(filename, lambda: self.challenges, restore=self._restore)
         self.challenges = self.load_challenges()
     
+    def _restore(self, data):
+        self.challenges = data
+    
     def load_challenges(self):
         """Load weekly challenges from file."""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return self._reset_challenges()
-        return self._reset_challenges()
+        return self.store.load(self._reset_challenges)
     
     def _reset_challenges(self):
         """Reset challenges for the week."""
@@ -304,9 +239,8 @@ class WeeklyChallenges:
         return week_start.isoformat()
     
     def save_challenges(self):
-        """Save challenges to file."""
-        with open(self.filename, 'w') as f:
-            json.dump(self.challenges, f, indent=2)
+        """Schedule a save of challenges."""
+        self.store.mark_dirty()
     
     def check_week_reset(self):
         """Check if a new week has started and reset if needed."""
@@ -315,14 +249,38 @@ class WeeklyChallenges:
             self.challenges = self._reset_challenges()
             self.save_challenges()
     
+    def reset_progress(self):
+        """Clear this week's progress, e.g. before recomputing it from a replay."""
+        self.challenges = self._reset_challenges()
+        self.save_challenges()
+
+    def sync_with_rollups(self, rollups):
+        """Set this week's progress from the cooking log's weekly bucket."""
+        self.check_week_reset()
+        week = rollups.week(self.challenges["week_start"])
+        changed = False
+        for challenge in self.challenges["challenges"]:
+            counter = self.CHALLENGE_COUNTERS.get(challenge["id"])
+            if counter is None or challenge["completed"]:
+                continue
+            progress = max(challenge["progress"], week.get(counter, 0))
+            if progress != challenge["progress"]:
+                with self.store.lock:
+                    challenge["progress"] = progress
+                    challenge["completed"] = progress >= challenge["target"]
+                changed = True
+        if changed:
+            self.save_challenges()
+    
     def update_challenge_progress(self, challenge_id: str, increment: int = 1):
         """Update progress on a challenge."""
         self.check_week_reset()
         for challenge in self.challenges["challenges"]:
             if challenge["id"] == challenge_id and not challenge["completed"]:
-                challenge["progress"] += increment
-                if challenge["progress"] >= challenge["target"]:
-                    challenge["completed"] = True
+                with self.store.lock:
+                    challenge["progress"] += increment
+                    if challenge["progress"] >= challenge["target"]:
+                        challenge["completed"] = True
                 self.save_challenges()
                 break
     
@@ -348,10 +306,42 @@ class WeeklyChallenges:
 class GamificationManager:
     """Central manager for all gamification features."""
     
+    # Records which files a multi-store commit was replacing, for crash recovery
+    INTENT_FILE = "gamification.intent.json"
+    
     def __init__(self):
+        recover_intent(self.INTENT_FILE)
         self.streak = CookingStreak()
         self.achievements = AchievementTracker()
         self.challenges = WeeklyChallenges()
+        self._build_rule_index()
+    
+    def _build_rule_index(self):
+        """Index the rules of achievements that are still locked."""
+        self.rule_index = RuleIndex(
+            self.achievements.rules,
+            unlocked=[a.id for a in self.achievements.get_unlocked_achievements()]
+        )
+    
+    def changed_on_disk(self):
+        """
+        True if another process recorded meals or changed achievement/challenge
+        files. Never true while any of the stores has a write pending, so a
+        reload can't leave two stores writing the same files.
+        """
+        stores = (self.streak.log.store, self.achievements.store, self.challenges.store)
+        if any(store.dirty for store in stores):
+            return False
+        return (self.streak.log.changed_on_disk() or self.achievements.store.changed_on_disk()
+                or self.challenges.store.changed_on_disk())
+    
+    def unit_of_work(self):
+        """Group streak, achievement and challenge updates into one atomic commit."""
+        return UnitOfWork(
+            [self.streak.store, self.achievements.store, self.challenges.store],
+            self.INTENT_FILE,
+            logs=[self.streak.log]
+        )
     
     def record_recipe_cooked(self, recipe_name: str, cuisine: str = None, cooking_time: int = None, is_vegetarian: bool = False, is_vegan: bool = False):
         """
@@ -364,63 +354,44 @@ class GamificationManager:
             is_vegetarian: Whether recipe is vegetarian
             is_vegan: Whether recipe is vegan
         """
-        # Update streak
-        self.streak.record_meal_cooked(
+        # The event and all three stores are written once, together, when the block ends
+        try:
+            with self.unit_of_work():
+                self._apply_recipe_cooked(recipe_name, cuisine, cooking_time, is_vegetarian, is_vegan)
+        except Exception:
+            # Achievements were rolled back; put their rules back in the index
+            self._build_rule_index()
+            raise
+    
+    def _apply_recipe_cooked(self, recipe_name, cuisine, cooking_time, is_vegetarian, is_vegan):
+        """Log the meal, then update achievements and challenges from the rollups."""
+        changed = self.streak.record_meal_cooked(
             cuisine=cuisine,
             cooking_time=cooking_time,
             is_vegetarian=is_vegetarian,
-            is_vegan=is_vegan
+            is_vegan=is_vegan,
+            recipe_name=recipe_name
         )
+        # Only rules on counters this meal changed are looked at
+        today = datetime.now().date().isoformat()
+        for achievement_id in self.rule_index.evaluate(self.streak.rollups, changed, today):
+            self.achievements.unlock_achievement(achievement_id)
+        self.challenges.sync_with_rollups(self.streak.rollups)
+    
+    def check_achievements(self):
+        """
+        Unlock every achievement the whole cooking history qualifies for.
         
-        # Unlock achievements
-        streak_info = self.streak.get_streak_info()
-        if streak_info["total_meals"] == 1:
-            self.achievements.unlock_achievement("first_recipe")
-        
-        if streak_info["current_streak"] >= 7:
-            self.achievements.unlock_achievement("week_warrior")
-        
-        if streak_info["total_meals"] >= 10:
-            self.achievements.unlock_achievement("gourmet_chef")
-        if streak_info["total_meals"] >= 25:
-            self.achievements.unlock_achievement("master_chef")
-        if streak_info["total_meals"] >= 50:
-            self.achievements.unlock_achievement("culinary_legend")
-
-        streak_data = self.streak.data
-        cuisine_counts = streak_data.get("cuisine_counts", {})
-        quick_meals = streak_data.get("quick_meals", 0)
-        vegetarian_meals = streak_data.get("vegetarian_meals", 0)
-        vegan_meals = streak_data.get("vegan_meals", 0)
-
-        if cuisine_counts.get("italian", 0) >= 3:
-            self.achievements.unlock_achievement("italian_explorer")
-
-        if cuisine_counts.get("asian", 0) >= 3:
-            self.achievements.unlock_achievement("asian_master")
-
-        if cuisine_counts.get("mexican", 0) >= 3:
-            self.achievements.unlock_achievement("mexican_fiesta")
-
-        if vegetarian_meals >= 5:
-            self.achievements.unlock_achievement("vegetarian_champion")
-
-        if vegan_meals >= 5:
-            self.achievements.unlock_achievement("vegan_virtuoso")
-
-        if quick_meals >= 5:
-            self.achievements.unlock_achievement("speed_cook")
-        
-        if is_vegetarian or is_vegan:
-            self.challenges.update_challenge_progress("healthy_week")
-
-        if cuisine:
-            cuisine_key = cuisine.strip().lower()
-            if cuisine_counts.get(cuisine_key, 0) == 1:
-                self.challenges.update_challenge_progress("try_new_cuisine")
+        Useful after adding rules: windowed rules are checked against their
+        best day, week or month on record.
         
-        # Update weekly challenges
-        self.challenges.update_challenge_progress("cook_five")
+        Returns:
+            list: Ids of newly unlocked achievements
+        """
+        unlocked = self.rule_index.evaluate(self.streak.rollups)
+        for achievement_id in unlocked:
+            self.achievements.unlock_achievement(achievement_id)
+        return unlocked
     
     def get_gamification_status(self):
         """Get complete gamification status."""
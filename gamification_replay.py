@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Replay cooking history to rebuild gamification state.
+
+Streams a time-ordered JSONL file of cooked-meal events, one per line:
+
+    {"user": "alice", "ts": "2026-03-01T18:30:00", "recipe": "Pad Thai", "cuisine": "asian",
+     "cook_time": 25, "vegetarian": false, "vegan": false}
+
+through the same rollups and achievement rules the app uses, and writes
+the results once at the end. Use it after changing streak logic or badge
+thresholds, or to import history from another system:
+
+    python gamification_replay.py history.jsonl --db gamification.db --workers 8
+    python gamification_replay.py --db gamification.db      # recompute from stored events
+    python gamification_replay.py history.jsonl --local     # this install's files
+    python gamification_replay.py --local
+
+With --db, events are split by user into one shard per worker and each
+shard is replayed in its own process. With --local, the "user" field is
+ignored and the history is merged into this install's cooking log.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from achievement_rules import RuleIndex, load_rules
+from cooking_log import CookingRollups
+from gamification import AchievementTracker, GamificationManager, WeeklyChallenges
+from gamification_store import GamificationStore
+from persistence import JsonStore, UnitOfWork, recover_intent
+
+
+def iter_jsonl(filename):
+    """Stream events from a JSONL file, skipping unreadable lines and lines without a timestamp."""
+    if not os.path.exists(filename):
+        return
+    with open(filename, 'r') as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(event, dict) and event.get("ts"):
+                yield normalize_event(event)
+
+
+def normalize_event(event):
+    """Fill in the fields CookingRollups.apply expects."""
+    event.setdefault("type", "cooked")
+    if event.get("cuisine"):
+        event["cuisine"] = event["cuisine"].strip().lower()
+    return event
+
+
+class Replay:
+    """Folds events into per-user rollups and unlocked achievements."""
+
+    def __init__(self, rules):
+        self.rule_index = RuleIndex(rules)
+        self.users = {}
+        self.events = 0
+
+    def apply(self, user_id, event):
+        state = self.users.get(user_id)
+        if state is None:
+            state = self.users[user_id] = (CookingRollups(), {})
+        rollups, achievements = state
+        changed = rollups.apply(event)
+        for achievement_id in self.rule_index.newly_reached(rollups, changed, event["ts"][:10], achievements):
+            achievements[achievement_id] = event["ts"]
+        self.events += 1
+        return rollups
+
+    def states(self):
+        """(user_id, rollups data, achievements) for every replayed user."""
+        return [(user_id, rollups.data, achievements) for user_id, (rollups, achievements) in self.users.items()]
+
+
+def iter_shard(filename):
+    """Stream (user_id, ts, event JSON) rows from a shard file without parsing the events."""
+    with open(filename, 'r') as f:
+        for line in f:
+            user_id, ts, event = line.rstrip("\n").split("\t", 2)
+            # Only ids with escapes need a real JSON decode
+            yield (json.loads(user_id) if "\\" in user_id else user_id[1:-1]), ts, event
+
+
+def replay_shard(filename, rules):
+    """Replay one shard file in a worker process; returns (states, event count)."""
+    replay = Replay(rules)
+    for user_id, _, event in iter_shard(filename):
+        replay.apply(user_id, json.loads(event))
+    return replay.states(), replay.events
+
+
+def write_shards(events, shard_count, directory):
+    """
+    Split (user_id, event) pairs into shard files so every user lands in
+    exactly one shard, keeping each user's events in order.
+
+    Each line is "<user id as JSON>\\t<ts>\\t<event JSON>", so the events can
+    be stored afterwards without being parsed again.
+
+    Returns:
+        list: Shard filenames
+    """
+    filenames = [os.path.join(directory, f"shard-{i}.tsv") for i in range(shard_count)]
+    files = [open(filename, 'w') for filename in filenames]
+    try:
+        for user_id, event in events:
+            shard = zlib.crc32(user_id.encode("utf-8")) % shard_count
+            files[shard].write(
+                f"{json.dumps(user_id)}\t{event['ts']}\t{json.dumps(event, separators=(',', ':'))}\n"
+            )
+    finally:
+        for f in files:
+            f.close()
+    return filenames
+
+
+def replay_store(input_file=None, db="gamification.db", workers=None, rules=None):
+    """
+    Rebuild users in the multi-user store by replaying their events.
+
+    Args:
+        input_file (str): JSONL history to import; the store's own events if None
+        db (str): SQLite database of GamificationStore
+        workers (int): Worker processes; one per CPU if None
+        rules (list): Achievement rules; load_rules() if None
+
+    Returns:
+        dict: users, events and elapsed seconds
+    """
+    started = time.perf_counter()
+    rules = rules if rules is not None else load_rules()
+    workers = max(1, workers or os.cpu_count() or 1)
+    store = GamificationStore(db, rules=rules)
+    directory = tempfile.mkdtemp(prefix="ai_chef_replay_")
+    try:
+        if input_file:
+            source = ((str(event.pop("user", "default")), event) for event in iter_jsonl(input_file))
+        else:
+            source = store.iter_events()
+        shards = write_shards(source, workers, directory)
+
+        states, events = [], 0
+        if workers == 1:
+            results = [replay_shard(shards[0], rules)]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(replay_shard, shards, [rules] * len(shards)))
+        for shard_states, shard_events in results:
+            states.extend(shard_states)
+            events += shard_events
+
+        # Imported events replace the stored history of the users they cover
+        imported = None
+        if input_file:
+            imported = (row for shard in shards for row in iter_shard(shard))
+        store.replace_users(states, imported)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+        store.close()
+    return {"users": len(states), "events": events, "seconds": time.perf_counter() - started}
+
+
+def replay_local(input_file=None, log_file="cooking_events.jsonl", rollup_file="cooking_rollups.json",
+                 achievements_file="achievements.json", challenges_file="weekly_challenges.json", rules=None):
+    """
+    Rebuild this install's rollups, achievements and weekly challenges.
+
+    The history in input_file is merged by timestamp into the cooking log
+    (which is replayed on its own if input_file is None). Achievements are
+    recomputed from scratch with the date of the meal that earned them.
+
+    Returns:
+        dict: users, events and elapsed seconds
+    """
+    started = time.perf_counter()
+    recover_intent(GamificationManager.INTENT_FILE)
+    tracker = AchievementTracker(achievements_file, rules=rules)
+    challenges = WeeklyChallenges(challenges_file)
+    replay = Replay(tracker.rules)
+
+    events = iter_jsonl(log_file)
+    if input_file:
+        events = heapq.merge(events, iter_jsonl(input_file), key=lambda event: event["ts"])
+
+    temp_log = f"{log_file}.{os.getpid()}.tmp"
+    offset = 0
+    with open(temp_log, 'wb') as f:
+        for event in events:
+            event.pop("user", None)
+            line = (json.dumps(event, separators=(",", ":")) + "\n").encode("utf-8")
+            f.write(line)
+            offset += len(line)
+            replay.apply(None, event)
+        f.flush()
+        os.fsync(f.fileno())
+
+    rollups, unlocked = replay.users.get(None, (CookingRollups(), {}))
+    rollups.data["log_offset"] = offset
+
+    # Without a rollup file the next start rebuilds it from the new log,
+    # so a crash before the commit below can't leave them out of step
+    if os.path.exists(rollup_file):
+        os.remove(rollup_file)
+    os.replace(temp_log, log_file)
+
+    rollup_store = JsonStore(rollup_file, lambda: rollups.data)
+    with UnitOfWork([rollup_store, tracker.store, challenges.store], GamificationManager.INTENT_FILE):
+        rollup_store.mark_dirty()
+        for achievement in tracker.achievements.values():
+            achievement.unlocked = achievement.id in unlocked
+            achievement.unlock_date = unlocked.get(achievement.id)
+        tracker.save_achievements()
+        challenges.reset_progress()
+        challenges.sync_with_rollups(rollups)
+    return {"users": 1, "events": replay.events, "seconds": time.perf_counter() - started}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay cooking history into gamification state")
+    parser.add_argument("input", nargs="?", help="Time-ordered JSONL event file; replays stored history if omitted")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--db", default="gamification.db", help="Multi-user SQLite database to rebuild")
+    target.add_argument("--local", action="store_true", help="Rebuild this install's streak, badge and challenge files")
+    parser.add_argument("--workers", type=int, help="Worker processes for --db (default: one per CPU)")
+    args = parser.parse_args()
+
+    if args.local:
+        stats = replay_local(args.input)
+    else:
+        stats = replay_store(args.input, args.db, args.workers)
+    rate = stats["events"] / stats["seconds"] if stats["seconds"] else 0
+    print(f"Replayed {stats['events']} events for {stats['users']} users in {stats['seconds']:.2f}s "
+          f"({rate:,.0f} events/s)")
+
+
+if __name__ == "__main__":
+    main()
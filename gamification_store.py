@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Multi-user gamification state in SQLite.
+
+One row per user holds the cooking rollups, unlocked achievements and the
+leaderboard columns (current streak, total meals, this week's challenge
+points). Every per-user operation is a primary-key lookup plus one
+update inside a BEGIN IMMEDIATE transaction, so concurrent writers can't
+lose each other's updates, and leaderboards read the top rows straight
+off an index:
+
+    python gamification_store.py leaderboard --by meals --top 10
+
+Rows only keep the rollups the rules read: totals, cuisine counts, the
+streak and the latest day, week and month buckets. The full history is
+the cooking_events table, which also serves auditing and replay.
+"""
+
+import argparse
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from achievement_rules import RuleIndex, load_rules
+from cooking_log import CookingRollups, make_event, week_start
+from gamification import WeeklyChallenges
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    current_streak INTEGER NOT NULL DEFAULT 0,
+    longest_streak INTEGER NOT NULL DEFAULT 0,
+    last_cooked_date TEXT,
+    total_meals INTEGER NOT NULL DEFAULT 0,
+    week_start TEXT,
+    week_points INTEGER NOT NULL DEFAULT 0,
+    rollups TEXT NOT NULL,
+    achievements TEXT NOT NULL DEFAULT '{}',
+    updated_at TEXT
+);
+DROP INDEX IF EXISTS idx_users_streak;
+CREATE INDEX IF NOT EXISTS idx_users_active_streak ON users (last_cooked_date, current_streak DESC);
+CREATE INDEX IF NOT EXISTS idx_users_meals ON users (total_meals DESC);
+CREATE INDEX IF NOT EXISTS idx_users_week_points ON users (week_start, week_points DESC);
+CREATE TABLE IF NOT EXISTS cooking_events (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_user_ts ON cooking_events (user_id, ts);
+"""
+
+LEADERBOARDS = ("streak", "meals", "weekly_points")
+
+
+def _row_rollups(data):
+    """Rollups without past day/week/month buckets, so a row stays the same size as history grows."""
+    data = dict(data)
+    for window in ("daily", "weekly", "monthly"):
+        buckets = data[window]
+        if len(buckets) > 1:
+            latest = max(buckets)
+            data[window] = {latest: buckets[latest]}
+    return data
+
+
+def challenge_points(rollups, week):
+    """Points earned from weekly challenges completed in the given week."""
+    bucket = rollups.week(week)
+    points = 0
+    for challenge in WeeklyChallenges.CHALLENGES:
+        counter = WeeklyChallenges.CHALLENGE_COUNTERS.get(challenge["id"])
+        if counter and bucket.get(counter, 0) >= challenge["target"]:
+            points += int(challenge["reward"].split()[0])
+    return points
+
+
+class GamificationStore:
+    """Gamification state for many users in one SQLite database."""
+
+    def __init__(self, path="gamification.db", rules=None):
+        self.path = path
+        # Autocommit mode: transactions are opened explicitly by _write_transaction
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.rules = rules if rules is not None else load_rules()
+        self.rule_index = RuleIndex(self.rules)
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def _write_transaction(self):
+        """
+        Hold the write lock from the first read, so two processes updating
+        the same user can't both read the old row and lose one update.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _load_user(self, user_id):
+        row = self.conn.execute(
+            "SELECT rollups, achievements FROM users WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None:
+            return CookingRollups(), {}
+        return CookingRollups(json.loads(row[0])), json.loads(row[1])
+
+    def _save_user(self, user_id, rollups, achievements, week):
+        streak = rollups.data["streak"]
+        self.conn.execute(
+            """
+            INSERT INTO users (user_id, current_streak, longest_streak, last_cooked_date, total_meals,
+                               week_start, week_points, rollups, achievements, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET
+                current_streak = excluded.current_streak,
+                longest_streak = excluded.longest_streak,
+                last_cooked_date = excluded.last_cooked_date,
+                total_meals = excluded.total_meals,
+                week_start = excluded.week_start,
+                week_points = excluded.week_points,
+                rollups = excluded.rollups,
+                achievements = excluded.achievements,
+                updated_at = excluded.updated_at
+            """,
+            (
+                user_id, streak["current"], streak["longest"], streak["last_date"],
+                rollups.data["totals"]["meals"], week, challenge_points(rollups, week),
+                json.dumps(_row_rollups(rollups.data), separators=(",", ":")),
+                json.dumps(achievements, separators=(",", ":")),
+                datetime.now().isoformat(timespec="seconds")
+            )
+        )
+
+    def record_events(self, user_id, events):
+        """
+        Apply cooked-meal events for one user in a single transaction.
+
+        Args:
+            user_id (str): User the events belong to
+            events (iterable): Event dicts from cooking_log.make_event, oldest first
+
+        Returns:
+            list: Ids of achievements unlocked by these events
+        """
+        with self._write_transaction():
+            rollups, achievements = self._load_user(user_id)
+            unlocked = []
+            week = None
+            rows = []
+            for event in events:
+                changed = rollups.apply(event)
+                day = event["ts"][:10]
+                week = week_start(day)
+                for achievement_id in self.rule_index.newly_reached(rollups, changed, day, achievements):
+                    achievements[achievement_id] = event["ts"]
+                    unlocked.append(achievement_id)
+                rows.append((user_id, event["ts"], json.dumps(event, separators=(",", ":"))))
+            if not rows:
+                return []
+            self.conn.executemany("INSERT INTO cooking_events (user_id, ts, event) VALUES (?, ?, ?)", rows)
+            self._save_user(user_id, rollups, achievements, week)
+        return unlocked
+
+    def record_recipe_cooked(self, user_id, recipe_name, cuisine=None, cooking_time=None, is_vegetarian=False,
+                             is_vegan=False, timestamp=None):
+        """Record one cooked meal for a user; returns newly unlocked achievement ids."""
+        event = make_event(recipe_name, cuisine, cooking_time, is_vegetarian, is_vegan, timestamp)
+        return self.record_events(user_id, [event])
+
+    def replace_users(self, states, events=None):
+        """
+        Overwrite users' state in one transaction, e.g. after a replay.
+
+        Args:
+            states (iterable): (user_id, rollups data, achievements) tuples
+            events (iterable): (user_id, ts, event JSON) rows that replace the
+                stored events of these users; stored events are kept if None
+        """
+        with self._write_transaction():
+            user_ids = []
+            for user_id, data, achievements in states:
+                rollups = CookingRollups(data)
+                last_date = data["streak"]["last_date"]
+                self._save_user(user_id, rollups, achievements, last_date and week_start(last_date))
+                user_ids.append((user_id,))
+            if events is not None:
+                self.conn.executemany("DELETE FROM cooking_events WHERE user_id = ?", user_ids)
+                self.conn.executemany(
+                    "INSERT INTO cooking_events (user_id, ts, event) VALUES (?, ?, ?)", events
+                )
+
+    def iter_events(self):
+        """Stream every stored (user_id, event) pair, each user's in time order."""
+        cursor = self.conn.execute("SELECT user_id, event FROM cooking_events ORDER BY user_id, ts")
+        for user_id, event in cursor:
+            yield user_id, json.loads(event)
+
+    def get_user_status(self, user_id):
+        """Streak, unlocked achievements and this week's challenge points for a user."""
+        rollups, achievements = self._load_user(user_id)
+        streak = rollups.data["streak"]
+        return {
+            "streak": {
+                "current_streak": streak["current"],
+                "longest_streak": streak["longest"],
+                "total_meals": rollups.data["totals"]["meals"]
+            },
+            "achievements": [
+                {**self._rule_info(achievement_id), "unlock_date": unlocked_at}
+                for achievement_id, unlocked_at in achievements.items()
+            ],
+            "weekly_points": challenge_points(rollups, week_start(date.today().isoformat()))
+        }
+
+    def _rule_info(self, achievement_id):
+        rule = self.rule_index.rules.get(achievement_id, {})
+        return {"id": achievement_id, "name": rule.get("name", achievement_id), "icon": rule.get("icon", "🏅")}
+
+    def leaderboard(self, by="meals", top=10, today=None):
+        """
+        Top users by current streak, total meals or this week's challenge points.
+
+        Each query walks its index from the top and stops after `top` rows;
+        streaks only count if the user cooked today or yesterday, so the
+        streak board reads the top rows of those two days and merges them.
+
+        Returns:
+            list: (user_id, value) tuples, best first
+        """
+        today = today or date.today()
+        if by == "streak":
+            yesterday = (today - timedelta(days=1)).isoformat()
+            day_query = (
+                "SELECT * FROM (SELECT user_id, current_streak FROM users "
+                "WHERE last_cooked_date = ? ORDER BY current_streak DESC LIMIT ?)"
+            )
+            query = f"{day_query} UNION ALL {day_query} ORDER BY current_streak DESC LIMIT ?"
+            params = (today.isoformat(), top, yesterday, top, top)
+        elif by == "meals":
+            query = "SELECT user_id, total_meals FROM users ORDER BY total_meals DESC LIMIT ?"
+            params = (top,)
+        elif by == "weekly_points":
+            query = (
+                "SELECT user_id, week_points FROM users WHERE week_start = ? "
+                "ORDER BY week_points DESC LIMIT ?"
+            )
+            params = (week_start(today.isoformat()), top)
+        else:
+            raise ValueError(f"Unknown leaderboard: {by}")
+        return self.conn.execute(query, params).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-user gamification store")
+    parser.add_argument("--db", default="gamification.db", help="SQLite database file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    board = subparsers.add_parser("leaderboard", help="Show a leaderboard")
+    board.add_argument("--by", choices=LEADERBOARDS, default="meals")
+    board.add_argument("--top", type=int, default=10)
+
+    status = subparsers.add_parser("status", help="Show one user's status")
+    status.add_argument("user_id")
+
+    args = parser.parse_args()
+    store = GamificationStore(args.db)
+    try:
+        if args.command == "leaderboard":
+            for rank, (user_id, value) in enumerate(store.leaderboard(args.by, args.top), 1):
+                print(f"{rank:>3}. {user_id}  {value}")
+        else:
+            print(json.dumps(store.get_user_status(args.user_id), indent=2, ensure_ascii=False))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
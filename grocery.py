@@ -0,0 +1,344 @@
+"""
+Grocery list aggregation: parse ingredient quantities, convert units and
+group items by store category.
+
+Ingredients may be plain names ("garlic") or carry a quantity and unit
+("2 tbsp soy sauce", "1 1/2 cups rice", "500 g chicken"). Quantities are
+scaled by planned servings, converted to a base unit per dimension
+(volume -> ml, weight -> g) and summed, so any number of plans can be
+aggregated in a single pass.
+"""
+
+import re
+from datetime import datetime, timedelta
+from fractions import Fraction
+
+from recipes import get_recipe_by_name
+
+CATEGORY_ITEMS = {
+    "Proteins": ["chicken", "beef", "salmon", "shrimp", "ground beef", "chickpeas", "tofu", "pork",
+                 "bacon", "turkey", "eggs", "egg", "black beans", "lentils", "sausage", "tuna", "cod"],
+    "Vegetables": ["broccoli", "bell pepper", "zucchini", "tomato", "lettuce", "onion", "kale",
+                   "sweet potato", "tomatoes", "romaine lettuce", "avocado", "spinach", "carrots",
+                   "carrot", "mushrooms", "potatoes", "potato", "celery", "corn", "cucumber", "lemon",
+                   "lime", "green beans", "peas", "cabbage", "cauliflower", "asparagus"],
+    "Grains & Pasta": ["rice", "pasta", "tortillas", "bread", "croutons", "noodles", "quinoa", "flour",
+                       "oats", "couscous"],
+    "Dairy": ["cheese", "butter", "cream", "sour cream", "parmesan", "milk", "yogurt", "mozzarella",
+              "cheddar", "feta"],
+    "Pantry": ["soy sauce", "garlic", "ginger", "oil", "olive oil", "taco seasoning", "chicken broth",
+               "vegetable broth", "tahini", "caesar dressing", "white wine", "vinegar", "honey", "sugar",
+               "salt", "black pepper", "coconut milk", "tomato paste", "canned tomatoes"],
+    "Herbs & Seasonings": ["thyme", "basil", "parsley", "cilantro", "oregano", "rosemary", "cumin",
+                           "paprika", "chili powder", "cinnamon", "dill"],
+    "Other": []
+}
+
+# Precomputed ingredient -> category lookup
+INGREDIENT_CATEGORIES = {
+    item: category for category, items in CATEGORY_ITEMS.items() for item in items
+}
+
+# unit alias -> (canonical unit, dimension, size in base unit)
+UNITS = {}
+for _names, _unit, _dimension, _size in [
+    (("tsp", "tsps", "teaspoon", "teaspoons"), "tsp", "volume", 4.92892),
+    (("tbsp", "tbsps", "tablespoon", "tablespoons", "tbs"), "tbsp", "volume", 14.7868),
+    (("cup", "cups", "c"), "cup", "volume", 236.588),
+    (("ml", "milliliter", "milliliters", "millilitre", "millilitres"), "ml", "volume", 1.0),
+    (("l", "liter", "liters", "litre", "litres"), "l", "volume", 1000.0),
+    (("fl oz", "fluid ounce", "fluid ounces"), "fl oz", "volume", 29.5735),
+    (("g", "gram", "grams"), "g", "weight", 1.0),
+    (("kg", "kilogram", "kilograms"), "kg", "weight", 1000.0),
+    (("oz", "ounce", "ounces"), "oz", "weight", 28.3495),
+    (("lb", "lbs", "pound", "pounds"), "lb", "weight", 453.592),
+    (("clove", "cloves"), "clove", "clove", 1.0),
+    (("can", "cans"), "can", "can", 1.0),
+    (("bunch", "bunches"), "bunch", "bunch", 1.0),
+    (("pinch", "pinches"), "pinch", "pinch", 1.0),
+]:
+    for _name in _names:
+        UNITS[_name] = (_unit, _dimension, _size)
+
+METRIC_UNITS = {"ml", "l", "g", "kg"}
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+_QUANTITY = re.compile(
+    r"^\s*(?P<amount>\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?)\s*(?P<rest>.*)$"
+)
+_UNIT = re.compile(
+    r"^(?P<unit>" + "|".join(sorted((re.escape(u) for u in UNITS), key=len, reverse=True)) + r")\.?(?:\s+|$)",
+    re.IGNORECASE
+)
+
+
+def _parse_amount(text):
+    return float(sum(Fraction(part) for part in text.split()))
+
+
+def _ingredient_key(name):
+    """Matching key: lowercase, single spaces, crude singular form."""
+    key = " ".join(name.lower().split())
+    if key.endswith("oes"):
+        return key[:-2]
+    if key.endswith("s") and not key.endswith("ss") and len(key) > 3:
+        return key[:-1]
+    return key
+
+
+def parse_ingredient(text):
+    """
+    Split ingredient text into amount, unit and name.
+
+    Returns:
+        dict: name, amount (None without a quantity), unit, dimension, base_amount
+    """
+    cleaned = re.sub(r"\([^)]*\)", "", text).split(",")[0].strip()
+    amount = None
+    unit, dimension, size = "recipe-use", "use", 1.0
+
+    match = _QUANTITY.match(cleaned)
+    if match:
+        amount = _parse_amount(match.group("amount"))
+        cleaned = match.group("rest")
+        unit_match = _UNIT.match(cleaned)
+        if unit_match:
+            unit, dimension, size = UNITS[unit_match.group("unit").lower()]
+            cleaned = cleaned[unit_match.end():]
+        else:
+            unit, dimension, size = "item", "count", 1.0
+        if cleaned.lower().startswith("of "):
+            cleaned = cleaned[3:]
+
+    name = " ".join(cleaned.lower().split())
+    return {
+        "name": name,
+        "amount": amount,
+        "unit": unit,
+        "dimension": dimension,
+        "base_amount": (amount if amount is not None else 1.0) * size
+    }
+
+
+def categorize_ingredient(name):
+    """Return the store category for an ingredient name."""
+    name = " ".join(name.lower().split())
+    category = INGREDIENT_CATEGORIES.get(name)
+    if category:
+        return category
+    # Fall back to the trailing words, e.g. "boneless chicken" -> "chicken"
+    words = name.split()
+    for start in range(1, len(words)):
+        category = INGREDIENT_CATEGORIES.get(" ".join(words[start:]))
+        if category:
+            return category
+    return "Other"
+
+
+def _display_quantity(base_amount, dimension, metric):
+    """Pick a readable unit for an aggregated amount."""
+    if dimension == "volume":
+        if metric:
+            return (base_amount / 1000, "l") if base_amount >= 1000 else (base_amount, "ml")
+        for unit in ("cup", "tbsp", "tsp"):
+            size = UNITS[unit][2]
+            if base_amount >= size or unit == "tsp":
+                return base_amount / size, unit
+    if dimension == "weight":
+        if metric:
+            return (base_amount / 1000, "kg") if base_amount >= 1000 else (base_amount, "g")
+        return (base_amount / UNITS["lb"][2], "lb") if base_amount >= UNITS["lb"][2] \
+            else (base_amount / UNITS["oz"][2], "oz")
+    return base_amount, {"use": "recipe-use", "count": "item"}.get(dimension, dimension)
+
+
+def _round_quantity(value):
+    rounded = round(value, 2)
+    return int(rounded) if rounded == int(rounded) else rounded
+
+
+def planned_date(plan_date, day):
+    """
+    Date a planned day falls on: the first matching weekday on or after the plan date.
+
+    Returns:
+        date: Planned date, or None if either value can't be read
+    """
+    try:
+        start = datetime.strptime(plan_date, "%Y-%m-%d").date()
+        weekday = WEEKDAYS.index(day.split()[0].capitalize())
+    except (ValueError, TypeError, AttributeError, IndexError):
+        return None
+    weeks = re.search(r"week (\d+)", day)
+    offset = (weekday - start.weekday()) % 7 + 7 * (int(weeks.group(1)) - 1 if weeks else 0)
+    return start + timedelta(days=offset)
+
+
+def _aggregate(dated_plans, household_size, recipe_lookup):
+    """Sum scaled ingredient needs over (plan_date, plan) pairs in one pass."""
+    parsed_recipes = {}
+    totals = {}
+
+    for plan_date, plan in dated_plans:
+        for day, meal_info in plan.items():
+            recipe_name = meal_info.get("recipe")
+            if recipe_name not in parsed_recipes:
+                recipe = recipe_lookup(recipe_name) if recipe_name else None
+                parsed_recipes[recipe_name] = (
+                    recipe,
+                    [parse_ingredient(ingredient) for ingredient in recipe["ingredients"]] if recipe else []
+                )
+            recipe, ingredients = parsed_recipes[recipe_name]
+            if not recipe:
+                continue
+
+            recipe_servings = recipe.get("servings") or 1
+            servings = household_size or meal_info.get("servings") or recipe_servings
+            scale = servings / recipe_servings
+            needed_on = planned_date(plan_date, day) if plan_date else None
+            for ingredient in ingredients:
+                key = (_ingredient_key(ingredient["name"]), ingredient["dimension"])
+                entry = totals.get(key)
+                if entry is None:
+                    entry = totals[key] = {
+                        "name": ingredient["name"],
+                        "dimension": ingredient["dimension"],
+                        "base_amount": 0.0,
+                        "metric": False,
+                        "needs": {}
+                    }
+                amount = ingredient["base_amount"] * scale
+                entry["base_amount"] += amount
+                entry["metric"] = entry["metric"] or ingredient["unit"] in METRIC_UNITS
+                entry["needs"][needed_on] = entry["needs"].get(needed_on, 0.0) + amount
+
+    return totals
+
+
+def _list_entry(name, base_amount, dimension, metric):
+    quantity, unit = _display_quantity(base_amount, dimension, metric)
+    return {
+        "item": " ".join(word.capitalize() for word in name.split()),
+        "quantity": _round_quantity(quantity),
+        "unit": unit
+    }
+
+
+def _categorized(entries):
+    grocery_list = {category: [] for category in CATEGORY_ITEMS}
+    for name, item in entries:
+        grocery_list[categorize_ingredient(name)].append(item)
+    return {category: items for category, items in grocery_list.items() if items}
+
+
+def build_grocery_list(plans, household_size=None, recipe_lookup=get_recipe_by_name):
+    """
+    Aggregate a grocery list over one or more meal plans in a single pass.
+
+    Args:
+        plans (list): Meal plans, each a dict of day -> {"recipe", "servings"}
+        household_size (int): Servings to shop for per meal; defaults to each planned meal's servings
+        recipe_lookup (callable): Recipe name -> recipe dict
+
+    Returns:
+        dict: Category -> list of {"item", "quantity", "unit"}; empty categories are omitted
+    """
+    totals = _aggregate(((None, plan) for plan in plans), household_size, recipe_lookup)
+    return _categorized(
+        (entry["name"], _list_entry(entry["name"], entry["base_amount"], entry["dimension"], entry["metric"]))
+        for entry in totals.values()
+    )
+
+
+def _pantry_stock(item):
+    """Parse a pantry item into (key, dimension, base amount, expiry date)."""
+    name = item.get("name", "")
+    unit = str(item.get("unit") or "item").strip().lower()
+    if unit in UNITS:
+        _, dimension, size = UNITS[unit]
+    elif unit in ("item", "items", "each", "pc", "pcs", "piece", "pieces"):
+        dimension, size = "count", 1.0
+    else:
+        dimension, size = unit, 1.0
+    try:
+        amount = float(item.get("quantity", 0) or 0)
+    except (TypeError, ValueError):
+        amount = 0.0
+    try:
+        expires = datetime.strptime(item["expires_on"], "%Y-%m-%d").date() if item.get("expires_on") else None
+    except (TypeError, ValueError):
+        expires = None
+    return _ingredient_key(name), dimension, amount * size, expires
+
+
+def build_shopping_list(dated_plans, pantry_items, household_size=None, recipe_lookup=get_recipe_by_name):
+    """
+    Build a grocery list with pantry stock subtracted.
+
+    Needs and pantry stock are matched by normalized name and compared in
+    base units (ml, g, count). A need with no quantity is covered by any
+    stock of that item. Each pantry item's stock is drawn down as needs use
+    it, day by day and soonest-expiring first; stock that has expired by the
+    day a need falls on is skipped and the item is reported once, with the
+    first day it was wanted after expiring.
+
+    Args:
+        dated_plans (list): (plan_date "YYYY-MM-DD", plan) pairs
+        pantry_items (list): Pantry item dicts (name, quantity, unit, expires_on)
+        household_size (int): Servings to shop for per meal
+        recipe_lookup (callable): Recipe name -> recipe dict
+
+    Returns:
+        dict: "to_buy" (category -> items), "covered" (items the pantry already
+        has) and "expiring" (pantry items that expire before they're needed)
+    """
+    totals = _aggregate(dated_plans, household_size, recipe_lookup)
+
+    # key -> [item, dimension, stock left, expiry], soonest-expiring first
+    pantry_index = {}
+    for item in pantry_items:
+        key, dimension, amount, expires = _pantry_stock(item)
+        pantry_index.setdefault(key, []).append([item, dimension, amount, expires])
+    for stocks in pantry_index.values():
+        stocks.sort(key=lambda stock: (stock[3] is None, stock[3]))
+
+    to_buy = []
+    covered = []
+    expired_stock = {}  # id(stock) -> (stock, first day it was wanted after expiring)
+    for (key, dimension), entry in totals.items():
+        stocks = [stock for stock in pantry_index.get(key, ()) if dimension == "use" or stock[1] == dimension]
+        remaining = 0.0
+        for needed_on, need in sorted(entry["needs"].items(), key=lambda item: (item[0] is not None, item[0])):
+            for stock in stocks:
+                if need <= 1e-9:
+                    break
+                item, _, amount, expires = stock
+                if amount <= 0:
+                    continue
+                if expires and needed_on and expires < needed_on:
+                    first = expired_stock.get(id(stock), (stock, needed_on))[1]
+                    expired_stock[id(stock)] = (stock, min(first, needed_on))
+                    continue
+                if dimension == "use":
+                    need = 0.0
+                else:
+                    used = min(need, amount)
+                    stock[2] -= used
+                    need -= used
+            remaining += need
+
+        if remaining <= 1e-9:
+            covered.append(_list_entry(entry["name"], entry["base_amount"], dimension, entry["metric"]))
+        else:
+            to_buy.append((entry["name"], _list_entry(entry["name"], remaining, dimension, entry["metric"])))
+
+    expiring = [
+        {
+            "item": stock[0].get("name", ""),
+            "expires_on": stock[0].get("expires_on"),
+            "needed_on": needed_on.strftime("%Y-%m-%d")
+        }
+        for stock, needed_on in expired_stock.values()
+    ]
+    return {"to_buy": _categorized(to_buy), "covered": covered, "expiring": expiring}
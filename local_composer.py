@@ -0,0 +1,307 @@
+"""
+Local template-based recipe composer, used when the AI is slow or unavailable.
+
+Ingredients are sorted into roles (protein, vegetable, starch, ...), the
+cuisine's usual flavorings are mined from RECIPE_DATABASE, and a cooking
+method's instruction templates are filled in with the result. Output uses
+the same schema as ai_generator._normalize_recipe.
+"""
+
+import random
+import re
+
+from recipes import RECIPE_DATABASE
+
+ROLE_KEYWORDS = {
+    "protein": ["chicken", "beef", "pork", "turkey", "lamb", "salmon", "shrimp", "fish", "tuna", "cod",
+                "tofu", "tempeh", "chickpea", "lentil", "bean", "egg", "sausage", "bacon"],
+    "starch": ["rice", "pasta", "noodle", "spaghetti", "penne", "tortilla", "bread", "potato", "quinoa",
+               "couscous"],
+    "vegetable": ["broccoli", "pepper", "zucchini", "tomato", "lettuce", "onion", "kale", "spinach",
+                  "carrot", "mushroom", "avocado", "cauliflower", "cabbage", "peas", "corn", "eggplant",
+                  "squash", "romaine", "celery", "asparagus", "green bean"],
+    "aromatic": ["garlic", "ginger", "shallot", "scallion", "chili"],
+    "sauce": ["soy sauce", "coconut milk", "peanut butter", "broth", "stock", "wine", "salsa", "dressing",
+              "tahini", "cream", "seasoning", "curry", "vinegar", "lemon", "lime", "sauce"],
+    "fat": ["oil", "butter"],
+    "dairy": ["cheese", "parmesan", "sour cream", "yogurt", "milk"],
+    "herb": ["basil", "thyme", "parsley", "cilantro", "oregano", "rosemary", "dill", "mint"],
+}
+
+MEAT_KEYWORDS = ["chicken", "beef", "pork", "turkey", "lamb", "sausage", "bacon"]
+SEAFOOD_KEYWORDS = ["salmon", "shrimp", "fish", "tuna", "cod"]
+ANIMAL_KEYWORDS = ["egg", "cheese", "parmesan", "cream", "butter", "yogurt", "milk", "honey"]
+GLUTEN_KEYWORDS = ["pasta", "noodle", "spaghetti", "penne", "tortilla", "bread", "couscous", "soy sauce",
+                   "crouton", "flour"]
+# Plant foods named after animal ones; removed before the animal keywords are checked
+PLANT_BASED = ["peanut butter", "almond butter", "cashew butter", "sunflower butter", "apple butter",
+               "cocoa butter", "coconut milk", "almond milk", "oat milk", "soy milk", "rice milk",
+               "cashew milk", "coconut cream", "cashew cream", "coconut yogurt", "soy yogurt",
+               "vegan butter", "vegan cheese", "cream of tartar"]
+
+DEFAULT_PROTEIN = {"vegan": "chickpeas", "vegetarian": "eggs", "pescatarian": "shrimp"}
+
+METHOD_TEMPLATES = {
+    "stir-fry": {
+        "minutes": 20,
+        "steps": [
+            "Cut the {protein} into bite-sized pieces and pat dry",
+            "Heat {fat} in a wok or large pan over high heat",
+            "Add {aromatics} and stir for 30 seconds until fragrant",
+            "Add the {protein} and stir-fry until cooked through, 5-7 minutes",
+            "Add {vegetables} and stir-fry for 3-4 minutes until crisp-tender",
+            "Toss everything with {sauce} and cook 1 more minute",
+            "Serve hot{starch_serving}"
+        ]
+    },
+    "skillet": {
+        "minutes": 30,
+        "steps": [
+            "Season the {protein} with salt and pepper",
+            "Heat {fat} in a large skillet over medium-high heat",
+            "Cook the {protein} until golden, 4-5 minutes per side, then set aside",
+            "In the same pan, cook {aromatics} for 1 minute",
+            "Add {vegetables} and cook until tender, about 5 minutes",
+            "Stir in {sauce} and return the {protein} to the pan to simmer for 5 minutes",
+            "Finish with {herbs} and serve{starch_serving}"
+        ]
+    },
+    "pasta": {
+        "minutes": 25,
+        "steps": [
+            "Cook the {starch} according to package directions and reserve 1/2 cup of cooking water",
+            "Meanwhile, heat {fat} in a large pan over medium heat",
+            "Add {aromatics} and sauté for 1 minute",
+            "Add the {protein} and cook until done, about 5 minutes",
+            "Add {vegetables} and cook for 4-5 minutes",
+            "Toss in the drained {starch} with {sauce}, loosening with pasta water as needed",
+            "Finish with {herbs}{dairy_finish} and serve"
+        ]
+    },
+    "soup": {
+        "minutes": 35,
+        "steps": [
+            "Heat {fat} in a large pot over medium heat",
+            "Sauté {aromatics} until soft, about 3 minutes",
+            "Add the {protein} and {vegetables} and cook for 5 minutes",
+            "Pour in {sauce} plus enough water to cover and bring to a boil",
+            "Reduce the heat and simmer for 20 minutes",
+            "Season with salt and pepper and stir in {herbs}",
+            "Serve hot{starch_serving}"
+        ]
+    },
+    "roast": {
+        "minutes": 40,
+        "steps": [
+            "Preheat the oven to 400°F (200°C)",
+            "Toss the {protein} and {vegetables} with {fat}, {aromatics}, salt and pepper",
+            "Spread everything on a baking sheet in a single layer",
+            "Roast for 25-30 minutes, turning halfway, until golden and cooked through",
+            "Drizzle with {sauce} and return to the oven for 5 minutes",
+            "Sprinkle with {herbs}{dairy_finish}",
+            "Serve{starch_serving}"
+        ]
+    },
+}
+
+CUISINE_DEFAULTS = {
+    "italian": {"aromatic": "garlic", "sauce": "crushed tomatoes", "fat": "olive oil", "herb": "basil"},
+    "asian": {"aromatic": "garlic and ginger", "sauce": "soy sauce", "fat": "oil", "herb": "scallions"},
+    "mexican": {"aromatic": "garlic and onion", "sauce": "salsa", "fat": "oil", "herb": "cilantro"},
+    "mediterranean": {"aromatic": "garlic", "sauce": "lemon juice", "fat": "olive oil", "herb": "parsley"},
+    "indian": {"aromatic": "garlic and ginger", "sauce": "curry paste", "fat": "oil", "herb": "cilantro"},
+    "american": {"aromatic": "garlic", "sauce": "chicken broth", "fat": "butter", "herb": "thyme"},
+}
+FALLBACK_DEFAULTS = {"aromatic": "garlic", "sauce": "vegetable broth", "fat": "olive oil", "herb": "fresh herbs"}
+
+
+def _keyword_pattern(keywords):
+    """Regex finding any keyword as whole words, optionally plural ("egg" but not "eggplant")."""
+    alternatives = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})(?:e?s)?\b")
+
+
+_ROLE_ORDER = ("sauce", "protein", "starch", "dairy", "fat", "aromatic", "herb", "vegetable")
+# Every role's multi-word keywords come first, so "green beans" is a vegetable
+# and "coconut milk" a sauce before "bean" or "milk" are considered
+_ROLE_PATTERNS = [
+    (role, _keyword_pattern([k for k in ROLE_KEYWORDS[role] if (" " in k) == multi_word]))
+    for multi_word in (True, False) for role in _ROLE_ORDER
+    if any((" " in k) == multi_word for k in ROLE_KEYWORDS[role])
+]
+_MEAT = _keyword_pattern(MEAT_KEYWORDS)
+_SEAFOOD = _keyword_pattern(SEAFOOD_KEYWORDS)
+_ANIMAL = _keyword_pattern(ANIMAL_KEYWORDS)
+_GLUTEN = _keyword_pattern(GLUTEN_KEYWORDS)
+_PLANT_BASED = _keyword_pattern(PLANT_BASED)
+
+
+def _has_animal_product(name):
+    return bool(_ANIMAL.search(_PLANT_BASED.sub(" ", name)))
+
+
+def ingredient_role(ingredient):
+    """Return the role of an ingredient, or "other" if none matches."""
+    name = ingredient.lower()
+    for role, pattern in _ROLE_PATTERNS:
+        if pattern.search(name):
+            return role
+    return "other"
+
+
+def _mine_cuisine_profiles():
+    """Collect each cuisine's ingredients by role from the recipe corpus."""
+    profiles = {}
+    for recipe in RECIPE_DATABASE:
+        profile = profiles.setdefault(recipe["cuisine"].lower(), {})
+        for ingredient in recipe["ingredients"]:
+            role = ingredient_role(ingredient)
+            counts = profile.setdefault(role, {})
+            counts[ingredient] = counts.get(ingredient, 0) + 1
+    return {
+        cuisine: {role: sorted(counts, key=counts.get, reverse=True) for role, counts in profile.items()}
+        for cuisine, profile in profiles.items()
+    }
+
+
+CUISINE_PROFILES = _mine_cuisine_profiles()
+
+
+def _is_allowed(ingredient, dietary):
+    name = ingredient.lower()
+    if dietary in {"vegetarian", "vegan", "pescatarian"} and _MEAT.search(name):
+        return False
+    if dietary in {"vegetarian", "vegan"} and _SEAFOOD.search(name):
+        return False
+    if dietary == "vegan" and _has_animal_product(name):
+        return False
+    if dietary == "gluten-free" and _GLUTEN.search(name):
+        return False
+    return True
+
+
+def _join(items):
+    if not items:
+        return ""
+    if len(items) == 1:
+        return items[0]
+    return ", ".join(items[:-1]) + " and " + items[-1]
+
+
+def _choose_method(roles, cuisine, cook_time, description):
+    text = (description or "").lower()
+    if "soup" in text or "stew" in text:
+        method = "soup"
+    elif roles["starch"] and any(k in roles["starch"][0] for k in ("pasta", "noodle", "spaghetti", "penne")):
+        method = "pasta"
+    elif "roast" in text or "bake" in text or "sheet pan" in text:
+        method = "roast"
+    elif cuisine == "asian" or "stir" in text:
+        method = "stir-fry"
+    else:
+        method = "skillet"
+    # Slow methods give way to a stir-fry under a tight time limit
+    if cook_time and METHOD_TEMPLATES[method]["minutes"] > cook_time and method not in {"stir-fry", "pasta"}:
+        method = "stir-fry"
+    return method
+
+
+def compose_recipe(ingredients=None, dietary_preference=None, cuisine_type=None,
+                   cook_time=None, difficulty=None, description=None):
+    """
+    Compose a recipe locally from the user's ingredients and constraints.
+
+    Takes the same arguments as generate_recipe_with_ai and returns a dict in
+    the same normalized schema, without any network calls.
+
+    Returns:
+        dict: Recipe with name, servings, cook_time, difficulty, ingredients,
+            instructions, cuisine and dietary
+    """
+    dietary = (dietary_preference or "").strip().lower()
+    cuisine = (cuisine_type or "").strip().lower()
+    seed = "|".join([",".join(ingredients or []), dietary, cuisine, str(cook_time), description or ""])
+    rng = random.Random(seed)
+
+    user_ingredients = [i.strip().lower() for i in (ingredients or []) if i and i.strip()]
+    if description:
+        # Pick up ingredients named in a free-text description, e.g. "quick shrimp pasta"
+        text = description.lower()
+        words = set(re.findall(r"[a-z]+", text))
+        for role in ("protein", "starch", "vegetable"):
+            for keyword in ROLE_KEYWORDS[role]:
+                mentioned = keyword in text if " " in keyword else keyword in words or keyword + "s" in words
+                if mentioned and not any(_keyword_pattern([keyword]).search(i) for i in user_ingredients):
+                    user_ingredients.append(keyword)
+
+    roles = {role: [] for role in ROLE_KEYWORDS}
+    roles["other"] = []
+    for ingredient in user_ingredients:
+        if _is_allowed(ingredient, dietary):
+            roles[ingredient_role(ingredient)].append(ingredient)
+
+    # Fill gaps from what the cuisine typically uses, then from defaults
+    profile = CUISINE_PROFILES.get(cuisine, {})
+    defaults = CUISINE_DEFAULTS.get(cuisine, FALLBACK_DEFAULTS)
+    if not roles["protein"]:
+        candidates = [p for p in profile.get("protein", []) if _is_allowed(p, dietary)]
+        roles["protein"] = [candidates[0] if candidates else DEFAULT_PROTEIN.get(dietary, "chicken")]
+    if not roles["vegetable"]:
+        candidates = [v for v in profile.get("vegetable", []) if _is_allowed(v, dietary)]
+        roles["vegetable"] = candidates[:2] or ["onion", "bell pepper"]
+    for role in ("aromatic", "sauce", "fat", "herb"):
+        if not roles[role]:
+            candidates = [i for i in profile.get(role, []) if _is_allowed(i, dietary)]
+            default = defaults[role]
+            roles[role] = [candidates[0]] if candidates and rng.random() < 0.5 else [default]
+            if not _is_allowed(roles[role][0], dietary):
+                roles[role] = [FALLBACK_DEFAULTS[role]]
+
+    method = _choose_method(roles, cuisine, cook_time, description)
+    template = METHOD_TEMPLATES[method]
+    minutes = template["minutes"] if not cook_time else min(template["minutes"], cook_time)
+
+    protein = roles["protein"][0]
+    starch = roles["starch"][0] if roles["starch"] else None
+    values = {
+        "protein": protein,
+        "vegetables": _join(roles["vegetable"]),
+        "aromatics": _join(roles["aromatic"]),
+        "sauce": _join(roles["sauce"]),
+        "fat": roles["fat"][0],
+        "herbs": _join(roles["herb"]),
+        "starch": starch or "pasta",
+        "starch_serving": f" over {starch}" if starch and method != "pasta" else "",
+        "dairy_finish": f" and {_join(roles['dairy'])}" if roles["dairy"] else "",
+    }
+    instructions = [step.format(**values) for step in template["steps"]]
+
+    recipe_ingredients = []
+    for role in ("protein", "vegetable", "starch", "aromatic", "sauce", "fat", "dairy", "herb", "other"):
+        for ingredient in roles[role]:
+            if ingredient not in recipe_ingredients:
+                recipe_ingredients.append(ingredient)
+
+    dietary_tags = []
+    if not any(_MEAT.search(i) or _SEAFOOD.search(i) for i in recipe_ingredients):
+        dietary_tags.append("vegetarian")
+        if not any(_has_animal_product(i) for i in recipe_ingredients):
+            dietary_tags.append("vegan")
+    if not any(_GLUTEN.search(i) for i in recipe_ingredients):
+        dietary_tags.append("gluten-free")
+
+    name_parts = [cuisine_type.strip().title()] if cuisine_type else []
+    name_parts += [protein.title(), method.title()]
+    if roles["vegetable"]:
+        name_parts += ["with", roles["vegetable"][0].title()]
+
+    return {
+        "name": " ".join(name_parts),
+        "servings": 4,
+        "cook_time": minutes,
+        "difficulty": difficulty.strip().lower() if difficulty and difficulty.strip().lower() in {"easy", "medium", "hard"} else "easy",
+        "ingredients": recipe_ingredients,
+        "instructions": instructions,
+        "cuisine": cuisine_type.strip().title() if cuisine_type else "Custom",
+        "dietary": dietary_tags
+    }
@@ -0,0 +1,178 @@
+"""
+Meal plan optimization: choose N meals with varied cuisines and a short grocery list.
+
+The search runs in three steps so it stays interactive on large corpora:
+
+1. Candidate pool: walk the corpus in a pseudo-random order and keep up to
+   POOL_LIMIT recipes that satisfy the dietary and cook-time constraints.
+2. Greedy start: fill the tightest time budgets first, each time picking the
+   candidate with the best marginal score.
+3. Local search: try swapping single days for shortlist candidates and keep
+   any swap that improves the plan, until the time budget runs out.
+"""
+
+import random
+import time
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+POOL_LIMIT = 3000
+SHORTLIST_SIZE = 200
+SEARCH_SECONDS = 0.08
+# Local search stops early after this many swaps in a row without improvement
+MAX_STALE_SWAPS = 2000
+
+# Objective weights
+CUISINE_WEIGHT = 3.0
+INGREDIENT_WEIGHT = 1.0
+REPEAT_PENALTY = 25.0
+
+
+def day_names(count):
+    """Return names for `count` planned days, numbering weeks after the first."""
+    if count <= len(DAYS):
+        return DAYS[:count]
+    return [f"{DAYS[i % 7]} (week {i // 7 + 1})" for i in range(count)]
+
+
+def _matches_diet(recipe, dietary):
+    return dietary is None or dietary in [d.lower() for d in recipe.get("dietary", [])]
+
+
+def _ingredient_keys(recipe):
+    return frozenset(ingredient.strip().lower() for ingredient in recipe.get("ingredients", []))
+
+
+def _build_pool(recipes, dietary, max_cook_time, limit, rng):
+    """Collect up to `limit` feasible recipes, visiting the corpus in a random order."""
+    total = len(recipes)
+    if total == 0:
+        return []
+    # Stepping by a stride coprime with the length visits every index once
+    start = rng.randrange(total)
+    stride = rng.randrange(1, total) if total > 2 else 1
+    while _gcd(stride, total) != 1:
+        stride += 1
+
+    pool = []
+    index = start
+    for _ in range(total):
+        recipe = recipes[index]
+        if (max_cook_time is None or recipe["cook_time"] <= max_cook_time) and _matches_diet(recipe, dietary):
+            pool.append((recipe, _ingredient_keys(recipe), recipe.get("cuisine", "").lower()))
+            if len(pool) >= limit:
+                break
+        index = (index + stride) % total
+    return pool
+
+
+def _gcd(a, b):
+    while b:
+        a, b = b, a % b
+    return a
+
+
+def plan_score(chosen):
+    """Score a list of (recipe, ingredients, cuisine) entries; higher is better."""
+    counts = {}
+    ingredients = set()
+    for entry in chosen:
+        name = entry[0]["name"]
+        counts[name] = counts.get(name, 0) + 1
+        ingredients |= entry[1]
+    cuisines = {entry[2] for entry in chosen}
+    # Count repeated pairs so unavoidable repeats rotate instead of piling up
+    repeats = sum(count * (count - 1) // 2 for count in counts.values())
+    return CUISINE_WEIGHT * len(cuisines) - INGREDIENT_WEIGHT * len(ingredients) - REPEAT_PENALTY * repeats
+
+
+def optimize_meal_plan(recipes, days=7, dietary=None, max_cook_time=None, day_time_budgets=None,
+                       seed=None, search_seconds=SEARCH_SECONDS):
+    """
+    Choose meals for each day, maximizing cuisine variety and shared ingredients.
+
+    Args:
+        recipes (list): Recipe dicts to choose from
+        days (int): Number of days to plan
+        dietary (str): Dietary tag every meal must have
+        max_cook_time (int): Maximum cooking time for any meal
+        day_time_budgets (dict): Optional per-day cook time limits, keyed by day name
+        seed (int): Random seed for reproducible plans
+        search_seconds (float): Time allowed for local search
+
+    Returns:
+        dict: Day name -> recipe dict; days with no feasible recipe are left out
+    """
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + search_seconds
+    dietary = dietary.lower() if dietary else None
+    names = day_names(days)
+    budgets = {day: (day_time_budgets or {}).get(day) for day in names}
+
+    pool = _build_pool(recipes, dietary, max_cook_time, POOL_LIMIT, rng)
+    if not pool:
+        return {}
+
+    # Shortlist recipes built from commonly used pool ingredients, plus the
+    # quickest few of each cuisine so variety and tight days stay possible
+    frequency = {}
+    for _, ingredients, _ in pool:
+        for ingredient in ingredients:
+            frequency[ingredient] = frequency.get(ingredient, 0) + 1
+    ranked = sorted(pool, key=lambda e: sum(frequency[i] for i in e[1]) / (len(e[1]) or 1), reverse=True)
+    shortlist = ranked[:SHORTLIST_SIZE]
+    by_cuisine = {}
+    for entry in sorted(pool, key=lambda e: e[0]["cook_time"]):
+        bucket = by_cuisine.setdefault(entry[2], [])
+        if len(bucket) < 5:
+            bucket.append(entry)
+    seen = {id(entry[0]) for entry in shortlist}
+    for bucket in by_cuisine.values():
+        for entry in bucket:
+            if id(entry[0]) not in seen:
+                shortlist.append(entry)
+                seen.add(id(entry[0]))
+
+    def fits(entry, day):
+        budget = budgets[day]
+        return budget is None or entry[0]["cook_time"] <= budget
+
+    # Greedy start, tightest days first
+    plan = {}
+    for day in sorted(names, key=lambda d: budgets[d] if budgets[d] is not None else float("inf")):
+        chosen = list(plan.values())
+        best, best_score = None, None
+        for entry in shortlist:
+            if not fits(entry, day):
+                continue
+            score = plan_score(chosen + [entry])
+            if best_score is None or score > best_score:
+                best, best_score = entry, score
+        if best is None:
+            # Nothing on the shortlist fits this day's budget; search the pool
+            feasible = [entry for entry in pool if fits(entry, day)]
+            if feasible:
+                best = min(feasible, key=lambda e: e[0]["cook_time"])
+        if best is not None:
+            plan[day] = best
+
+    # Local search: single-day swaps while they improve the score
+    planned_days = list(plan)
+    current = plan_score(list(plan.values()))
+    stale = 0
+    while planned_days and stale < MAX_STALE_SWAPS and time.perf_counter() < deadline:
+        stale += 1
+        day = rng.choice(planned_days)
+        candidate = rng.choice(shortlist)
+        if candidate is plan[day] or not fits(candidate, day):
+            continue
+        previous = plan[day]
+        plan[day] = candidate
+        score = plan_score(list(plan.values()))
+        if score > current:
+            current = score
+            stale = 0
+        else:
+            plan[day] = previous
+
+    return {day: plan[day][0] for day in names if day in plan}
@@ -2,11 +2,14 @@
 Meal planning and grocery list generation
 """
 
-import json
-import os
+import bisect
 import re
-from datetime import datetime
-from recipes import RECIPE_DATABASE, filter_recipes
+from datetime import date, datetime, timedelta
+from grocery import build_grocery_list, build_shopping_list
+from meal_optimizer import optimize_meal_plan
+from persistence import JsonStore
+from plan_journal import MealPlanJournal, apply_entry
+from recipes import RECIPE_DATABASE, get_recipe_by_name
 
 
 def _normalize_ingredient_name(ingredient):
@@ -16,101 +19,127 @@ def _normalize_ingredient_name(ingredient):
     return cleaned
 
 
+def _parse_date(value):
+    """Parse a YYYY-MM-DD string, returning None for missing or invalid values."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
 def _to_title_case(text):
     return " ".join(word.capitalize() for word in text.split())
 
 
 class MealPlanner:
-    """Handle meal planning and grocery list generation."""
+    """
+    Handle meal planning and grocery list generation.
+    
+    meal_plan holds recent plans only; changes are appended to a journal
+    and older plans are moved to an archive when the journal is compacted.
+    """
     
     def __init__(self, filename="meal_plans.json"):
         self.filename = filename
+        self.journal = MealPlanJournal(filename)
         self.meal_plan = self.load_meal_plan()
     
     def load_meal_plan(self):
-        """Load existing meal plan from file."""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return {}
-        return {}
+        """Load recent meal plans from the snapshot and journal."""
+        return self.journal.load()
     
     def save_meal_plan(self):
-        """Save meal plan to file."""
-        with open(self.filename, 'w') as f:
-            json.dump(self.meal_plan, f, indent=2)
+        """Compact the journal into a new snapshot, archiving old plans."""
+        self.journal.compact(self.meal_plan)
+    
+    def changed_on_disk(self):
+        """True if another process changed the plan files since they were loaded."""
+        return self.journal.changed_on_disk()
+    
+    def _record(self, entry):
+        """Apply a change in memory and append it to the journal."""
+        apply_entry(self.meal_plan, entry)
+        self.journal.append(entry)
+        if self.journal.needs_compaction():
+            self.save_meal_plan()
     
-    def create_weekly_plan(self, dietary_preference=None, max_cook_time=None):
+    def get_plans(self, plan_dates):
+        """
+        Return saved plans for the given dates, reading the archive only for
+        dates that are no longer recent.
+        
+        Returns:
+            list: (date, plan) pairs in the order given
+        """
+        missing = [date for date in plan_dates if date not in self.meal_plan]
+        archived = self.journal.load_archive(missing) if missing else {}
+        plans = []
+        for date in plan_dates:
+            plan = self.meal_plan.get(date, archived.get(date))
+            if plan is not None:
+                plans.append((date, plan))
+        return plans
+    
+    def create_weekly_plan(self, dietary_preference=None, max_cook_time=None, days=7, day_time_budgets=None,
+                           recipes=None):
         """
         Create a balanced weekly meal plan.
         
+        Meals are chosen to vary cuisines and share ingredients, so the
+        grocery list stays short.
+        
         Args:
             dietary_preference (str): Dietary restriction to consider
             max_cook_time (int): Maximum cooking time per meal
+            days (int): Number of days to plan
+            day_time_budgets (dict): Optional cook time limit per day name
+            recipes (list): Recipes to choose from; the built-in database if None
             
         Returns:
-            dict: Weekly meal plan with recipes for each day
+            dict: Weekly meal plan with recipes for each day; empty if no recipe fits
         """
-        # Filter recipes based on preferences
-        available_recipes = filter_recipes(
-            cook_time=max_cook_time,
-            dietary=dietary_preference
+        chosen = optimize_meal_plan(
+            RECIPE_DATABASE if recipes is None else recipes,
+            days=days,
+            dietary=dietary_preference,
+            max_cook_time=max_cook_time,
+            day_time_budgets=day_time_budgets
         )
+        if not chosen:
+            return {}
         
-        if len(available_recipes) < 7:
-            available_recipes = RECIPE_DATABASE  # Fall back to all recipes
-        
-        # Create a balanced plan - try to vary cuisines
         week_plan = {}
-        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        used_recipes = set()
-        
-        for day in days:
-            # Try to pick recipes with different cuisines
-            available_for_day = [r for r in available_recipes if r["name"] not in used_recipes]
-            
-            if not available_for_day:
-                available_for_day = available_recipes  # Reset if we run out
-                used_recipes.clear()
-            
-            # Pick a recipe
-            recipe = available_for_day[len(used_recipes) % len(available_for_day)]
+        for day, recipe in chosen.items():
             week_plan[day] = {
                 "recipe": recipe["name"],
                 "cook_time": recipe["cook_time"],
                 "servings": recipe["servings"]
             }
-            used_recipes.add(recipe["name"])
         
         # Save the plan
         plan_date = datetime.now().strftime("%Y-%m-%d")
-        self.meal_plan[plan_date] = week_plan
-        self.save_meal_plan()
+        self._record({"op": "set_plan", "date": plan_date, "plan": week_plan})
         
         return week_plan
     
     def add_meal_to_plan(self, day, recipe_name):
         """Add a specific meal to a specific day."""
         plan_date = datetime.now().strftime("%Y-%m-%d")
-        if plan_date not in self.meal_plan:
-            self.meal_plan[plan_date] = {}
-        
-        # Find the recipe
-        recipe = None
-        for r in RECIPE_DATABASE:
-            if r["name"].lower() == recipe_name.lower():
-                recipe = r
-                break
+        recipe = get_recipe_by_name(recipe_name)
         
         if recipe:
-            self.meal_plan[plan_date][day] = {
-                "recipe": recipe["name"],
-                "cook_time": recipe["cook_time"],
-                "servings": recipe["servings"]
-            }
-            self.save_meal_plan()
+            self._record({
+                "op": "set_day",
+                "date": plan_date,
+                "day": day,
+                "meal": {
+                    "recipe": recipe["name"],
+                    "cook_time": recipe["cook_time"],
+                    "servings": recipe["servings"]
+                }
+            })
             return True
         return False
     
@@ -119,12 +148,13 @@ class MealPlanner:
         plan_date = datetime.now().strftime("%Y-%m-%d")
         return self.meal_plan.get(plan_date, {})
     
-    def generate_grocery_list(self, week_plan=None):
+    def generate_grocery_list(self, week_plan=None, household_size=None):
         """
         Generate a grocery list from the meal plan.
         
         Args:
             week_plan (dict): Meal plan to generate list from
+            household_size (int): Servings to shop for per meal
             
         Returns:
             dict: Organized grocery list by category
@@ -135,111 +165,176 @@ class MealPlanner:
         if not week_plan:
             return {}
         
-        # Collect and count all ingredients across planned meals
-        ingredient_counts = {}
-        for day, meal_info in week_plan.items():
-            recipe_name = meal_info["recipe"]
-            # Find the recipe in database
-            for recipe in RECIPE_DATABASE:
-                if recipe["name"] == recipe_name:
-                    for ingredient in recipe["ingredients"]:
-                        key = _normalize_ingredient_name(ingredient)
-                        if key not in ingredient_counts:
-                            ingredient_counts[key] = {
-                                "item": _to_title_case(key),
-                                "quantity": 0,
-                                "unit": "recipe-use"
-                            }
-                        ingredient_counts[key]["quantity"] += 1
-                    break
-        
-        # Categorize ingredients (simple categorization)
-        categories = {
-            "Proteins": ["chicken", "beef", "salmon", "shrimp", "ground beef", "chickpeas"],
-            "Vegetables": ["broccoli", "bell pepper", "zucchini", "tomato", "lettuce", "onion", 
-                          "kale", "sweet potato", "tomatoes", "romaine lettuce", "avocado"],
-            "Grains & Pasta": ["rice", "pasta", "tortillas"],
-            "Dairy": ["cheese", "butter", "cream", "sour cream", "parmesan"],
-            "Pantry": ["soy sauce", "garlic", "ginger", "oil", "olive oil", "taco seasoning",
-                      "chicken broth", "vegetable broth", "tahini", "caesar dressing"],
-            "Herbs & Seasonings": ["thyme", "basil", "parsley"],
-            "Other": []
-        }
-        
-        grocery_list = {cat: [] for cat in categories.keys()}
-        
-        for normalized_ingredient, ingredient_data in ingredient_counts.items():
-            categorized = False
-            for category, items in categories.items():
-                if category != "Other" and normalized_ingredient in items:
-                    grocery_list[category].append(ingredient_data)
-                    categorized = True
-                    break
-            if not categorized:
-                grocery_list["Other"].append(ingredient_data)
+        return build_grocery_list([week_plan], household_size=household_size)
+    
+    def generate_combined_grocery_list(self, plan_dates=None, household_size=None):
+        """
+        Generate one grocery list covering several saved plans, e.g. a month.
         
-        # Remove empty categories
-        grocery_list = {k: v for k, v in grocery_list.items() if v}
+        Args:
+            plan_dates (list): Plan dates (YYYY-MM-DD) to include, archived ones too; all recent plans if None
+            household_size (int): Servings to shop for per meal
+            
+        Returns:
+            dict: Organized grocery list by category
+        """
+        if plan_dates is None:
+            plans = list(self.meal_plan.values())
+        else:
+            plans = [plan for _, plan in self.get_plans(plan_dates)]
+        return build_grocery_list(plans, household_size=household_size)
+    
+    def generate_shopping_list(self, pantry, plan_dates=None, household_size=None):
+        """
+        Generate a grocery list minus what the pantry already holds.
         
-        return grocery_list
+        Args:
+            pantry (PantryManager): Pantry to subtract
+            plan_dates (list): Plan dates (YYYY-MM-DD) to include; today's plan if None
+            household_size (int): Servings to shop for per meal
+            
+        Returns:
+            dict: "to_buy" by category, "covered" items and "expiring" pantry warnings
+        """
+        if plan_dates is None:
+            plan_dates = [datetime.now().strftime("%Y-%m-%d")]
+        dated_plans = self.get_plans(plan_dates)
+        return build_shopping_list(dated_plans, pantry.get_all_items(), household_size=household_size)
 
 
 class PantryManager:
-    """Manage pantry inventory with quantities and expiry dates."""
+    """
+    Manage pantry inventory with quantities and expiry dates.
+
+    Items are indexed by normalized name, and dated items are also kept in
+    a list sorted by expiry, so upserts are O(1) lookups and expiry queries
+    only touch the items they return. Expiry dates are parsed once.
+    """
 
     def __init__(self, filename="pantry_inventory.json"):
         self.filename = filename
-        self.items = self.load_items()
+        self.store = JsonStore(filename, lambda: self.items)
+        self._index = {}
+        self._expiry_dates = {}
+        self._expiry_order = []
+        for item in self.load_items():
+            self._load_item(item)
+        self._expiry_order.sort()
+
+    @property
+    def items(self):
+        """Pantry items as a list, in insertion order."""
+        return list(self._index.values())
 
     def load_items(self):
         """Load pantry items from file."""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return []
-        return []
+        return self.store.load(list)
 
     def save_items(self):
-        """Save pantry items to file."""
-        with open(self.filename, 'w') as f:
-            json.dump(self.items, f, indent=2)
+        """Schedule a save of pantry items."""
+        self.store.mark_dirty()
 
-    def add_item(self, name, quantity=1, unit="item", expires_on=None):
-        """Add or update a pantry item."""
+    def changed_on_disk(self):
+        """True if another process rewrote the pantry file since it was loaded."""
+        return self.store.changed_on_disk()
+
+    def _load_item(self, item):
+        key = _normalize_ingredient_name(item.get("name", ""))
+        existing = self._index.get(key)
+        if existing is not None:
+            # Merge duplicate entries left by older versions of the file
+            existing["quantity"] = existing.get("quantity", 0) + item.get("quantity", 0)
+            return
+        self._index[key] = item
+        expires_date = _parse_date(item.get("expires_on"))
+        if expires_date is not None:
+            # Appended unsorted; __init__ sorts once after loading
+            self._expiry_dates[key] = expires_date
+            self._expiry_order.append((expires_date, key))
+
+    def _set_expiry(self, key, expires_on):
+        """Update the sorted expiry index for one item."""
+        old_date = self._expiry_dates.pop(key, None)
+        if old_date is not None:
+            position = bisect.bisect_left(self._expiry_order, (old_date, key))
+            del self._expiry_order[position]
+
+        expires_date = _parse_date(expires_on)
+        if expires_date is None:
+            return
+        self._expiry_dates[key] = expires_date
+        bisect.insort(self._expiry_order, (expires_date, key))
+
+    def _upsert(self, name, quantity, unit, expires_on):
+        """Add or update one item in memory; returns True if it was new."""
         normalized_name = _normalize_ingredient_name(name)
-        for item in self.items:
-            if _normalize_ingredient_name(item.get("name", "")) == normalized_name:
-                item["quantity"] = item.get("quantity", 0) + quantity
-                item["unit"] = unit or item.get("unit", "item")
-                if expires_on:
-                    item["expires_on"] = expires_on
-                self.save_items()
-                return True
-
-        self.items.append({
+        item = self._index.get(normalized_name)
+        if item is not None:
+            item["quantity"] = item.get("quantity", 0) + quantity
+            item["unit"] = unit or item.get("unit", "item")
+            if expires_on:
+                item["expires_on"] = expires_on
+                self._set_expiry(normalized_name, expires_on)
+            return False
+
+        self._index[normalized_name] = {
             "name": _to_title_case(normalized_name),
             "quantity": quantity,
             "unit": unit or "item",
             "expires_on": expires_on,
             "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
+        }
+        self._set_expiry(normalized_name, expires_on)
+        return True
+
+    def add_item(self, name, quantity=1, unit="item", expires_on=None):
+        """Add or update a pantry item."""
+        with self.store.lock:
+            self._upsert(name, quantity, unit, expires_on)
         self.save_items()
         return True
 
+    def add_items(self, items):
+        """
+        Add or update many pantry items with a single save.
+
+        Args:
+            items (iterable): Dicts with name and optional quantity, unit, expires_on
+
+        Returns:
+            dict: Counts of added, updated and skipped (nameless) items
+        """
+        counts = {"added": 0, "updated": 0, "skipped": 0}
+        for item in items:
+            name = (item.get("name") or "").strip()
+            if not name:
+                counts["skipped"] += 1
+                continue
+            with self.store.lock:
+                is_new = self._upsert(
+                    name,
+                    item.get("quantity", 1),
+                    item.get("unit") or "item",
+                    item.get("expires_on") or None
+                )
+            counts["added" if is_new else "updated"] += 1
+        if counts["added"] or counts["updated"]:
+            self.save_items()
+        return counts
+
     def remove_item(self, name):
         """Remove a pantry item by name."""
         normalized_name = _normalize_ingredient_name(name)
-        before = len(self.items)
-        self.items = [
-            item for item in self.items
-            if _normalize_ingredient_name(item.get("name", "")) != normalized_name
-        ]
-        changed = len(self.items) < before
-        if changed:
-            self.save_items()
-        return changed
+        with self.store.lock:
+            if self._index.pop(normalized_name, None) is None:
+                return False
+            self._set_expiry(normalized_name, None)
+        self.save_items()
+        return True
+
+    def get_item(self, name):
+        """Return the pantry item with this name, or None."""
+        return self._index.get(_normalize_ingredient_name(name))
 
     def get_all_items(self):
         """Return pantry items."""
@@ -247,28 +342,20 @@ class PantryManager:
 
     def get_pantry_ingredients(self):
         """Return normalized pantry ingredient names for matching."""
-        return [_normalize_ingredient_name(item.get("name", "")) for item in self.items]
+        return list(self._index)
 
     def get_expiring_items(self, within_days=3):
-        """Return pantry items that expire within N days."""
-        expiring = []
+        """Return pantry items that expire within N days, soonest first."""
         today = datetime.now().date()
-        for item in self.items:
-            expires_on = item.get("expires_on")
-            if not expires_on:
-                continue
-            try:
-                expires_date = datetime.strptime(expires_on, "%Y-%m-%d").date()
-            except ValueError:
-                continue
-
-            days_left = (expires_date - today).days
-            if days_left <= within_days:
-                item_with_days = dict(item)
-                item_with_days["days_left"] = days_left
-                expiring.append(item_with_days)
+        cutoff = today + timedelta(days=within_days)
+        # (date,) sorts before every (date, key), whatever characters the key holds
+        end = bisect.bisect_left(self._expiry_order, (cutoff + timedelta(days=1),))
 
-        expiring.sort(key=lambda entry: entry.get("days_left", 9999))
+        expiring = []
+        for expires_date, key in self._expiry_order[:end]:
+            item_with_days = dict(self._index[key])
+            item_with_days["days_left"] = (expires_date - today).days
+            expiring.append(item_with_days)
         return expiring
 
 
@@ -277,33 +364,32 @@ class SavedRecipes:
     
     def __init__(self, filename="saved_recipes.json"):
         self.filename = filename
+        self.store = JsonStore(filename, lambda: self.saved)
         self.saved = self.load_saved()
+        # Names of saved recipes, so duplicate checks don't scan the list
+        self._names = {r.get("name") for r in self.saved}
     
     def load_saved(self):
         """Load saved recipes from file."""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return []
-        return []
+        return self.store.load(list)
     
     def save_to_file(self):
-        """Save recipes to file."""
-        with open(self.filename, 'w') as f:
-            json.dump(self.saved, f, indent=2)
+        """Schedule a save of saved recipes."""
+        self.store.mark_dirty()
+    
+    def changed_on_disk(self):
+        """True if another process rewrote the favorites file since it was loaded."""
+        return self.store.changed_on_disk()
     
     def add_recipe(self, recipe):
         """Add a recipe to saved favorites."""
-        # Check if already saved
-        for saved_recipe in self.saved:
-            if saved_recipe.get("name") == recipe.get("name"):
-                return False  # Already saved
+        if recipe.get("name") in self._names:
+            return False  # Already saved
         
         # Add timestamp
         recipe["saved_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         self.saved.append(recipe)
+        self._names.add(recipe.get("name"))
         self.save_to_file()
         return True
     
@@ -313,6 +399,7 @@ class SavedRecipes:
         self.saved = [r for r in self.saved if r.get("name") != recipe_name]
         
         if len(self.saved) < initial_length:
+            self._names.discard(recipe_name)
             self.save_to_file()
             return True
         return False
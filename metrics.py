@@ -0,0 +1,164 @@
+"""
+Metrics for model calls: latency, tokens, retries, parse success and cost.
+
+Every call produces one event dict that is handed to each registered sink.
+A sink is any object with a record(event) method.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+# USD per 1K tokens as (prompt, completion)
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4-turbo": (0.01, 0.03),
+}
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Estimate the USD cost of a call from its token counts."""
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile (0-100) of values using nearest rank."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = min(len(ordered), max(1, math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+class InMemoryMetrics:
+    """Aggregate call events per operation, keeping a window for percentiles."""
+
+    def __init__(self, window=10000):
+        self.window = window
+        self.lock = threading.Lock()
+        self.operations = {}
+        self.model_wall_times = {}
+
+    def _bucket(self, operation):
+        if operation not in self.operations:
+            self.operations[operation] = {
+                "calls": 0,
+                "errors": 0,
+                "retried_calls": 0,
+                "parse_attempts": 0,
+                "parse_failures": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cost": 0.0,
+                "wall_times": deque(maxlen=self.window),
+                "ttfts": deque(maxlen=self.window),
+            }
+        return self.operations[operation]
+
+    def record(self, event):
+        with self.lock:
+            bucket = self._bucket(event.get("operation", "chat"))
+            bucket["calls"] += 1
+            if event.get("error"):
+                bucket["errors"] += 1
+            if event.get("attempt", 1) > 1:
+                bucket["retried_calls"] += 1
+            if event.get("parse_ok") is not None:
+                bucket["parse_attempts"] += 1
+                if not event["parse_ok"]:
+                    bucket["parse_failures"] += 1
+            bucket["prompt_tokens"] += event.get("prompt_tokens") or 0
+            bucket["completion_tokens"] += event.get("completion_tokens") or 0
+            bucket["cost"] += event.get("cost") or 0.0
+            if event.get("wall_time") is not None:
+                bucket["wall_times"].append(event["wall_time"])
+                key = (event.get("operation", "chat"), event.get("model"))
+                if key not in self.model_wall_times:
+                    self.model_wall_times[key] = deque(maxlen=self.window)
+                self.model_wall_times[key].append(event["wall_time"])
+            if event.get("ttft") is not None:
+                bucket["ttfts"].append(event["ttft"])
+
+    def p95_latency(self, operation, model=None, min_samples=1):
+        """Return p95 wall time in seconds for an operation (optionally one model), or None."""
+        with self.lock:
+            if model is None:
+                bucket = self.operations.get(operation)
+                samples = list(bucket["wall_times"]) if bucket else []
+            else:
+                samples = list(self.model_wall_times.get((operation, model), []))
+        if len(samples) < min_samples:
+            return None
+        return percentile(samples, 95)
+
+    def summary(self):
+        """Return per-operation totals, rates and latency percentiles."""
+        with self.lock:
+            result = {}
+            for operation, bucket in self.operations.items():
+                wall_times = list(bucket["wall_times"])
+                ttfts = list(bucket["ttfts"])
+                calls = bucket["calls"]
+                result[operation] = {
+                    "calls": calls,
+                    "errors": bucket["errors"],
+                    "retry_rate": bucket["retried_calls"] / calls if calls else 0.0,
+                    "parse_failure_rate": (
+                        bucket["parse_failures"] / bucket["parse_attempts"]
+                        if bucket["parse_attempts"] else None
+                    ),
+                    "p50_latency": percentile(wall_times, 50),
+                    "p95_latency": percentile(wall_times, 95),
+                    "p95_ttft": percentile(ttfts, 95),
+                    "prompt_tokens": bucket["prompt_tokens"],
+                    "completion_tokens": bucket["completion_tokens"],
+                    "cost": round(bucket["cost"], 6),
+                }
+            return result
+
+
+class JsonlMetricsSink:
+    """Append every call event as one JSON line."""
+
+    def __init__(self, filename="ai_metrics.jsonl"):
+        self.filename = filename
+        self.lock = threading.Lock()
+
+    def record(self, event):
+        line = json.dumps(event, separators=(",", ":"))
+        with self.lock:
+            with open(self.filename, 'a') as f:
+                f.write(line + "\n")
+
+
+aggregator = InMemoryMetrics()
+_sinks = [aggregator]
+if os.getenv("AI_CHEF_METRICS_FILE"):
+    _sinks.append(JsonlMetricsSink(os.getenv("AI_CHEF_METRICS_FILE")))
+
+
+def add_sink(sink):
+    """Register a sink to receive call events."""
+    _sinks.append(sink)
+
+
+def remove_sink(sink):
+    """Stop sending events to a sink."""
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def record(event):
+    """Send an event to every sink. Sink failures never affect the caller."""
+    event.setdefault("timestamp", time.time())
+    for sink in list(_sinks):
+        try:
+            sink.record(event)
+        except Exception:
+            pass
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Bulk pantry import from CSV, JSON or receipt-style text.
+
+Files are parsed as a stream of item dicts and handed to
+PantryManager.add_items, which merges duplicates in memory and writes the
+pantry file once:
+
+    python pantry_import.py inventory.csv
+    python pantry_import.py receipt.txt --format receipt
+
+CSV files need a header with a name column; quantity, unit and expiry
+columns are optional. JSON files may hold an array of objects or one
+object per line.
+"""
+
+import argparse
+import csv
+import json
+import re
+import sys
+
+from grocery import UNITS
+from meal_planner import PantryManager
+
+FORMATS = ("csv", "json", "receipt")
+
+# Column names accepted for each item field in CSV headers
+CSV_COLUMNS = {
+    "name": ("name", "item", "ingredient", "product"),
+    "quantity": ("quantity", "qty", "amount", "count"),
+    "unit": ("unit", "units", "uom"),
+    "expires_on": ("expires_on", "expiry", "expires", "expiry_date", "best_before"),
+}
+
+# Receipt lines that are not purchases
+RECEIPT_SKIP = re.compile(
+    r"^\s*(sub\s*total|total|tax|vat|cash|change|card|visa|mastercard|amex|debit|credit|balance|"
+    r"savings|discount|thank|receipt|store|tel|date|time)\b",
+    re.IGNORECASE
+)
+_PRICE = re.compile(r"\s+[$£€]?\d+[.,]\d{2}\s*[A-Z]?$")
+_LEADING_COUNT = re.compile(r"^(?P<quantity>\d+(?:\.\d+)?)\s*(?:x\s+|@\s+|\s)(?P<rest>.+)$", re.IGNORECASE)
+_TRAILING_AMOUNT = re.compile(
+    r"^(?P<rest>.+?)\s+(?P<quantity>\d+(?:\.\d+)?)\s*(?P<unit>[a-z]+)?\.?$", re.IGNORECASE
+)
+
+
+def _number(value, default=1):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return int(number) if number == int(number) else number
+
+
+def _text(value):
+    """A JSON field as a string, or None if it isn't one."""
+    return value if isinstance(value, str) else None
+
+
+def iter_csv_items(f):
+    """Stream item dicts from a CSV file object with a header row."""
+    reader = csv.DictReader(f)
+    headers = {(header or "").strip().lower(): header for header in reader.fieldnames or []}
+    columns = {
+        field: next((headers[name] for name in names if name in headers), None)
+        for field, names in CSV_COLUMNS.items()
+    }
+    for row in reader:
+        yield {
+            "name": (row.get(columns["name"]) or "") if columns["name"] else "",
+            "quantity": _number(row.get(columns["quantity"])) if columns["quantity"] else 1,
+            "unit": (row.get(columns["unit"]) or "").strip() if columns["unit"] else None,
+            "expires_on": (row.get(columns["expires_on"]) or "").strip() if columns["expires_on"] else None,
+        }
+
+
+def iter_json_items(f):
+    """Stream item dicts from a JSON array or JSON-lines file object."""
+    first = f.read(1)
+    while first and first.isspace():
+        first = f.read(1)
+    if first == "[":
+        records = json.loads(first + f.read())
+    else:
+        records = (json.loads(line) for line in _prepend(first, f) if line.strip())
+    for record in records:
+        if not isinstance(record, dict):
+            # Nameless, so the pantry counts it as skipped
+            yield {"name": ""}
+            continue
+        yield {
+            "name": _text(record.get("name")) or "",
+            "quantity": _number(record.get("quantity", 1)),
+            "unit": _text(record.get("unit")),
+            "expires_on": _text(record.get("expires_on")) or _text(record.get("expiry")),
+        }
+
+
+def _prepend(first, f):
+    """Yield lines of f with an already-read first character put back."""
+    lines = iter(f)
+    line = next(lines, "")
+    yield first + line
+    yield from lines
+
+
+def parse_receipt_line(line):
+    """
+    Parse one receipt line such as "2 x Milk 1L  3.49" or "BANANAS 1.2 kg".
+
+    Returns:
+        dict: Item dict, or None for non-item lines (totals, payment, headers)
+    """
+    text = line.strip()
+    if not text or RECEIPT_SKIP.match(text):
+        return None
+    text = _PRICE.sub("", text).strip()
+    if not re.search(r"[a-zA-Z]{2}", text):
+        return None
+
+    quantity, unit = 1, "item"
+    leading = _LEADING_COUNT.match(text)
+    if leading:
+        quantity = _number(leading.group("quantity"))
+        text = leading.group("rest")
+
+    trailing = _TRAILING_AMOUNT.match(text)
+    if trailing and (trailing.group("unit") or "").lower() in UNITS:
+        # A size on the line ("Milk 1L") describes the pack; keep it if there was no count
+        if not leading:
+            quantity = _number(trailing.group("quantity"))
+            unit = UNITS[trailing.group("unit").lower()][0]
+        text = trailing.group("rest")
+    elif trailing and not trailing.group("unit") and not leading:
+        quantity = _number(trailing.group("quantity"))
+        text = trailing.group("rest")
+
+    name = " ".join(text.split())
+    if not name:
+        return None
+    return {"name": name, "quantity": quantity, "unit": unit, "expires_on": None}
+
+
+def iter_receipt_items(f):
+    """Stream item dicts from receipt-style text, one purchase per line."""
+    for line in f:
+        item = parse_receipt_line(line)
+        if item:
+            yield item
+
+
+PARSERS = {
+    "csv": iter_csv_items,
+    "json": iter_json_items,
+    "receipt": iter_receipt_items,
+}
+
+
+def detect_format(filename):
+    """Guess the import format from a file extension."""
+    lowered = filename.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith((".json", ".jsonl")):
+        return "json"
+    return "receipt"
+
+
+def import_pantry_file(filename, pantry=None, file_format=None):
+    """
+    Import a pantry file, saving the pantry once at the end.
+
+    Args:
+        filename (str): File to import
+        pantry (PantryManager): Pantry to update; the default pantry file if None
+        file_format (str): "csv", "json" or "receipt"; guessed from the extension if None
+
+    Returns:
+        dict: Counts of added, updated and skipped items
+    """
+    pantry = pantry or PantryManager()
+    parse = PARSERS[file_format or detect_format(filename)]
+    with open(filename, 'r', newline='') as f:
+        return pantry.add_items(parse(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import pantry items from a CSV, JSON or receipt file")
+    parser.add_argument("input", help="File to import")
+    parser.add_argument("--format", choices=FORMATS, help="Input format (default: from file extension)")
+    parser.add_argument("--pantry", default="pantry_inventory.json", help="Pantry file to update")
+    args = parser.parse_args()
+
+    try:
+        counts = import_pantry_file(args.input, PantryManager(args.pantry), args.format)
+    except (IOError, ValueError, csv.Error) as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    main()
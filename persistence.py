@@ -0,0 +1,333 @@
+"""
+Shared JSON persistence for AI Chef's local stores.
+
+Stores call mark_dirty() after changing their data instead of writing the
+file themselves. The first change starts a short timer; every change made
+before it fires is folded into one write. Writes go to a temp file that is
+fsynced and renamed over the original, so a crash leaves either the old
+or the new file, never a torn one. Pending writes are flushed at exit.
+
+The timer serializes the data on its own thread while holding the
+store's lock, so an owner that changes its data in several steps does so
+under `with store.lock:` to keep a half-made change out of the file.
+
+Set AI_CHEF_SAVE_DELAY to change the delay in seconds; 0 writes on every
+change.
+"""
+
+import atexit
+import itertools
+import json
+import os
+import threading
+import weakref
+
+DEFAULT_SAVE_DELAY = 1.0
+
+_stores = weakref.WeakSet()
+
+# Makes temp names unique when two stores in one process write the same file
+_temp_ids = itertools.count()
+
+
+def save_delay():
+    """Configured write-behind delay in seconds."""
+    try:
+        return max(0.0, float(os.getenv("AI_CHEF_SAVE_DELAY", DEFAULT_SAVE_DELAY)))
+    except ValueError:
+        return DEFAULT_SAVE_DELAY
+
+
+def _dumps(data):
+    return json.dumps(data, separators=(",", ":"))
+
+
+def _write_temp(filename, text):
+    """Write serialized JSON next to filename and fsync it; returns the temp path."""
+    temp_file = f"{filename}.{os.getpid()}.{next(_temp_ids)}.tmp"
+    try:
+        with open(temp_file, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    return temp_file
+
+
+def write_json_atomic(filename, data):
+    """Write compact JSON to filename via a temp file and rename."""
+    os.replace(_write_temp(filename, _dumps(data)), filename)
+
+
+def _append_at(filename, offset, text):
+    """Write text at offset, dropping anything after it; repeating it gives the same file."""
+    with open(filename, 'a+b') as f:
+        f.truncate(offset)
+        f.write(text.encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_files_atomic(files, intent_file, appends=None):
+    """
+    Replace several JSON files, and append to logs, so that either all or
+    none of them change.
+
+    New contents are written to temp files first. The list of renames and
+    appends is then committed to an intent file (itself written atomically)
+    before any file is touched, so recover_intent() can finish them after a
+    crash. Without an intent file, leftover temp files are never used.
+
+    Args:
+        files (dict): Filename -> data
+        intent_file (str): Path of the intent file
+        appends (dict): Log filename -> (offset, text) to write at that offset
+    """
+    renames = []
+    try:
+        for filename, data in files.items():
+            renames.append([_write_temp(filename, _dumps(data)), filename])
+    except BaseException:
+        for temp_file, _ in renames:
+            os.remove(temp_file)
+        raise
+
+    appends = [[filename, offset, text] for filename, (offset, text) in (appends or {}).items()]
+    write_json_atomic(intent_file, {"renames": renames, "appends": appends})
+    for temp_file, filename in renames:
+        os.replace(temp_file, filename)
+    for filename, offset, text in appends:
+        _append_at(filename, offset, text)
+    os.remove(intent_file)
+
+
+def recover_intent(intent_file):
+    """
+    Finish a multi-file commit interrupted by a crash.
+
+    Returns:
+        bool: True if an interrupted commit was completed
+    """
+    if not os.path.exists(intent_file):
+        return False
+    try:
+        with open(intent_file, 'r') as f:
+            intent = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        intent = {}
+    if isinstance(intent, list):
+        # Written before commits could append to logs
+        intent = {"renames": intent}
+    for temp_file, filename in intent.get("renames", []):
+        if os.path.exists(temp_file):
+            os.replace(temp_file, filename)
+    for filename, offset, text in intent.get("appends", []):
+        _append_at(filename, offset, text)
+    os.remove(intent_file)
+    return True
+
+
+def file_signature(filename):
+    """(mtime, size) of a file, or None if it is missing; changes when the file is rewritten."""
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_json(filename, default):
+    """
+    Load JSON from filename, or return default() if it is missing.
+
+    An unreadable file is kept as <filename>.corrupt instead of being
+    overwritten by the next save.
+    """
+    if not os.path.exists(filename):
+        return default()
+    try:
+        with open(filename, 'r') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        os.replace(filename, filename + ".corrupt")
+        return default()
+    except IOError:
+        return default()
+
+
+class JsonStore:
+    """Debounced, atomic write-behind persistence for one JSON file."""
+
+    def __init__(self, filename, snapshot, restore=None, delay=None):
+        """
+        Args:
+            filename (str): File to persist to
+            snapshot (callable): Returns the current JSON-serializable data
+            restore (callable): Replaces the owner's data with loaded JSON; needed for rollback
+            delay (float): Seconds to wait before writing; AI_CHEF_SAVE_DELAY if None
+        """
+        self.filename = filename
+        self.snapshot = snapshot
+        self.restore = restore
+        self.delay = save_delay() if delay is None else delay
+        self.dirty = False
+        self.timer = None
+        # Held while the data is serialized; reentrant so owners can mark_dirty under it
+        self.lock = threading.RLock()
+        # Serializations are numbered so an older one never lands after a newer one
+        self.write_lock = threading.Lock()
+        self.serialized = 0
+        self.written = 0
+        self.in_transaction = False
+        self.before = None
+        # Signature of the file as last loaded or written by this store
+        self.signature = None
+        _stores.add(self)
+
+    def load(self, default):
+        """Load the file, or default() if it is missing or unreadable."""
+        # Taken before reading, so a write racing the load is seen as a change
+        self.signature = file_signature(self.filename)
+        return load_json(self.filename, default)
+
+    def changed_on_disk(self):
+        """
+        True if another process replaced the file since this store loaded or
+        wrote it. Never true while changes are pending, so a reload can't
+        drop them.
+        """
+        return not self.dirty and file_signature(self.filename) != self.signature
+
+    def mark_dirty(self):
+        """Note a change; it is written after the delay together with any others."""
+        if self.in_transaction:
+            # Written by the unit of work's commit
+            self.dirty = True
+            return
+        if self.delay == 0:
+            with self.lock:
+                self.dirty = True
+            self.flush()
+            return
+        with self.lock:
+            self.dirty = True
+            if self.timer is None:
+                self.timer = threading.Timer(self.delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        """Write pending changes now."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.dirty or self.in_transaction:
+                return
+            # Cleared before writing so a change made meanwhile marks it again
+            self.dirty = False
+            try:
+                text = _dumps(self.snapshot())
+            except Exception:
+                self.dirty = True
+                raise
+            self.serialized += 1
+            number = self.serialized
+
+        # The disk write happens outside self.lock so owners aren't blocked by it
+        with self.write_lock:
+            if number < self.written:
+                return
+            try:
+                os.replace(_write_temp(self.filename, text), self.filename)
+            except Exception:
+                self.dirty = True
+                raise
+            self.written = number
+            self.signature = file_signature(self.filename)
+
+    def begin(self):
+        """Start deferring writes to a unit of work, remembering the current data."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            self.in_transaction = True
+            self.before = (json.dumps(self.snapshot()), self.dirty) if self.restore else None
+
+    def end(self, committed):
+        """Finish a unit of work: clear the dirty flag, or roll the data back."""
+        with self.lock:
+            self.in_transaction = False
+            if committed:
+                self.dirty = False
+            elif self.before is not None:
+                data, self.dirty = self.before
+                self.restore(json.loads(data))
+            self.before = None
+        if self.dirty:
+            self.mark_dirty()
+
+
+class UnitOfWork:
+    """
+    Apply changes to several stores in memory and commit them together.
+
+        with UnitOfWork([streak.store, achievements.store], "gamification.intent"):
+            ...  # save_* calls only mark stores dirty
+
+    On success every dirty store is written in one atomic multi-file
+    commit. If the block raises, stores with a restore callback get their
+    data back as it was when the block started, and nothing is written.
+
+    Logs (objects with begin(), pending_append() and end()) hold the lines
+    appended inside the block and have them written by the same commit.
+    """
+
+    def __init__(self, stores, intent_file, logs=()):
+        self.stores = list(stores)
+        self.intent_file = intent_file
+        self.logs = list(logs)
+
+    def __enter__(self):
+        for store in self.stores:
+            store.begin()
+        for log in self.logs:
+            log.begin()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        committed = False
+        try:
+            if exc_type is None:
+                # Taken first: a log moves its stores' offsets to where its lines will land
+                appends = {}
+                for log in self.logs:
+                    pending = log.pending_append()
+                    if pending:
+                        appends[log.filename] = pending
+                dirty = [store for store in self.stores if store.dirty]
+                if dirty or appends:
+                    write_files_atomic({store.filename: store.snapshot() for store in dirty}, self.intent_file,
+                                       appends)
+                    for store in dirty:
+                        store.signature = file_signature(store.filename)
+                committed = True
+        finally:
+            for log in self.logs:
+                log.end()
+            for store in self.stores:
+                store.end(committed)
+        return False
+
+
+def flush_all():
+    """Write pending changes for every live store."""
+    for store in list(_stores):
+        store.flush()
+
+
+atexit.register(flush_all)
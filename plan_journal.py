@@ -0,0 +1,144 @@
+"""
+Append-only storage for meal plans.
+
+Plans live in three files:
+
+- the snapshot (meal_plans.json): recent plans keyed by date, rewritten
+  only when the journal is compacted
+- the journal (meal_plans.journal.jsonl): one JSON line per change since
+  the last snapshot, so a save costs one short append
+- the archive (meal_plans.archive.jsonl): one line per plan older than
+  the retention window, read only when old plans are asked for
+
+Loading reads the snapshot and replays the journal tail; the archive is
+never parsed on the normal path.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+from persistence import file_signature, load_json, write_json_atomic
+
+
+class MealPlanJournal:
+    """Snapshot + journal + archive files for meal plans."""
+
+    def __init__(self, filename="meal_plans.json", retention_days=60, compact_every=100):
+        base, _ = os.path.splitext(filename)
+        self.filename = filename
+        self.journal_file = base + ".journal.jsonl"
+        self.archive_file = base + ".archive.jsonl"
+        self.retention_days = retention_days
+        self.compact_every = compact_every
+        self.pending = 0
+        self.signature = None
+
+    def _signature(self):
+        return file_signature(self.filename), file_signature(self.journal_file)
+
+    def changed_on_disk(self):
+        """True if another process changed the snapshot or journal since this one last touched them."""
+        return self._signature() != self.signature
+
+    def load(self):
+        """Return recent plans: the snapshot with journaled changes applied."""
+        self.signature = self._signature()
+        plans = load_json(self.filename, dict)
+
+        self.pending = 0
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-append
+                        continue
+                    apply_entry(plans, entry)
+                    self.pending += 1
+        return plans
+
+    def append(self, entry):
+        """Record one change; costs a single line regardless of history size."""
+        line = json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+        with open(self.journal_file, 'ab+') as f:
+            # Terminate a torn line left by a crash mid-append, or this
+            # entry would be glued onto it and dropped on the next load
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+        self.pending += 1
+        self.signature = self._signature()
+
+    def needs_compaction(self):
+        return self.pending >= self.compact_every
+
+    def compact(self, plans, today=None):
+        """
+        Archive plans past the retention window, write a new snapshot and
+        clear the journal. Archived dates are removed from `plans`.
+
+        Returns:
+            int: Number of plans archived
+        """
+        today = today or datetime.now().date()
+        cutoff = (today - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        old_dates = sorted(date for date in plans if date < cutoff)
+
+        # Archive first: a crash after this point only leaves duplicate
+        # archive lines, which load_archive resolves (last line wins)
+        if old_dates:
+            with open(self.archive_file, 'a') as f:
+                for date in old_dates:
+                    f.write(json.dumps({"date": date, "plan": plans[date]}, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            for date in old_dates:
+                del plans[date]
+
+        write_json_atomic(self.filename, plans)
+
+        with open(self.journal_file, 'w'):
+            pass
+        self.pending = 0
+        self.signature = self._signature()
+        return len(old_dates)
+
+    def load_archive(self, dates=None):
+        """
+        Read archived plans.
+
+        Args:
+            dates (iterable): Only return these dates; all archived plans if None
+
+        Returns:
+            dict: Date -> plan
+        """
+        wanted = set(dates) if dates is not None else None
+        archived = {}
+        if not os.path.exists(self.archive_file):
+            return archived
+        with open(self.archive_file, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if wanted is None or entry.get("date") in wanted:
+                    archived[entry["date"]] = entry["plan"]
+        return archived
+
+
+def apply_entry(plans, entry):
+    """Apply one journal entry to a plans dict."""
+    op = entry.get("op")
+    date = entry.get("date")
+    if op == "set_plan":
+        plans[date] = entry["plan"]
+    elif op == "set_day":
+        plans.setdefault(date, {})[entry["day"]] = entry["meal"]
+    elif op == "delete_plan":
+        plans.pop(date, None)
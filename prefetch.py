@@ -0,0 +1,76 @@
+"""
+Background prefetching of AI cooking tips for recipes the user is looking at.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TipsPrefetcher:
+    """
+    Start get_cooking_tips requests early on a small thread pool.
+
+    At most max_pending requests are kept; starting another one cancels
+    the oldest, so browsing many recipes never queues up a backlog.
+    """
+
+    def __init__(self, fetch, max_workers=2, max_pending=4):
+        self.fetch = fetch
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tips-prefetch")
+        self.futures = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(recipe_name, dietary_preferences=None):
+        return (recipe_name.strip().lower(), (dietary_preferences or "").strip().lower())
+
+    def prefetch(self, recipe_name, dietary_preferences=None):
+        """Start fetching tips for a recipe unless a request is already pending."""
+        if not recipe_name or not recipe_name.strip():
+            return
+        key = self._key(recipe_name, dietary_preferences)
+        with self.lock:
+            if key in self.futures:
+                return
+            while len(self.futures) >= self.max_pending:
+                oldest = next(iter(self.futures))
+                self.futures.pop(oldest).cancel()
+            self.futures[key] = self.executor.submit(self.fetch, recipe_name, dietary_preferences)
+
+    def get(self, recipe_name, dietary_preferences=None, timeout=None):
+        """
+        Return prefetched tips, waiting up to timeout for a running request.
+
+        Returns None when nothing was prefetched, the request was cancelled,
+        or it failed, so the caller can fall back to a direct call.
+        """
+        with self.lock:
+            future = self.futures.pop(self._key(recipe_name, dietary_preferences), None)
+        if future is None or future.cancelled():
+            return None
+        try:
+            tips = future.result(timeout=timeout)
+        except Exception:
+            return None
+        if not tips or tips.startswith("Unable to generate tips"):
+            return None
+        return tips
+
+    def cancel_all(self):
+        """Cancel every pending request that hasn't started yet."""
+        with self.lock:
+            for future in self.futures.values():
+                future.cancel()
+            self.futures.clear()
+
+    def shutdown(self):
+        """Cancel pending work and stop the worker threads."""
+        self.cancel_all()
+        self.executor.shutdown(wait=False)
+
+
+def prefetch_enabled():
+    """Prefetching is opt-in since it spends API calls the user may not need."""
+    return os.getenv("AI_CHEF_PREFETCH_TIPS", "").lower() in {"1", "true", "yes"}
@@ -0,0 +1,183 @@
+"""
+Similarity cache for AI recipe requests.
+
+Free-text descriptions are canonicalized (lowercase, stopwords dropped,
+synonyms folded, crude singular forms) and indexed by TF-IDF weight in an
+inverted index. A new request whose description is similar enough to a
+cached one, and whose hard constraints (diet, cuisine, difficulty, time)
+are identical, reuses the cached recipe instead of calling the model.
+"""
+
+import json
+import math
+import re
+from datetime import datetime
+
+from persistence import JsonStore
+
+STOPWORDS = {
+    "a", "an", "and", "the", "for", "with", "of", "to", "in", "on", "some", "something",
+    "me", "my", "i", "want", "would", "like", "make", "please", "recipe", "dish", "meal",
+    "that", "is", "it", "can", "you", "give", "using", "made", "style", "kind", "really"
+}
+
+SYNONYMS = {
+    "fast": "quick",
+    "speedy": "quick",
+    "rapid": "quick",
+    "easy": "simple",
+    "weeknight": "quick",
+    "supper": "dinner",
+    "veggie": "vegetarian",
+    "veg": "vegetarian",
+    "spicy": "hot",
+    "chilli": "chili",
+    "prawn": "shrimp",
+    "mince": "ground",
+    "noodle": "pasta",
+    "spaghetti": "pasta",
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def canonical_tokens(text):
+    """Turn free text into a sorted list of canonical tokens."""
+    tokens = set()
+    for word in _TOKEN.findall((text or "").lower()):
+        if len(word) > 3 and word.endswith("es") and word[:-2].endswith(("sh", "ch", "o")):
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        word = SYNONYMS.get(word, word)
+        if word not in STOPWORDS:
+            tokens.add(word)
+    return sorted(tokens)
+
+
+def constraint_key(dietary_preference=None, cuisine_type=None, cook_time=None, difficulty=None):
+    """Exact-match part of a request; similar prompts never cross these."""
+    return "|".join([
+        (dietary_preference or "").strip().lower(),
+        (cuisine_type or "").strip().lower(),
+        str(cook_time or ""),
+        (difficulty or "").strip().lower(),
+    ])
+
+
+class PromptCache:
+    """Persisted TF-IDF similarity cache of generated recipes."""
+
+    def __init__(self, filename="prompt_cache.json", threshold=0.8, max_entries=1000):
+        self.filename = filename
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.json_store = JsonStore(
+            filename, lambda: {"entries": self.entries, "lookups": self.lookups, "hits": self.hits}
+        )
+        # The store's lock, so a debounced save never sees an entry half added
+        self.lock = self.json_store.lock
+        data = self.load_cache()
+        self.entries = data.get("entries", [])
+        self.lookups = data.get("lookups", 0)
+        self.hits = data.get("hits", 0)
+        self._rebuild_index()
+
+    def load_cache(self):
+        """Load cached entries and hit statistics from file."""
+        data = self.json_store.load(dict)
+        return data if isinstance(data, dict) else {}
+
+    def save_cache(self):
+        """Schedule a save of cached entries and hit statistics."""
+        self.json_store.mark_dirty()
+
+    def _rebuild_index(self):
+        self.postings = {}
+        self.doc_freq = {}
+        for position, entry in enumerate(self.entries):
+            for token in entry["tokens"]:
+                self.postings.setdefault(token, set()).add(position)
+                self.doc_freq[token] = self.doc_freq.get(token, 0) + 1
+
+    def _idf(self, token):
+        return math.log((1 + len(self.entries)) / (1 + self.doc_freq.get(token, 0))) + 1
+
+    def _similarity(self, query_tokens, entry_tokens):
+        """Cosine similarity of binary TF-IDF vectors."""
+        query_set = set(query_tokens)
+        shared = sum(self._idf(t) ** 2 for t in query_set.intersection(entry_tokens))
+        if not shared:
+            return 0.0
+        query_norm = math.sqrt(sum(self._idf(t) ** 2 for t in query_set))
+        entry_norm = math.sqrt(sum(self._idf(t) ** 2 for t in entry_tokens))
+        return shared / (query_norm * entry_norm)
+
+    def lookup(self, text, constraints):
+        """
+        Find a cached recipe for a similar request.
+
+        Args:
+            text (str): Description and ingredients of the request
+            constraints (str): Value from constraint_key()
+
+        Returns:
+            dict: Copy of the cached recipe, or None on a miss
+        """
+        tokens = canonical_tokens(text)
+        if not tokens:
+            return None
+
+        with self.lock:
+            self.lookups += 1
+            candidates = set()
+            for token in tokens:
+                candidates.update(self.postings.get(token, ()))
+
+            best, best_score = None, 0.0
+            for position in candidates:
+                entry = self.entries[position]
+                if entry["constraints"] != constraints:
+                    continue
+                score = self._similarity(tokens, entry["tokens"])
+                if score > best_score:
+                    best, best_score = entry, score
+
+            hit = best is not None and best_score >= self.threshold
+            if hit:
+                self.hits += 1
+            # Counters only change in memory here; the write is debounced
+            self.save_cache()
+            return json.loads(json.dumps(best["recipe"])) if hit else None
+
+    def store(self, text, constraints, recipe):
+        """Cache a generated recipe under the request that produced it."""
+        tokens = canonical_tokens(text)
+        if not tokens:
+            return
+        with self.lock:
+            self.entries.append({
+                "tokens": tokens,
+                "constraints": constraints,
+                "recipe": dict(recipe),
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            })
+            if len(self.entries) > self.max_entries:
+                self.entries = self.entries[-self.max_entries:]
+                self._rebuild_index()
+            else:
+                position = len(self.entries) - 1
+                for token in tokens:
+                    self.postings.setdefault(token, set()).add(position)
+                    self.doc_freq[token] = self.doc_freq.get(token, 0) + 1
+            self.save_cache()
+
+    def stats(self):
+        """Return lookup count, hit count and hit rate."""
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0
+            }
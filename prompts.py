@@ -0,0 +1,175 @@
+"""
+Prompt construction for AI Chef model calls.
+
+Templates are versioned so prompt changes can be compared in metrics and
+benchmarks. Messages are built from precompiled parts, sized with a local
+token estimate, and trimmed to a budget before they are sent.
+"""
+
+import math
+import re
+
+RECIPE_PROMPT_VERSION = "recipe-v2"
+
+# Token budget for the user part of a recipe prompt
+RECIPE_PROMPT_BUDGET = 160
+DESCRIPTION_BUDGET = 60
+
+PROMPT_TEMPLATES = {
+    # Original prompt, kept so benchmarks can compare against it
+    "recipe-v1": {
+        "system": (
+            "You are a professional chef who creates delicious, easy-to-follow recipes tailored to "
+            "user preferences. Output must be valid JSON only."
+        ),
+        "schema": (
+            "\n\nReturn ONLY valid JSON with this exact schema:\n"
+            "{\"name\": string, \"servings\": int, \"cook_time\": int, \"difficulty\": \"easy|medium|hard\", "
+            "\"ingredients\": [string], \"instructions\": [string], \"cuisine\": string, \"dietary\": [string]}"
+        ),
+        "retry": "Your previous output was not parseable ({error}). Return only valid JSON in the exact schema.",
+        "retry_keeps_context": False,
+    },
+    # Schema lives in a stable system prompt; retries resend the request
+    "recipe-v2": {
+        "system": (
+            "You are a professional chef. Reply with one JSON object only: name, servings (int), "
+            "cook_time (int minutes), difficulty (easy|medium|hard), ingredients [str], "
+            "instructions [str], cuisine, dietary [str]."
+        ),
+        "schema": "",
+        "retry": "That was not valid JSON ({error}). Reply with only the JSON object for the request above.",
+        "retry_keeps_context": True,
+    },
+}
+
+TIPS_SYSTEM_MESSAGE = {"role": "system", "content": "You are a helpful cooking assistant providing practical tips."}
+SUBSTITUTION_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a knowledgeable chef helping with ingredient substitutions."
+}
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    """
+    Estimate the number of tokens in text without a tokenizer dependency.
+
+    Words cost about one token per four characters and punctuation one
+    token each, which tracks BPE counts closely for English prompts.
+    """
+    if not text:
+        return 0
+    return sum(math.ceil(len(piece) / 4) if piece[0].isalnum() or piece[0] == "_" else 1
+               for piece in _TOKEN_PIECES.findall(text))
+
+
+def count_message_tokens(messages):
+    """Estimate prompt tokens for a chat message list, including per-message overhead."""
+    return sum(4 + count_tokens(message["content"]) for message in messages) + 2
+
+
+def _trim_to_budget(text, budget):
+    """Cut text to roughly `budget` tokens at a word boundary."""
+    if count_tokens(text) <= budget:
+        return text
+    words = text.split()
+    kept = []
+    used = 0
+    for word in words:
+        cost = count_tokens(word)
+        if used + cost > budget:
+            break
+        kept.append(word)
+        used += cost
+    return " ".join(kept)
+
+
+def _dedupe_ingredients(ingredients):
+    seen = set()
+    unique = []
+    for ingredient in ingredients or []:
+        key = " ".join(str(ingredient).lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(str(ingredient).strip())
+    return unique
+
+
+def build_recipe_messages(ingredients=None, dietary_preference=None, cuisine_type=None,
+                          cook_time=None, difficulty=None, description=None,
+                          version=RECIPE_PROMPT_VERSION, budget=RECIPE_PROMPT_BUDGET):
+    """
+    Build the chat messages for a recipe request.
+
+    Long ingredient lists are cut to fit the token budget; the number of
+    dropped items is mentioned so the model knows the list was shortened.
+
+    Returns:
+        list: Chat messages (system + user)
+    """
+    template = PROMPT_TEMPLATES[version]
+    prompt_parts = ["Create a detailed recipe"]
+
+    if description:
+        prompt_parts.append(f"for: {_trim_to_budget(description, DESCRIPTION_BUDGET)}")
+    if dietary_preference:
+        prompt_parts.append(f"that is {dietary_preference}")
+    if cuisine_type:
+        prompt_parts.append(f"in {cuisine_type} style")
+    if cook_time:
+        prompt_parts.append(f"that takes no more than {cook_time} minutes to cook")
+    if difficulty:
+        prompt_parts.append(f"with {difficulty} difficulty level")
+
+    prompt = " ".join(prompt_parts)
+    unique_ingredients = _dedupe_ingredients(ingredients)
+    if unique_ingredients:
+        remaining = budget - count_tokens(prompt) - count_tokens(" using these ingredients: .")
+        kept = []
+        for ingredient in unique_ingredients:
+            cost = count_tokens(ingredient) + 1
+            if cost > remaining:
+                break
+            kept.append(ingredient)
+            remaining -= cost
+        ingredient_text = ", ".join(kept)
+        dropped = len(unique_ingredients) - len(kept)
+        if dropped:
+            ingredient_text += f" (+{dropped} more optional)"
+        prompt += f" using these ingredients: {ingredient_text}"
+
+    return [
+        {"role": "system", "content": template["system"]},
+        {"role": "user", "content": prompt + "." + template["schema"]},
+    ]
+
+
+def build_retry_messages(messages, error, version=RECIPE_PROMPT_VERSION):
+    """
+    Build the follow-up messages after an unparseable answer.
+
+    Current templates keep the original request and add a one-line
+    correction, so the retry answers the same request. The bad output is
+    not echoed back, which keeps the retry close to the original size.
+    """
+    template = PROMPT_TEMPLATES[version]
+    correction = {"role": "user", "content": template["retry"].format(error=error)}
+    if template["retry_keeps_context"]:
+        return list(messages) + [correction]
+    return [messages[0], correction]
+
+
+def build_tips_messages(recipe_name, dietary_preferences=None):
+    """Build the chat messages for a cooking tips request."""
+    prompt = f"Provide 3-5 helpful cooking tips for making {recipe_name}"
+    if dietary_preferences:
+        prompt += f" with {dietary_preferences} modifications"
+    return [TIPS_SYSTEM_MESSAGE, {"role": "user", "content": prompt}]
+
+
+def build_substitution_messages(ingredient):
+    """Build the chat messages for an ingredient substitution request."""
+    prompt = f"What are good substitutions for {ingredient} in cooking? Provide 3-4 options with brief explanations."
+    return [SUBSTITUTION_SYSTEM_MESSAGE, {"role": "user", "content": prompt}]
@@ -0,0 +1,151 @@
+"""
+Indexed recipe lookups.
+
+RecipeStore keeps an inverted index from ingredient to recipes plus
+indexes on cuisine, difficulty, dietary tags and cook time. An ingredient
+search only touches recipes sharing at least one ingredient with the
+query, and filters intersect the matching index entries instead of
+scanning every recipe. Results match find_recipes_by_ingredients and
+filter_recipes in recipes.py, in the same order.
+"""
+
+import bisect
+import heapq
+import json
+from collections import Counter
+
+from recipes import RECIPE_DATABASE
+
+
+class RecipeStore:
+    """Recipes with indexes for ingredient search and attribute filters."""
+
+    def __init__(self, recipes=None):
+        self.recipes = list(RECIPE_DATABASE if recipes is None else recipes)
+        self.ingredients = []
+        self.sizes = []
+        self.cook_times = []
+        self.by_ingredient = {}
+        self.by_cuisine = {}
+        self.by_difficulty = {}
+        self.by_dietary = {}
+        self.by_name = {}
+        times = []
+        for recipe_id, recipe in enumerate(self.recipes):
+            ingredients = frozenset(ingredient.lower() for ingredient in recipe.get("ingredients", []))
+            self.ingredients.append(ingredients)
+            self.sizes.append(len(ingredients))
+            self.cook_times.append(recipe.get("cook_time"))
+            for ingredient in ingredients:
+                self.by_ingredient.setdefault(ingredient, []).append(recipe_id)
+            if recipe.get("cuisine"):
+                self.by_cuisine.setdefault(recipe["cuisine"].lower(), set()).add(recipe_id)
+            if recipe.get("difficulty"):
+                self.by_difficulty.setdefault(recipe["difficulty"].lower(), set()).add(recipe_id)
+            for tag in recipe.get("dietary", []):
+                self.by_dietary.setdefault(tag.lower(), set()).add(recipe_id)
+            if recipe.get("cook_time") is not None:
+                times.append((recipe["cook_time"], recipe_id))
+            self.by_name.setdefault(recipe["name"].lower(), recipe)
+        times.sort()
+        self.times = [time for time, _ in times]
+        self.time_ids = [recipe_id for _, recipe_id in times]
+
+    @classmethod
+    def from_file(cls, filename):
+        """Load recipes from a JSON list or a JSONL file of recipe dicts."""
+        with open(filename, 'r') as f:
+            text = f.read()
+        if text.lstrip().startswith("["):
+            return cls(json.loads(text))
+        return cls(json.loads(line) for line in text.splitlines() if line.strip())
+
+    def get(self, name):
+        """Recipe by case-insensitive name, or None."""
+        return self.by_name.get(name.lower())
+
+    def _allowed(self, cook_time=None, difficulty=None, dietary=None, cuisine=None):
+        """Ids passing every given filter, or None if no filter is given."""
+        postings = []
+        if cook_time:
+            postings.append(self.time_ids[:bisect.bisect_right(self.times, cook_time)])
+        if difficulty:
+            postings.append(self.by_difficulty.get(difficulty.lower(), ()))
+        if dietary:
+            postings.append(self.by_dietary.get(dietary.lower(), ()))
+        if cuisine:
+            postings.append(self.by_cuisine.get(cuisine.lower(), ()))
+        if not postings:
+            return None
+        postings.sort(key=len)
+        allowed = set(postings[0])
+        for posting in postings[1:]:
+            allowed.intersection_update(posting)
+        return allowed
+
+    def _narrow(self, ids, cook_time=None, difficulty=None, dietary=None, cuisine=None):
+        """The ids passing every given filter, checked one by one; cheaper than _allowed for few ids."""
+        if cook_time:
+            cook_times = self.cook_times
+            ids = [i for i in ids if cook_times[i] is not None and cook_times[i] <= cook_time]
+        for index, value in ((self.by_difficulty, difficulty), (self.by_dietary, dietary),
+                             (self.by_cuisine, cuisine)):
+            if value:
+                members = index.get(value.lower(), ())
+                ids = [i for i in ids if i in members]
+        return ids
+
+    def filter(self, cook_time=None, difficulty=None, dietary=None, cuisine=None):
+        """Recipes passing every given filter, in database order; see recipes.filter_recipes."""
+        allowed = self._allowed(cook_time, difficulty, dietary, cuisine)
+        if allowed is None:
+            return list(self.recipes)
+        return [self.recipes[recipe_id] for recipe_id in sorted(allowed)]
+
+    def search(self, available_ingredients, cook_time=None, difficulty=None, dietary=None, cuisine=None,
+               limit=None):
+        """
+        Recipes sharing ingredients with available_ingredients, best match first.
+
+        Args:
+            available_ingredients (list): Ingredient names
+            cook_time, difficulty, dietary, cuisine: Optional filters as in filter()
+            limit (int): Only return this many matches
+
+        Returns:
+            list: Match dicts as from recipes.find_recipes_by_ingredients
+        """
+        available = set(ingredient.lower().strip() for ingredient in available_ingredients)
+        counts = Counter()
+        for ingredient in available:
+            counts.update(self.by_ingredient.get(ingredient, ()))
+
+        # Filters are checked per candidate: the ingredient postings are
+        # usually far smaller than e.g. every recipe under 45 minutes
+        candidates = self._narrow(counts, cook_time, difficulty, dietary, cuisine)
+        sizes = self.sizes
+        # -recipe_id breaks ties by database order, like a stable sort
+        ranked = [(counts[i] / sizes[i], counts[i], -i) for i in candidates]
+        if limit is not None:
+            ranked = heapq.nlargest(limit, ranked)
+        else:
+            ranked.sort(reverse=True)
+
+        matches = []
+        for match_percentage, matching, recipe_id in ranked:
+            missing = self.ingredients[-recipe_id] - available
+            matches.append({
+                "recipe": self.recipes[-recipe_id],
+                "matching_count": matching,
+                "missing_count": len(missing),
+                "match_percentage": match_percentage,
+                "missing_ingredients": list(missing)
+            })
+        return matches
+
+
+def load_store(filename=None):
+    """RecipeStore over a recipe file, or over the built-in database if filename is None."""
+    if filename:
+        return RecipeStore.from_file(filename)
+    return RecipeStore()
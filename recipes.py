@@ -250,9 +250,10 @@ def filter_recipes(cook_time=None, difficulty=None, dietary=None, cuisine=None):
     return filtered
 
 
+# Case-insensitive name index, built once at import
+RECIPE_INDEX = {recipe["name"].lower(): recipe for recipe in RECIPE_DATABASE}
+
+
 def get_recipe_by_name(name):
     """Get a specific recipe by name."""
-    for recipe in RECIPE_DATABASE:
-        if recipe["name"].lower() == name.lower():
-            return recipe
-    return None
+    return RECIPE_INDEX.get(name.lower())
@@ -0,0 +1,130 @@
+"""
+Model routing: pick model, max_tokens and temperature per request type.
+
+Routes come from DEFAULT_ROUTES, optionally overridden by a JSON file
+(model_routes.json, or the path in AI_CHEF_ROUTES_FILE) with the same shape:
+
+    {"cooking_tips": {"model": "gpt-4o-mini", "p95_latency_budget": 4.0}}
+"""
+
+import json
+import os
+import random
+import threading
+
+import metrics
+from prompts import count_message_tokens
+
+DEFAULT_ROUTES = {
+    "generate_recipe": {
+        "model": "gpt-3.5-turbo",
+        "fallback_model": "gpt-4o-mini",
+        "max_tokens": 1500,
+        "temperature": 0.7,
+        "timeout": 60,
+        "p95_latency_budget": 30.0,
+        "max_cost": 0.005
+    },
+    "cooking_tips": {
+        "model": "gpt-4o-mini",
+        "fallback_model": "gpt-3.5-turbo",
+        "max_tokens": 300,
+        "temperature": 0.7,
+        "timeout": 20,
+        "p95_latency_budget": 6.0,
+        "max_cost": 0.001
+    },
+    "suggest_substitutions": {
+        "model": "gpt-4o-mini",
+        "fallback_model": "gpt-3.5-turbo",
+        "max_tokens": 200,
+        "temperature": 0.5,
+        "timeout": 20,
+        "p95_latency_budget": 5.0,
+        "max_cost": 0.001
+    },
+}
+
+# Latency samples needed before a model's p95 is trusted
+MIN_LATENCY_SAMPLES = 20
+# Share of traffic still sent to a slow primary so its p95 can recover
+PROBE_RATE = 0.1
+
+
+def load_routes(filename=None):
+    """Return DEFAULT_ROUTES with any overrides from the routes file applied."""
+    filename = filename or os.getenv("AI_CHEF_ROUTES_FILE", "model_routes.json")
+    routes = {operation: dict(route) for operation, route in DEFAULT_ROUTES.items()}
+    if os.path.exists(filename):
+        try:
+            with open(filename, 'r') as f:
+                overrides = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            overrides = {}
+        for operation, route in overrides.items():
+            routes.setdefault(operation, {}).update(route)
+    return routes
+
+
+class ModelRouter:
+    """Choose call settings per operation within latency and cost budgets."""
+
+    def __init__(self, routes=None, aggregator=None, rng=None):
+        self.routes = routes if routes is not None else load_routes()
+        self.aggregator = aggregator or metrics.aggregator
+        self.rng = rng or random.Random()
+        self.lock = threading.Lock()
+
+    def route(self, operation, messages):
+        """
+        Pick settings for a call.
+
+        Args:
+            operation (str): Request type, e.g. "cooking_tips"
+            messages (list): Chat messages that will be sent
+
+        Returns:
+            dict: model, max_tokens, temperature, timeout and the routing reason
+        """
+        config = self.routes.get(operation) or self.routes["generate_recipe"]
+        model = config["model"]
+        fallback = config.get("fallback_model")
+        max_tokens = config["max_tokens"]
+        reason = "primary"
+
+        # Latency budget: move to the fallback while the primary's p95 is too high
+        budget = config.get("p95_latency_budget")
+        if fallback and budget:
+            p95 = self.aggregator.p95_latency(operation, model, min_samples=MIN_LATENCY_SAMPLES)
+            with self.lock:
+                probe = self.rng.random() < PROBE_RATE
+            if p95 is not None and p95 > budget and not probe:
+                model = fallback
+                reason = "latency"
+
+        # Cost budget: prefer the fallback if it fits, else shorten the answer
+        max_cost = config.get("max_cost")
+        if max_cost:
+            prompt_tokens = count_message_tokens(messages)
+            if metrics.estimate_cost(model, prompt_tokens, max_tokens) > max_cost:
+                if fallback and model != fallback and \
+                        metrics.estimate_cost(fallback, prompt_tokens, max_tokens) <= max_cost:
+                    model = fallback
+                    reason = "cost"
+                else:
+                    prompt_price, completion_price = metrics.MODEL_PRICES.get(model, (0.0, 0.0))
+                    if completion_price:
+                        affordable = int((max_cost * 1000 - prompt_tokens * prompt_price) / completion_price)
+                        max_tokens = max(64, min(max_tokens, affordable))
+                        reason = "cost_trimmed"
+
+        return {
+            "model": model,
+            "max_tokens": max_tokens,
+            "temperature": config.get("temperature", 0.7),
+            "timeout": config.get("timeout", 60),
+            "reason": reason
+        }
+
+
+router = ModelRouter()
@@ -0,0 +1,54 @@
+"""
+Long-lived state for one run of the app.
+
+Menus get their stores from a Session instead of constructing them, so
+favorites, the pantry, meal plans and gamification state are parsed once
+per run. Before handing a store out, the session compares its files'
+modification time and size with what the store last read or wrote, and
+reloads it only if another process has changed them in the meantime.
+A store with unsaved changes is never reloaded.
+"""
+
+from gamification import GamificationManager
+from meal_planner import MealPlanner, PantryManager, SavedRecipes
+
+
+class Session:
+    """Stores shared by every menu, loaded on first use."""
+
+    def __init__(self, factories=None):
+        """
+        Args:
+            factories (dict): Store name -> zero-argument constructor; the
+                app's default files if None
+        """
+        self.factories = factories or {
+            "saved_recipes": SavedRecipes,
+            "pantry": PantryManager,
+            "planner": MealPlanner,
+            "gamification": GamificationManager,
+        }
+        self.stores = {}
+
+    def get(self, name):
+        """Return the named store, (re)loading it if needed."""
+        store = self.stores.get(name)
+        if store is None or store.changed_on_disk():
+            store = self.stores[name] = self.factories[name]()
+        return store
+
+    @property
+    def saved_recipes(self):
+        return self.get("saved_recipes")
+
+    @property
+    def pantry(self):
+        return self.get("pantry")
+
+    @property
+    def planner(self):
+        return self.get("planner")
+
+    @property
+    def gamification(self):
+        return self.get("gamification")
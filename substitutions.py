@@ -0,0 +1,430 @@
+"""
+Ingredient substitution knowledge base with a learned table for AI answers
+"""
+
+import re
+from datetime import datetime
+
+from persistence import JsonStore
+
+SUBSTITUTION_DATABASE = {
+    "butter": {
+        "aliases": ["unsalted butter", "salted butter"],
+        "substitutes": [
+            {"name": "olive oil", "ratio": "3/4 cup per 1 cup butter", "dietary": ["vegan", "dairy-free"],
+             "notes": "Best for sautéing and savory dishes"},
+            {"name": "coconut oil", "ratio": "1:1", "dietary": ["vegan", "dairy-free"],
+             "notes": "Works well in baking; adds a mild coconut flavor"},
+            {"name": "vegan butter", "ratio": "1:1", "dietary": ["vegan", "dairy-free"],
+             "notes": "Closest match for texture and flavor"},
+            {"name": "applesauce", "ratio": "1/2 cup per 1 cup butter", "dietary": ["vegan", "dairy-free"],
+             "notes": "Baking only; makes results denser and sweeter"}
+        ]
+    },
+    "egg": {
+        "aliases": ["eggs", "large egg", "large eggs"],
+        "substitutes": [
+            {"name": "flax egg", "ratio": "1 tbsp ground flaxseed + 3 tbsp water per egg", "dietary": ["vegan"],
+             "notes": "Let sit 5 minutes to gel; good binder in baking"},
+            {"name": "mashed banana", "ratio": "1/4 cup per egg", "dietary": ["vegan"],
+             "notes": "Adds sweetness; best in muffins and pancakes"},
+            {"name": "aquafaba", "ratio": "3 tbsp per egg", "dietary": ["vegan"],
+             "notes": "Chickpea liquid; whips like egg whites"},
+            {"name": "plain yogurt", "ratio": "1/4 cup per egg", "dietary": ["vegetarian"],
+             "notes": "Adds moisture to cakes and quick breads"}
+        ]
+    },
+    "milk": {
+        "aliases": ["whole milk", "2% milk", "skim milk"],
+        "substitutes": [
+            {"name": "oat milk", "ratio": "1:1", "dietary": ["vegan", "dairy-free"],
+             "notes": "Neutral flavor; good for baking and sauces"},
+            {"name": "soy milk", "ratio": "1:1", "dietary": ["vegan", "dairy-free"],
+             "notes": "Higher protein; behaves most like dairy milk"},
+            {"name": "almond milk", "ratio": "1:1", "dietary": ["vegan", "dairy-free"],
+             "notes": "Thinner; use unsweetened for savory dishes"},
+            {"name": "water + butter", "ratio": "1 cup water + 1 tbsp butter per cup", "dietary": ["vegetarian"],
+             "notes": "Pantry fallback for baking"}
+        ]
+    },
+    "heavy cream": {
+        "aliases": ["cream", "whipping cream", "double cream"],
+        "substitutes": [
+            {"name": "milk + butter", "ratio": "3/4 cup milk + 1/4 cup melted butter per cup", "dietary": ["vegetarian"],
+             "notes": "Fine for sauces and soups; won't whip"},
+            {"name": "full-fat coconut milk", "ratio": "1:1", "dietary": ["vegan", "dairy-free"],
+             "notes": "Chill the can to whip the solid part"},
+            {"name": "cashew cream", "ratio": "1:1", "dietary": ["vegan", "dairy-free"],
+             "notes": "Blend soaked cashews with water until smooth"}
+        ]
+    },
+    "sour cream": {
+        "aliases": [],
+        "substitutes": [
+            {"name": "greek yogurt", "ratio": "1:1", "dietary": ["vegetarian"],
+             "notes": "Tangier and lower in fat; great for dips and toppings"},
+            {"name": "cottage cheese, blended", "ratio": "1:1", "dietary": ["vegetarian"],
+             "notes": "Blend until smooth; add a splash of lemon juice"},
+            {"name": "cashew cream + lemon juice", "ratio": "1:1", "dietary": ["vegan", "dairy-free"],
+             "notes": "Dairy-free topping for tacos and soups"}
+        ]
+    },
+    "buttermilk": {
+        "aliases": [],
+        "substitutes": [
+            {"name": "milk + lemon juice", "ratio": "1 cup milk + 1 tbsp lemon juice", "dietary": ["vegetarian"],
+             "notes": "Let stand 5 minutes before using"},
+            {"name": "plain yogurt thinned with milk", "ratio": "3/4 cup yogurt + 1/4 cup milk", "dietary": ["vegetarian"],
+             "notes": "Good in pancakes and marinades"},
+            {"name": "plant milk + vinegar", "ratio": "1 cup + 1 tbsp vinegar", "dietary": ["vegan", "dairy-free"],
+             "notes": "Soy milk curdles the best"}
+        ]
+    },
+    "plain yogurt": {
+        "aliases": ["yogurt", "greek yogurt"],
+        "substitutes": [
+            {"name": "sour cream", "ratio": "1:1", "dietary": ["vegetarian"],
+             "notes": "Richer; works in dips and baking"},
+            {"name": "coconut yogurt", "ratio": "1:1", "dietary": ["vegan", "dairy-free"],
+             "notes": "Choose unsweetened for savory dishes"},
+            {"name": "buttermilk", "ratio": "1:1", "dietary": ["vegetarian"],
+             "notes": "Thinner; best in baking"}
+        ]
+    },
+    "parmesan": {
+        "aliases": ["parmesan cheese", "parmigiano reggiano"],
+        "substitutes": [
+            {"name": "pecorino romano", "ratio": "1:1", "dietary": ["gluten-free"],
+             "notes": "Saltier and sharper; reduce added salt"},
+            {"name": "grana padano", "ratio": "1:1", "dietary": ["gluten-free"],
+             "notes": "Milder and closest in texture"},
+            {"name": "nutritional yeast", "ratio": "2 tbsp per 1/4 cup cheese", "dietary": ["vegan", "dairy-free"],
+             "notes": "Adds a cheesy, nutty flavor"}
+        ]
+    },
+    "cheese": {
+        "aliases": ["cheddar", "cheddar cheese", "shredded cheese"],
+        "substitutes": [
+            {"name": "monterey jack", "ratio": "1:1", "dietary": ["vegetarian"],
+             "notes": "Melts smoothly; milder flavor"},
+            {"name": "vegan cheese shreds", "ratio": "1:1", "dietary": ["vegan", "dairy-free"],
+             "notes": "Cover while melting for best results"},
+            {"name": "nutritional yeast", "ratio": "1/4 cup per cup of cheese", "dietary": ["vegan", "dairy-free"],
+             "notes": "For flavor in sauces, not for melting on top"}
+        ]
+    },
+    "soy sauce": {
+        "aliases": ["light soy sauce"],
+        "substitutes": [
+            {"name": "tamari", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "Check the label; most tamari is wheat-free"},
+            {"name": "coconut aminos", "ratio": "1:1", "dietary": ["vegan", "gluten-free", "soy-free"],
+             "notes": "Sweeter and less salty; add a pinch of salt"},
+            {"name": "worcestershire sauce", "ratio": "1/2 the amount", "dietary": [],
+             "notes": "Contains anchovies; stronger flavor"}
+        ]
+    },
+    "fish sauce": {
+        "aliases": [],
+        "substitutes": [
+            {"name": "soy sauce + lime juice", "ratio": "1:1", "dietary": ["vegan"],
+             "notes": "Add a pinch of sugar to balance"},
+            {"name": "vegan fish sauce", "ratio": "1:1", "dietary": ["vegan"],
+             "notes": "Usually seaweed based"},
+            {"name": "anchovy paste", "ratio": "1 tsp per 1 tbsp", "dietary": ["pescatarian"],
+             "notes": "Mash into a little water first"}
+        ]
+    },
+    "all-purpose flour": {
+        "aliases": ["flour", "plain flour", "white flour"],
+        "substitutes": [
+            {"name": "gluten-free flour blend", "ratio": "1:1", "dietary": ["gluten-free"],
+             "notes": "Pick a blend with xanthan gum for baking"},
+            {"name": "whole wheat flour", "ratio": "3/4 cup per cup", "dietary": ["vegan"],
+             "notes": "Denser and nuttier; add a little extra liquid"},
+            {"name": "almond flour", "ratio": "1:1 for breading", "dietary": ["gluten-free"],
+             "notes": "Not a 1:1 swap in yeast breads"}
+        ]
+    },
+    "cornstarch": {
+        "aliases": ["corn starch", "cornflour"],
+        "substitutes": [
+            {"name": "all-purpose flour", "ratio": "2 tbsp per 1 tbsp cornstarch", "dietary": ["vegan"],
+             "notes": "Cook a little longer to remove the raw flour taste"},
+            {"name": "arrowroot powder", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "Add at the end; doesn't hold up to long boiling"},
+            {"name": "potato starch", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "Great for crispy coatings"}
+        ]
+    },
+    "baking powder": {
+        "aliases": [],
+        "substitutes": [
+            {"name": "baking soda + cream of tartar", "ratio": "1/4 tsp soda + 1/2 tsp cream of tartar per tsp",
+             "dietary": ["vegan", "gluten-free"], "notes": "Mix right before using"},
+            {"name": "baking soda + buttermilk", "ratio": "1/4 tsp soda + 1/2 cup buttermilk per tsp",
+             "dietary": ["vegetarian"], "notes": "Reduce other liquids by 1/2 cup"}
+        ]
+    },
+    "white sugar": {
+        "aliases": ["sugar", "granulated sugar"],
+        "substitutes": [
+            {"name": "honey", "ratio": "3/4 cup per cup; reduce liquid by 1/4 cup", "dietary": ["vegetarian"],
+             "notes": "Lower oven temperature by 25°F when baking"},
+            {"name": "maple syrup", "ratio": "3/4 cup per cup; reduce liquid by 3 tbsp", "dietary": ["vegan"],
+             "notes": "Adds a caramel note"},
+            {"name": "coconut sugar", "ratio": "1:1", "dietary": ["vegan"],
+             "notes": "Darker color and slight molasses flavor"}
+        ]
+    },
+    "brown sugar": {
+        "aliases": ["light brown sugar", "dark brown sugar"],
+        "substitutes": [
+            {"name": "white sugar + molasses", "ratio": "1 cup sugar + 1 tbsp molasses", "dietary": ["vegan"],
+             "notes": "Use 2 tbsp molasses for dark brown sugar"},
+            {"name": "coconut sugar", "ratio": "1:1", "dietary": ["vegan"],
+             "notes": "Slightly drier; cookies spread less"}
+        ]
+    },
+    "honey": {
+        "aliases": [],
+        "substitutes": [
+            {"name": "maple syrup", "ratio": "1:1", "dietary": ["vegan"],
+             "notes": "Thinner; works in dressings and glazes"},
+            {"name": "agave nectar", "ratio": "1:1", "dietary": ["vegan"],
+             "notes": "Sweeter; consider using a bit less"}
+        ]
+    },
+    "garlic": {
+        "aliases": ["garlic clove", "garlic cloves", "fresh garlic"],
+        "substitutes": [
+            {"name": "garlic powder", "ratio": "1/8 tsp per clove", "dietary": ["vegan", "gluten-free"],
+             "notes": "Add with liquids so it doesn't burn"},
+            {"name": "shallot", "ratio": "1 tbsp minced per clove", "dietary": ["vegan", "gluten-free"],
+             "notes": "Milder and sweeter"},
+            {"name": "asafoetida", "ratio": "a pinch per 2 cloves", "dietary": ["vegan"],
+             "notes": "Low-FODMAP option; bloom in hot oil"}
+        ]
+    },
+    "onion": {
+        "aliases": ["yellow onion", "white onion"],
+        "substitutes": [
+            {"name": "shallots", "ratio": "3 shallots per onion", "dietary": ["vegan", "gluten-free"],
+             "notes": "More delicate flavor"},
+            {"name": "leek", "ratio": "1 leek per onion", "dietary": ["vegan", "gluten-free"],
+             "notes": "Use white and light green parts only"},
+            {"name": "onion powder", "ratio": "1 tbsp per medium onion", "dietary": ["vegan", "gluten-free"],
+             "notes": "No texture; best in sauces and rubs"}
+        ]
+    },
+    "ginger": {
+        "aliases": ["fresh ginger", "ginger root"],
+        "substitutes": [
+            {"name": "ground ginger", "ratio": "1/4 tsp per 1 tbsp fresh", "dietary": ["vegan", "gluten-free"],
+             "notes": "Warmer, less bright flavor"},
+            {"name": "galangal", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "More citrusy and peppery"}
+        ]
+    },
+    "lemon juice": {
+        "aliases": ["lemon", "fresh lemon juice"],
+        "substitutes": [
+            {"name": "lime juice", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "Nearly identical acidity"},
+            {"name": "white wine vinegar", "ratio": "1/2 the amount", "dietary": ["vegan", "gluten-free"],
+             "notes": "For acidity only, not citrus flavor"}
+        ]
+    },
+    "white wine": {
+        "aliases": ["dry white wine"],
+        "substitutes": [
+            {"name": "chicken or vegetable broth + lemon juice", "ratio": "1 cup broth + 1 tbsp lemon juice",
+             "dietary": [], "notes": "Use vegetable broth to keep it vegetarian"},
+            {"name": "white grape juice + vinegar", "ratio": "1 cup + 1 tbsp vinegar", "dietary": ["vegan"],
+             "notes": "Sweeter; good for deglazing"}
+        ]
+    },
+    "chicken broth": {
+        "aliases": ["chicken stock"],
+        "substitutes": [
+            {"name": "vegetable broth", "ratio": "1:1", "dietary": ["vegan", "vegetarian"],
+             "notes": "Lighter flavor; add a pinch of salt"},
+            {"name": "water + bouillon", "ratio": "1 cube per cup of water", "dietary": [],
+             "notes": "Check sodium before adding more salt"}
+        ]
+    },
+    "breadcrumbs": {
+        "aliases": ["bread crumbs", "panko"],
+        "substitutes": [
+            {"name": "crushed crackers", "ratio": "1:1", "dietary": ["vegetarian"],
+             "notes": "Saltier; skip extra salt"},
+            {"name": "rolled oats", "ratio": "1:1", "dietary": ["vegan"],
+             "notes": "Pulse briefly; great for meatballs"},
+            {"name": "almond meal", "ratio": "1:1", "dietary": ["gluten-free"],
+             "notes": "Browns quickly; watch the heat"}
+        ]
+    },
+    "mayonnaise": {
+        "aliases": ["mayo"],
+        "substitutes": [
+            {"name": "greek yogurt", "ratio": "1:1", "dietary": ["vegetarian"],
+             "notes": "Tangier and lighter"},
+            {"name": "mashed avocado", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "Best in sandwiches and salads"},
+            {"name": "vegan mayo", "ratio": "1:1", "dietary": ["vegan"],
+             "notes": "Same texture and use"}
+        ]
+    },
+    "olive oil": {
+        "aliases": ["extra virgin olive oil", "oil", "vegetable oil"],
+        "substitutes": [
+            {"name": "avocado oil", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "Higher smoke point for searing"},
+            {"name": "canola oil", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "Neutral flavor"},
+            {"name": "melted butter", "ratio": "1:1", "dietary": ["vegetarian"],
+             "notes": "Richer flavor; lower smoke point"}
+        ]
+    },
+    "white wine vinegar": {
+        "aliases": ["vinegar", "red wine vinegar", "rice vinegar"],
+        "substitutes": [
+            {"name": "apple cider vinegar", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "Slightly fruity"},
+            {"name": "lemon juice", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "Brighter, citrusy acidity"}
+        ]
+    },
+    "tahini": {
+        "aliases": [],
+        "substitutes": [
+            {"name": "sunflower seed butter", "ratio": "1:1", "dietary": ["vegan", "nut-free"],
+             "notes": "Closest nut-free match"},
+            {"name": "cashew butter", "ratio": "1:1", "dietary": ["vegan"],
+             "notes": "Milder and sweeter"}
+        ]
+    },
+    "ground beef": {
+        "aliases": ["minced beef", "beef mince"],
+        "substitutes": [
+            {"name": "ground turkey", "ratio": "1:1", "dietary": ["gluten-free"],
+             "notes": "Leaner; add a little oil to the pan"},
+            {"name": "lentils", "ratio": "1 cup cooked per 1/2 lb", "dietary": ["vegan", "gluten-free"],
+             "notes": "Great in tacos, chili and bolognese"},
+            {"name": "crumbled tofu or tempeh", "ratio": "1:1", "dietary": ["vegan"],
+             "notes": "Season well and brown in batches"}
+        ]
+    },
+    "chicken": {
+        "aliases": ["chicken breast", "chicken breasts", "chicken thighs"],
+        "substitutes": [
+            {"name": "turkey breast", "ratio": "1:1", "dietary": ["gluten-free"],
+             "notes": "Same cooking times for cutlets"},
+            {"name": "extra-firm tofu", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "Press for 20 minutes before cooking"},
+            {"name": "chickpeas", "ratio": "1 can per 1/2 lb", "dietary": ["vegan", "gluten-free"],
+             "notes": "Best in curries, salads and stews"}
+        ]
+    },
+    "pasta": {
+        "aliases": ["spaghetti", "penne"],
+        "substitutes": [
+            {"name": "gluten-free pasta", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "Rinse after cooking to prevent sticking"},
+            {"name": "zucchini noodles", "ratio": "1 medium zucchini per serving", "dietary": ["vegan", "gluten-free"],
+             "notes": "Cook briefly to avoid a watery sauce"},
+            {"name": "spaghetti squash", "ratio": "1 squash per 4 servings", "dietary": ["vegan", "gluten-free"],
+             "notes": "Roast halves, then shred with a fork"}
+        ]
+    },
+    "rice": {
+        "aliases": ["white rice", "brown rice"],
+        "substitutes": [
+            {"name": "quinoa", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "Cooks in 15 minutes; higher protein"},
+            {"name": "cauliflower rice", "ratio": "1:1", "dietary": ["vegan", "gluten-free"],
+             "notes": "Low-carb; sauté for 5 minutes"},
+            {"name": "couscous", "ratio": "1:1", "dietary": ["vegan"],
+             "notes": "Ready in 5 minutes; contains gluten"}
+        ]
+    },
+}
+
+
+def _normalize_ingredient(ingredient):
+    """Normalize ingredient text for substitution lookups."""
+    return re.sub(r"\s+", " ", ingredient.strip().lower())
+
+
+def _build_index():
+    index = {}
+    for key, entry in SUBSTITUTION_DATABASE.items():
+        for name in [key] + entry.get("aliases", []):
+            index[_normalize_ingredient(name)] = key
+    return index
+
+
+# Alias -> canonical key, built once so lookups are a dict probe
+SUBSTITUTION_INDEX = _build_index()
+
+
+def find_substitutions(ingredient):
+    """
+    Look up substitutes for a common ingredient in the local table.
+
+    Args:
+        ingredient (str): Ingredient name (any case, aliases allowed)
+
+    Returns:
+        dict: Entry with "ingredient" and "substitutes", or None if unknown
+    """
+    normalized = _normalize_ingredient(ingredient)
+    key = SUBSTITUTION_INDEX.get(normalized)
+    if key is None and normalized.endswith("s"):
+        key = SUBSTITUTION_INDEX.get(normalized[:-1])
+    if key is None:
+        return None
+    return {"ingredient": key, "substitutes": SUBSTITUTION_DATABASE[key]["substitutes"]}
+
+
+def format_substitutions(entry):
+    """Render a substitution entry as Markdown, matching the AI answer style."""
+    lines = []
+    for index, substitute in enumerate(entry["substitutes"], 1):
+        line = f"{index}. **{substitute['name'].capitalize()}** ({substitute['ratio']})"
+        if substitute.get("notes"):
+            line += f" - {substitute['notes']}"
+        if substitute.get("dietary"):
+            line += f" _[{', '.join(substitute['dietary'])}]_"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+class LearnedSubstitutions:
+    """Persist AI substitution answers for ingredients missing from the local table."""
+
+    def __init__(self, filename="learned_substitutions.json"):
+        self.filename = filename
+        self.store = JsonStore(filename, lambda: self.learned)
+        self.learned = self.load_learned()
+
+    def load_learned(self):
+        """Load learned substitutions from file."""
+        return self.store.load(dict)
+
+    def save_learned(self):
+        """Schedule a save of learned substitutions."""
+        self.store.mark_dirty()
+
+    def get(self, ingredient):
+        """Return the stored answer for an ingredient, or None."""
+        entry = self.learned.get(_normalize_ingredient(ingredient))
+        return entry.get("text") if entry else None
+
+    def add(self, ingredient, text):
+        """Store an AI answer for an ingredient."""
+        self.learned[_normalize_ingredient(ingredient)] = {
+            "text": text,
+            "learned_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        self.save_learned()